@@ -6,21 +6,193 @@ RAG 질의응답, 문서 업로드, 문서 목록 조회 기능 제공
 import os
 import json
 import base64
-import math
-from typing import List, Dict, Any
+import heapq
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import List, Dict, Any, Iterator
 
 import boto3
+from botocore.exceptions import ClientError
+import numpy as np
 import requests
 
+logger = logging.getLogger(__name__)
+
 # 환경 변수
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 COHERE_API_KEY = os.environ.get("COHERE_API_KEY")
 VECTORSTORE_TABLE_NAME = os.environ.get("VECTORSTORE_TABLE_NAME")
 AWS_REGION = "ap-southeast-2"
+# 웜 컨테이너에서 디코딩된 임베딩 행렬 재사용 여부
+VECTOR_CACHE_ENABLED = os.environ.get("VECTOR_CACHE_ENABLED", "true").lower() == "true"
+# 대량 쓰기 최대 동시 BatchWriteItem 요청 수 (스로틀링 시 자동으로 줄임)
+BULK_WRITE_WORKERS = int(os.environ.get("BULK_WRITE_WORKERS", "8"))
 
 if not VECTORSTORE_TABLE_NAME:
     raise RuntimeError("환경변수 VECTORSTORE_TABLE_NAME 이(가) 설정되지 않았습니다.")
 
+# 임베딩 저장 형식: 리틀 엔디안 float32 바이트 (DynamoDB Binary 속성)
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+# 쓰기마다 증가하는 버전(epoch) 아이템 - 웜 컨테이너 캐시 무효화용
+META_DOCUMENT_ID = "__meta__"
+VERSION_KEY = {"document_id": META_DOCUMENT_ID, "chunk_id": "version"}
+
+# CloudWatch Embedded Metric Format 네임스페이스
+METRICS_NAMESPACE = "RagLambda"
+
+# 2단계 검색: 점수 계산 스캔은 키 + 임베딩(+노름)만 읽고, 상위 k개 텍스트는 BatchGetItem으로 조회
+SCORING_PROJECTION = {
+    "ProjectionExpression": "#doc, #chunk, #emb, #norm",
+    "ExpressionAttributeNames": {
+        "#doc": "document_id",
+        "#chunk": "chunk_id",
+        "#emb": "embedding",
+        "#norm": "embedding_norm",
+    },
+}
+FETCH_PROJECTION = {
+    "ProjectionExpression": "#doc, #chunk, #text",
+    "ExpressionAttributeNames": {"#doc": "document_id", "#chunk": "chunk_id", "#text": "text"},
+}
+BATCH_GET_LIMIT = 100
+BATCH_GET_MAX_RETRIES = 8
+BATCH_WRITE_LIMIT = 25
+BATCH_WRITE_MAX_RETRIES = 8
+# Cohere embed API 요청당 최대 텍스트 수
+EMBED_BATCH_LIMIT = 96
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+
+def encode_embedding(embedding: List[float]) -> bytes:
+    """임베딩을 float32 바이트열로 인코딩 (JSON 대비 약 1/3 크기)"""
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def decode_embedding(value: Any) -> np.ndarray:
+    """
+    저장된 임베딩 디코딩
+    
+    Binary 속성은 np.frombuffer로 복사 없이 읽고,
+    마이그레이션 전 JSON 문자열 레코드도 그대로 읽을 수 있음
+    """
+    if value is None:
+        return np.empty(0, dtype=EMBEDDING_DTYPE)
+    raw = getattr(value, "value", value)  # boto3 Binary 래퍼
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        return np.frombuffer(raw, dtype=EMBEDDING_DTYPE)
+    return np.asarray(json.loads(raw or "[]"), dtype=np.float32)
+
+
+def emit_metrics(metrics: Dict[str, float], unit: str = "Count") -> None:
+    """
+    CloudWatch Embedded Metric Format(EMF) 로그 한 줄 출력
+    
+    Lambda 로그에 기록되면 CloudWatch가 별도 API 호출 없이 메트릭으로 추출함
+    """
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [[]],
+                "Metrics": [{"Name": name, "Unit": unit} for name in metrics],
+            }],
+        },
+        **metrics,
+    }))
+
+
+class BulkWriter:
+    """
+    병렬 BatchWriteItem 쓰기 (src/vectorstore/bulk_writer.py와 같은 방식)
+    
+    25개 단위 배치를 스레드 풀에서 동시에 보내고, UnprocessedItems/스로틀링 오류는
+    full jitter 지수 백오프로 재시도하면서 동시 요청 수를 절반으로 줄임 (연속 성공 시 1씩 회복)
+    스레드 풀은 웜 컨테이너 수명 동안 유지되어 스레드별 DynamoDB 리소스를 호출 간에 재사용
+    """
+
+    def __init__(self, table_name: str, region_name: str | None, max_workers: int = 8):
+        self.table_name = table_name
+        self.region_name = region_name
+        self.max_workers = max(1, max_workers)
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._limit = self.max_workers
+        self._active = 0
+        self._successes = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def _resource(self):
+        """스레드별 DynamoDB 리소스 (boto3 리소스는 스레드 간 공유 불가)"""
+        resource = getattr(self._local, "resource", None)
+        if resource is None:
+            resource = boto3.session.Session().resource("dynamodb", region_name=self.region_name)
+            self._local.resource = resource
+        return resource
+
+    def put_items(self, items: List[Dict[str, Any]]) -> Dict[str, float]:
+        """아이템 일괄 기록 후 처리량 통계 반환 (같은 키는 마지막 아이템만 기록)"""
+        started = time.perf_counter()
+        unique = {(item["document_id"], item["chunk_id"]): {"PutRequest": {"Item": item}} for item in items}
+        requests = list(unique.values())
+        batches = [requests[i:i + BATCH_WRITE_LIMIT] for i in range(0, len(requests), BATCH_WRITE_LIMIT)]
+        throttles = sum(self._executor.map(self._write_batch, batches))
+        seconds = time.perf_counter() - started
+        return {
+            "BulkWriteItems": len(requests),
+            "BulkWriteThrottles": throttles,
+            "BulkWriteItemsPerSecond": len(requests) / seconds if seconds > 0 else 0.0,
+            "BulkWriteConcurrency": self._limit,
+        }
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """BatchWriteItem 1건 (재시도 포함), 스로틀링 횟수 반환"""
+        resource = self._resource()
+        request = {self.table_name: batch}
+        attempt = 0
+        while request:
+            with self._cond:
+                while self._active >= self._limit:
+                    self._cond.wait()
+                self._active += 1
+            throttled = None
+            try:
+                try:
+                    request = resource.batch_write_item(RequestItems=request).get("UnprocessedItems") or {}
+                    throttled = bool(request)
+                except ClientError as e:
+                    if e.response.get("Error", {}).get("Code") not in THROTTLING_ERROR_CODES:
+                        raise
+                    throttled = True
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    if throttled:
+                        self._limit = max(1, self._limit // 2)
+                        self._successes = 0
+                    elif throttled is not None:
+                        self._successes += 1
+                        if self._successes >= self._limit and self._limit < self.max_workers:
+                            self._limit += 1
+                            self._successes = 0
+                    self._cond.notify_all()
+
+            if request:
+                attempt += 1
+                if attempt > BATCH_WRITE_MAX_RETRIES:
+                    raise RuntimeError("BatchWriteItem left unprocessed items after retries")
+                time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+        return attempt
+
 
 class DynamoVectorStore:
     """
@@ -30,74 +202,319 @@ class DynamoVectorStore:
     - PK: document_id (STRING)
     - SK: chunk_id (STRING)
     - text: 원본 텍스트
-    - embedding: JSON 문자열(list[float])
+    - embedding: float32 바이너리 (기존 JSON 문자열 레코드도 읽기 지원)
+    - embedding_norm: 임베딩 L2 노름 (쓰기 시 한 번 계산, 없는 기존 레코드는 읽을 때 계산)
+    - (__meta__, version): 쓰기마다 증가하는 epoch 카운터
     """
 
-    def __init__(self, table_name: str, region_name: str | None = None):
+    def __init__(self, table_name: str, region_name: str | None = None, enable_cache: bool = True):
         """
         DynamoVectorStore 초기화
         
         Args:
             table_name: DynamoDB 테이블 이름
             region_name: AWS 리전 (기본값: None)
+            enable_cache: 웜 컨테이너 임베딩 캐시 사용 여부
         """
         self.dynamodb = boto3.resource("dynamodb", region_name=region_name)
+        self.table_name = table_name
         self.table = self.dynamodb.Table(table_name)
+        self.writer = BulkWriter(table_name, region_name, max_workers=BULK_WRITE_WORKERS)
+        self.enable_cache = enable_cache
+        self._cache_version: int | None = None
+        self._cache_matrix: np.ndarray | None = None
+        self._cache_items: List[Dict[str, Any]] = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # 디코딩 실패/차원 불일치/영벡터로 점수 계산에서 제외된 행 수 (emit_metrics로 보고)
+        self.decode_failures = 0
+        self.dimension_mismatches = 0
+        self.zero_norms = 0
 
     def add_document(self, document_id: str, chunk_id: str, text: str, embedding: List[float]) -> None:
-        self.table.put_item(
-            Item={
-                "document_id": document_id,
-                "chunk_id": chunk_id,
-                "text": text,
-                "embedding": json.dumps(embedding),  # DynamoDB는 float list를 바로 못 넣으므로 문자열로 저장
-            }
+        self.add_documents([
+            {"document_id": document_id, "chunk_id": chunk_id, "text": text, "embedding": embedding}
+        ])
+
+    def add_documents(self, chunks: List[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        청크 일괄 기록 (BulkWriter 병렬 BatchWriteItem, 버전은 한 번만 증가)
+        
+        Args:
+            chunks: document_id, chunk_id, text, embedding 키를 가진 딕셔너리 리스트
+        
+        Returns:
+            처리량 통계 (emit_metrics로 보고)
+        """
+        items = []
+        for chunk in chunks:
+            vector = np.asarray(chunk["embedding"], dtype=EMBEDDING_DTYPE)
+            items.append({
+                "document_id": chunk["document_id"],
+                "chunk_id": chunk["chunk_id"],
+                "text": chunk["text"],
+                "embedding": vector.tobytes(),  # float32 바이너리(B)로 저장
+                "embedding_norm": Decimal(str(float(np.linalg.norm(vector)))),
+            })
+        try:
+            stats = self.writer.put_items(items)
+        finally:
+            # 일부만 기록된 경우에도 캐시는 무효화되어야 함
+            self._bump_version()
+        emit_metrics({"BulkWriteItemsPerSecond": stats["BulkWriteItemsPerSecond"]}, unit="Count/Second")
+        emit_metrics({key: stats[key] for key in ("BulkWriteItems", "BulkWriteThrottles")})
+        return stats
+
+    def scoring_metrics(self, reset: bool = True) -> Dict[str, int]:
+        """점수 계산에서 제외된 행 집계 (reset이면 보고 후 0으로 초기화)"""
+        metrics = {
+            "EmbeddingDecodeFailures": self.decode_failures,
+            "EmbeddingDimensionMismatches": self.dimension_mismatches,
+            "EmbeddingZeroNorms": self.zero_norms,
+        }
+        if reset:
+            self.decode_failures = 0
+            self.dimension_mismatches = 0
+            self.zero_norms = 0
+        return metrics
+
+    def _current_version(self) -> int:
+        """저장소 버전(epoch) 조회 - GetItem 1회"""
+        resp = self.table.get_item(Key=VERSION_KEY, ConsistentRead=True)
+        return int(resp.get("Item", {}).get("epoch", 0))
+
+    def _bump_version(self) -> None:
+        """쓰기 후 버전 증가 → 모든 웜 컨테이너의 캐시 무효화"""
+        self.table.update_item(
+            Key=VERSION_KEY,
+            UpdateExpression="ADD epoch :one",
+            ExpressionAttributeValues={":one": 1},
         )
+        self._cache_version = None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """캐시 hit/miss 및 메모리 사용량"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_ratio": self.cache_hits / lookups if lookups else 0.0,
+            "version": self._cache_version,
+            "rows": len(self._cache_items),
+            "matrix_bytes": int(self._cache_matrix.nbytes) if self._cache_matrix is not None else 0,
+        }
 
-    def _scan_all_items(self) -> List[Dict[str, Any]]:
-        """테이블 전체 스캔 (소규모 데모 전용)"""
+    def _load_cache(self, version: int) -> None:
+        """전체 스캔으로 정규화된 임베딩 행렬과 행별 키 적재 (텍스트는 캐시하지 않음)"""
         items: List[Dict[str, Any]] = []
-        scan_kwargs: Dict[str, Any] = {}
-        while True:
-            resp = self.table.scan(**scan_kwargs)
-            items.extend(resp.get("Items", []))
-            last_key = resp.get("LastEvaluatedKey")
-            if not last_key:
-                break
-            scan_kwargs["ExclusiveStartKey"] = last_key
-        return items
+        matrices: List[np.ndarray] = []
+        dimension = None
+        for page in self._iter_scan_pages(**SCORING_PROJECTION):
+            if dimension is None:
+                dimension = self._first_dimension(page)
+            if dimension is None:
+                continue
+            kept, matrix, norms = self._decode_page(page, dimension)
+            valid = norms > 0
+            self.zero_norms += int(np.count_nonzero(~valid))
+            matrices.append(matrix[valid] / norms[valid, None])
+            items.extend(
+                {"document_id": item["document_id"], "chunk_id": item["chunk_id"]}
+                for item, ok in zip(kept, valid) if ok
+            )
+
+        self._cache_matrix = np.vstack(matrices).astype(np.float32) if items else None
+        self._cache_items = items
+        self._cache_version = version
 
     @staticmethod
-    def _cosine_similarity(a: List[float], b: List[float]) -> float:
-        dot = sum(x * y for x, y in zip(a, b))
-        na = math.sqrt(sum(x * x for x in a))
-        nb = math.sqrt(sum(x * x for x in b))
-        if na == 0 or nb == 0:
-            return 0.0
-        return dot / (na * nb)
-
-    def similarity_search(self, query_vec: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
-        """전체 아이템을 스캔해서 코사인 유사도 순으로 정렬 (데모용)"""
-        items = self._scan_all_items()
-        scored: List[tuple[float, Dict[str, Any]]] = []
-
+    def _first_dimension(items: List[Dict[str, Any]]) -> int | None:
+        """페이지에서 처음 디코딩되는 임베딩의 차원 (캐시 행렬 차원 결정용)"""
         for item in items:
-            emb_str = item.get("embedding")
-            if not emb_str:
-                continue
             try:
-                emb = json.loads(emb_str)
-                score = self._cosine_similarity(query_vec, emb)
-                scored.append((score, item))
+                emb = decode_embedding(item.get("embedding"))
             except Exception:
-                # 잘못 저장된 레코드는 무시
                 continue
+            if emb.size:
+                return emb.shape[0]
+        return None
 
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [x[1] for x in scored[:top_k]]
+    def _decode_page(
+        self, items: List[Dict[str, Any]], dimension: int
+    ) -> tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]:
+        """
+        스캔 페이지 한 장을 (아이템, 임베딩 행렬, 노름 벡터)로 변환
+        
+        디코딩에 실패하거나 차원이 다른 행은 제외하고 메트릭으로 집계
+        """
+        kept: List[Dict[str, Any]] = []
+        vectors: List[np.ndarray] = []
+        stored_norms: List[float] = []
+        for item in items:
+            if item.get("document_id") == META_DOCUMENT_ID or not item.get("embedding"):
+                continue
+            try:
+                emb = decode_embedding(item["embedding"])
+            except (ValueError, TypeError):
+                self.decode_failures += 1
+                continue
+            if emb.shape != (dimension,):
+                self.dimension_mismatches += 1
+                continue
+            kept.append(item)
+            vectors.append(emb)
+            stored = item.get("embedding_norm")
+            stored_norms.append(float(stored) if stored is not None else np.nan)
+
+        if not kept:
+            return [], np.empty((0, dimension), dtype=np.float32), np.empty(0, dtype=np.float32)
+
+        matrix = np.vstack(vectors)
+        norms = np.asarray(stored_norms, dtype=np.float32)
+        # 노름이 저장되지 않은 기존 레코드만 계산
+        missing = np.isnan(norms)
+        if missing.any():
+            norms[missing] = np.linalg.norm(matrix[missing], axis=1)
+        return kept, matrix, norms
+
+    def _iter_scan_pages(self, **scan_kwargs: Any) -> Iterator[List[Dict[str, Any]]]:
+        """
+        테이블 스캔 페이지를 하나씩 반환하는 제너레이터
+        
+        현재 페이지를 처리하는 동안 다음 페이지 요청을 백그라운드 스레드에서 미리 보냄
+        """
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(self.table.scan, **scan_kwargs)
+            while future is not None:
+                resp = future.result()
+                last_key = resp.get("LastEvaluatedKey")
+                future = None
+                if last_key:
+                    scan_kwargs = {**scan_kwargs, "ExclusiveStartKey": last_key}
+                    future = pool.submit(self.table.scan, **scan_kwargs)
+                yield resp.get("Items", [])
+
+    def migrate_embeddings(self) -> int:
+        """JSON 문자열로 저장된 기존 임베딩을 바이너리 형식으로 변환하고 변환 건수 반환"""
+        migrated = 0
+        for items in self._iter_scan_pages(ProjectionExpression="document_id, chunk_id, embedding"):
+            for item in items:
+                emb = item.get("embedding")
+                if not isinstance(emb, str):
+                    continue
+                try:
+                    self.table.update_item(
+                        Key={"document_id": item["document_id"], "chunk_id": item["chunk_id"]},
+                        UpdateExpression="SET embedding = :embedding",
+                        # 동시에 다른 쓰기가 이미 변환한 아이템은 건너뜀
+                        ConditionExpression="attribute_type(embedding, :string_type)",
+                        ExpressionAttributeValues={
+                            ":embedding": encode_embedding(json.loads(emb)),
+                            ":string_type": "S",
+                        },
+                    )
+                    migrated += 1
+                except ClientError as e:
+                    if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                        raise
+        return migrated
+
+    def _score_page(self, query: np.ndarray, items: List[Dict[str, Any]]) -> List[tuple[float, Dict[str, Any]]]:
+        """
+        스캔 페이지 한 장을 행렬로 쌓아 코사인 유사도를 한 번에 계산
+        
+        query는 이미 정규화되어 있고, 문서 노름은 저장된 값을 사용하므로
+        행렬-벡터 곱 1회 + 나눗셈 1회로 끝남
+        """
+        kept, matrix, norms = self._decode_page(items, query.shape[0])
+        if not kept:
+            return []
 
+        valid = norms > 0
+        self.zero_norms += int(np.count_nonzero(~valid))
+        scores = (matrix @ query) / np.where(valid, norms, 1.0)
+        return [(float(scores[i]), kept[i]) for i in np.flatnonzero(valid)]
 
-vector_store = DynamoVectorStore(VECTORSTORE_TABLE_NAME, AWS_REGION)
+    def similarity_search(self, query_vec: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        코사인 유사도 상위 top_k 아이템 검색
+        
+        - 캐시 사용 시: 버전이 같으면 GetItem 1회 + 캐시 행렬 곱, 바뀌었으면 재적재
+        - 캐시 미사용 시: 스캔 페이지를 받는 대로 점수를 계산하고 크기 top_k의 힙만 유지
+          (테이블 크기와 관계없이 메모리 사용량은 페이지 2장 + top_k 아이템으로 고정됨)
+        """
+        query = np.asarray(query_vec, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0 or top_k <= 0:
+            return []
+        query = query / query_norm
+
+        if self.enable_cache:
+            return self._search_cached(query, top_k)
+
+        # 동점이면 먼저 스캔된 행을 남김 (-seq: 동점 중 나중 행이 힙 최솟값이 되어 먼저 밀려남)
+        heap: List[tuple[float, int, Dict[str, Any]]] = []
+        seq = 0
+        for items in self._iter_scan_pages(**SCORING_PROJECTION):
+            for score, item in self._score_page(query, items):
+                entry = (score, -seq, item)
+                seq += 1
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+
+        return self._fetch_items([entry[2] for entry in sorted(heap, reverse=True)])
+
+    def _search_cached(self, query: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+        """캐시된 정규화 행렬로 검색 (스캔 전에 버전을 읽어 스캔 중 쓰기도 다음 쿼리에서 감지)"""
+        version = self._current_version()
+        if self._cache_version is not None and self._cache_version == version:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+            self._load_cache(version)
+
+        if self._cache_matrix is None or self._cache_matrix.shape[1] != query.shape[0]:
+            return []
+
+        scores = self._cache_matrix @ query
+        k = min(top_k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self._fetch_items([self._cache_items[i] for i in top])
+
+    def _fetch_items(self, ranked: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        상위 k개 키의 텍스트를 BatchGetItem으로 조회 (점수 순서 유지)
+        
+        처리되지 않은 키(UnprocessedKeys)는 full jitter 지수 백오프로 재시도
+        """
+        keys = [{"document_id": item["document_id"], "chunk_id": item["chunk_id"]} for item in ranked]
+        fetched: Dict[tuple, Dict[str, Any]] = {}
+        for start in range(0, len(keys), BATCH_GET_LIMIT):
+            request = {self.table_name: {"Keys": keys[start:start + BATCH_GET_LIMIT], **FETCH_PROJECTION}}
+            attempt = 0
+            while request:
+                resp = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in resp.get("Responses", {}).get(self.table_name, []):
+                    fetched[(item["document_id"], item["chunk_id"])] = item
+                request = resp.get("UnprocessedKeys") or {}
+                if request:
+                    attempt += 1
+                    if attempt > BATCH_GET_MAX_RETRIES:
+                        raise RuntimeError("BatchGetItem left unprocessed keys after retries")
+                    time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+
+        # 스캔과 조회 사이에 삭제된 청크는 제외
+        return [
+            fetched[(item["document_id"], item["chunk_id"])]
+            for item in ranked
+            if (item["document_id"], item["chunk_id"]) in fetched
+        ]
+
+
+vector_store = DynamoVectorStore(VECTORSTORE_TABLE_NAME, AWS_REGION, enable_cache=VECTOR_CACHE_ENABLED)
 
 
 def embed_text(text: str) -> List[float]:
@@ -113,6 +530,22 @@ def embed_text(text: str) -> List[float]:
     Raises:
         RuntimeError: COHERE_API_KEY가 설정되지 않은 경우
     """
+    return embed_texts([text])[0]
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Cohere API를 사용하여 여러 텍스트 임베딩 생성 (요청당 최대 EMBED_BATCH_LIMIT개)
+    
+    Args:
+        texts: 임베딩할 텍스트 리스트
+        
+    Returns:
+        입력 순서와 같은 임베딩 벡터 리스트
+        
+    Raises:
+        RuntimeError: COHERE_API_KEY가 설정되지 않았거나 응답 임베딩 수가 맞지 않는 경우
+    """
     if not COHERE_API_KEY:
         raise RuntimeError("COHERE_API_KEY 환경변수가 설정되지 않았습니다.")
 
@@ -121,19 +554,27 @@ def embed_text(text: str) -> List[float]:
         "Authorization": f"Bearer {COHERE_API_KEY}",
         "Content-Type": "application/json",
     }
-    payload = {
-        "model": "embed-english-v3.0",
-        "input_type": "search_document",
-        "texts": [text],
-    }
+    embeddings: List[List[float]] = []
+    for start in range(0, len(texts), EMBED_BATCH_LIMIT):
+        batch = texts[start:start + EMBED_BATCH_LIMIT]
+        payload = {
+            "model": "embed-english-v3.0",
+            "input_type": "search_document",
+            "texts": batch,
+        }
 
-    res = requests.post(url, headers=headers, json=payload, timeout=30)
-    data = res.json()
+        res = requests.post(url, headers=headers, json=payload, timeout=30)
+        data = res.json()
 
-    if "embeddings" not in data:
-        raise RuntimeError(f"Cohere embedding error: {data}")
+        if "embeddings" not in data:
+            raise RuntimeError(f"Cohere embedding error: {data}")
+        if len(data["embeddings"]) != len(batch):
+            raise RuntimeError(
+                f"Cohere embedding error: expected {len(batch)} embeddings, got {len(data['embeddings'])}"
+            )
+        embeddings.extend(data["embeddings"])
 
-    return data["embeddings"][0]
+    return embeddings
 
 
 def generate_answer(context: str, question: str) -> str:
@@ -200,6 +641,43 @@ def handle_upload(event: Dict[str, Any]) -> Dict[str, Any]:
     import uuid
     chunk_id = f"chunk-{uuid.uuid4().hex[:8]}"
 
+    # 여러 청크 일괄 업로드 ({"texts": [...]}) - 96개 단위 배치 임베딩 후 BulkWriter로 병렬 기록
+    if isinstance(body.get("texts"), list):
+        try:
+            embeddings = embed_texts(body["texts"]) if body["texts"] else []
+            chunks = [
+                {
+                    "document_id": document_id,
+                    "chunk_id": f"chunk-{uuid.uuid4().hex[:8]}",
+                    "text": chunk_text,
+                    "embedding": embedding.tolist() if hasattr(embedding, "tolist") else embedding,
+                }
+                for chunk_text, embedding in zip(body["texts"], embeddings)
+            ]
+        except Exception as e:
+            return {
+                "statusCode": 500,
+                "body": json.dumps({"error": f"임베딩 생성 실패: {str(e)}"})
+            }
+
+        try:
+            stats = vector_store.add_documents(chunks)
+        except Exception as e:
+            return {
+                "statusCode": 500,
+                "body": json.dumps({"error": f"DynamoDB 저장 실패: {str(e)}"})
+            }
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "document_id": document_id,
+                "chunk_ids": [chunk["chunk_id"] for chunk in chunks],
+                "num_chunks": len(chunks),
+                "items_per_second": stats["BulkWriteItemsPerSecond"],
+            }),
+        }
+
     # 파일 또는 텍스트 입력 처리
     if "text" in body:
         text = body["text"]
@@ -294,6 +772,9 @@ def handle_query(event: Dict[str, Any]) -> Dict[str, Any]:
 
     # 벡터 검색
     docs = vector_store.similarity_search(q_vec, top_k=top_k)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"[CACHE] {json.dumps(vector_store.cache_stats())}")
+    emit_metrics(vector_store.scoring_metrics())
 
     # 컨텍스트 생성
     context = "\n\n---\n\n".join(item.get("text", "") for item in docs)
@@ -397,6 +878,8 @@ def handle_list_documents():
     docs = {}
     for item in items:
         doc_id = item["document_id"]
+        if doc_id == META_DOCUMENT_ID:
+            continue
         docs.setdefault(doc_id, 0)
         docs[doc_id] += 1
 
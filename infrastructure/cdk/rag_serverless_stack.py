@@ -109,8 +109,9 @@ class RagServerlessStack(Stack):
             description="S3 이벤트 기반 문서 업로드 처리 Lambda",
         )
         
-        # S3 버킷 읽기 권한
+        # S3 버킷 읽기 권한 + 인덱스 스냅샷(index/) 게시 권한
         documents_bucket.grant_read(upload_handler)
+        documents_bucket.grant_put(upload_handler, "index/*")
         
         # DynamoDB 쓰기 권한
         vector_store_table.grant_write_data(upload_handler)
@@ -158,8 +159,9 @@ class RagServerlessStack(Stack):
             description="RAG 질의응답 Lambda",
         )
         
-        # DynamoDB 읽기 권한
+        # DynamoDB 읽기 권한 + 인덱스 스냅샷 읽기 권한
         vector_store_table.grant_read_data(query_handler)
+        documents_bucket.grant_read(query_handler, "index/*")
         
         # ============================================
         # Lambda 함수 3: documents_handler (API Gateway)
@@ -2,11 +2,24 @@
 
 import json
 from src.services.rag_service import process_rag_query
-from src.vectorstore.mock_store import MockVectorStore
+from src.rag.query_cache import QueryResultCache
+from src.vectorstore.factory import create_vector_store
+from src.utils.config import load_config
 from src.embeddings.embedder import EmbeddingGenerator
 
-vector_store = MockVectorStore()
+config = load_config("config_rag.yaml")
+# vectorstore.type: local이면 재시작 후에도 코퍼스 유지 (VECTORSTORE_TYPE 환경 변수로 재정의)
+vector_store = create_vector_store(config.get("vectorstore", {}))
 embedding_generator = EmbeddingGenerator()
+# 웜 컨테이너에서 같은 질문의 검색 결과 재사용 (result_cache_size가 0이면 사용 안 함)
+rag_config = config.get("rag", {})
+result_cache = (
+    QueryResultCache(
+        max_entries=rag_config["result_cache_size"],
+        ttl_seconds=rag_config.get("result_cache_ttl", 300)
+    )
+    if rag_config.get("result_cache_size", 0) > 0 else None
+)
 
 def lambda_handler(event, context=None):
     """
@@ -23,10 +36,11 @@ def lambda_handler(event, context=None):
         top_k = body.get("top_k", 5)
 
         result = process_rag_query(
-            question=question,
+            query=question,
             vector_store=vector_store,
             embedding_generator=embedding_generator,
-            top_k=top_k
+            top_k=top_k,
+            result_cache=result_cache
         )
 
         return {
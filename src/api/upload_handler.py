@@ -3,11 +3,13 @@
 import json
 import base64
 from src.services.ingestion_service import process_document_ingestion
-from src.vectorstore.mock_store import MockVectorStore
+from src.vectorstore.factory import create_vector_store
+from src.utils.config import load_config
 from src.embeddings.embedder import EmbeddingGenerator
 
 # Lambda cold start 방지: 전역에서 생성
-vector_store = MockVectorStore()
+# vectorstore.type: local이면 재시작 후에도 코퍼스 유지 (VECTORSTORE_TYPE 환경 변수로 재정의)
+vector_store = create_vector_store(load_config("config_rag.yaml").get("vectorstore", {}))
 embedding_generator = EmbeddingGenerator()
 
 def lambda_handler(event, context=None):
@@ -5,6 +5,9 @@ S3 이벤트를 받아 문서 다운로드 및 메타데이터 추출
 
 import boto3
 import json
+import os
+import shutil
+from botocore.exceptions import ClientError
 from typing import Dict, Optional
 from io import BytesIO
 
@@ -13,6 +16,8 @@ from src.utils.errors import S3HandlerError
 
 logger = get_logger(__name__)
 
+_DOWNLOAD_CHUNK_BYTES = 1 << 20
+
 
 class S3DocumentHandler:
     """S3에서 문서를 다운로드하고 메타데이터를 추출하는 핸들러"""
@@ -49,6 +54,89 @@ class S3DocumentHandler:
             logger.error(f"Failed to download document {s3_key}: {str(e)}")
             raise
     
+    def upload_bytes(self, s3_key: str, data: bytes, content_type: str = "application/octet-stream") -> str:
+        """
+        바이트 데이터를 S3에 업로드
+        
+        Args:
+            s3_key: S3 객체 키
+            data: 업로드할 데이터
+            content_type: Content-Type 헤더
+            
+        Returns:
+            업로드된 객체의 ETag
+        """
+        try:
+            response = self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Body=data,
+                ContentType=content_type
+            )
+            etag = response.get("ETag", "").strip('"')
+            logger.info(f"Uploaded object: {s3_key} ({len(data)} bytes)")
+            return etag
+        except Exception as e:
+            logger.error(f"Failed to upload object {s3_key}: {str(e)}")
+            raise
+    
+    def download_file(self, s3_key: str, local_path: str, if_match: Optional[str] = None) -> bool:
+        """
+        S3 객체를 로컬 파일로 다운로드 (메모리에 전체를 올리지 않음)
+        
+        Args:
+            s3_key: S3 객체 키
+            local_path: 저장할 로컬 경로
+            if_match: 지정하면 객체 ETag가 이 값일 때만 다운로드
+            
+        Returns:
+            다운로드 여부 (if_match와 ETag가 다르면 False)
+        """
+        try:
+            if if_match is None:
+                self.s3_client.download_file(self.bucket_name, s3_key, local_path)
+            else:
+                # 관리형 전송(download_file)은 IfMatch를 지원하지 않으므로 GetObject 응답을 스트리밍
+                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key, IfMatch=if_match)
+                tmp_path = local_path + ".part"
+                with open(tmp_path, "wb") as f:
+                    shutil.copyfileobj(response["Body"], f, _DOWNLOAD_CHUNK_BYTES)
+                # 기존 파일을 mmap 중인 스토어가 있어도 안전하도록 원자적으로 교체
+                os.replace(tmp_path, local_path)
+            logger.info(f"Downloaded object: {s3_key} -> {local_path}")
+            return True
+        except ClientError as e:
+            if if_match and e.response.get("Error", {}).get("Code") in ("412", "PreconditionFailed"):
+                logger.warning(f"Object {s3_key} changed (expected ETag {if_match}), not downloaded")
+                return False
+            logger.error(f"Failed to download object {s3_key}: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to download object {s3_key}: {str(e)}")
+            raise
+    
+    def get_etag(self, s3_key: str) -> Optional[str]:
+        """
+        S3 객체 ETag 조회 (객체가 없으면 None)
+        
+        Args:
+            s3_key: S3 객체 키
+            
+        Returns:
+            ETag 문자열 또는 None
+        """
+        try:
+            response = self.s3_client.head_object(
+                Bucket=self.bucket_name,
+                Key=s3_key
+            )
+            return response.get("ETag", "").strip('"')
+        except self.s3_client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            logger.error(f"Failed to get ETag for {s3_key}: {str(e)}")
+            raise
+    
     def get_metadata(self, s3_key: str) -> Dict:
         """
         S3 객체 메타데이터 추출
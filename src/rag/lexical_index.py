@@ -0,0 +1,123 @@
+"""
+BM25 어휘 역색인
+수집 시 청크 텍스트로 구축하고, 검색 시 벡터 점수 계산 대상 후보를 좁히는 데 사용
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 유니코드 단어 문자 기준 토큰화 (한글/영문/숫자)
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+ChunkKey = Tuple[str, str]
+
+
+def tokenize(text: str) -> List[str]:
+    """소문자 단어 토큰 리스트"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    증분 BM25 역색인
+
+    - 용어 → {(document_id, chunk_id): 용어 빈도} posting
+    - 청크 추가/문서 삭제 시 문서 길이 합계를 함께 갱신하여 평균 길이를 O(1)로 계산
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            k1: 용어 빈도 포화 계수
+            b: 문서 길이 정규화 계수
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[ChunkKey, int]] = {}
+        self._lengths: Dict[ChunkKey, int] = {}
+        self._terms: Dict[ChunkKey, List[str]] = {}
+        self._doc_chunks: Dict[str, Dict[str, None]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, document_id: str, chunk_id: str, text: str) -> None:
+        """청크 색인 (같은 청크가 있으면 교체)"""
+        key = (document_id, chunk_id)
+        self._remove_chunk(key)
+
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[key] = tf
+        length = sum(counts.values())
+        self._lengths[key] = length
+        self._terms[key] = list(counts)
+        self._doc_chunks.setdefault(document_id, {})[chunk_id] = None
+        self._total_length += length
+
+    def remove_document(self, document_id: str) -> int:
+        """
+        문서의 모든 청크 색인 제거
+
+        Returns:
+            제거된 청크 수
+        """
+        chunk_ids = list(self._doc_chunks.get(document_id, {}))
+        for chunk_id in chunk_ids:
+            self._remove_chunk((document_id, chunk_id))
+        return len(chunk_ids)
+
+    def search(self, query: str, top_n: int = 100) -> List[Tuple[ChunkKey, float]]:
+        """
+        BM25 상위 top_n 청크
+
+        Args:
+            query: 쿼리 문자열
+            top_n: 반환할 최대 청크 수
+
+        Returns:
+            ((document_id, chunk_id), 점수) 리스트 (점수 내림차순)
+        """
+        if not self._lengths:
+            return []
+
+        n_chunks = len(self._lengths)
+        avg_length = self._total_length / n_chunks or 1.0
+        scores: Dict[ChunkKey, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (n_chunks - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._lengths[key] / avg_length)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        return heapq.nlargest(top_n, scores.items(), key=lambda item: item[1])
+
+    def _remove_chunk(self, key: ChunkKey) -> None:
+        """청크 하나의 posting/길이 제거"""
+        length = self._lengths.pop(key, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(key):
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+
+        document_id, chunk_id = key
+        chunks = self._doc_chunks.get(document_id)
+        if chunks is not None:
+            chunks.pop(chunk_id, None)
+            if not chunks:
+                del self._doc_chunks[document_id]
@@ -0,0 +1,144 @@
+"""
+쿼리 결과 캐시
+정규화 후 반올림한 쿼리 임베딩 + k + 필터의 해시를 키로 검색 결과를 LRU/TTL로 보관하고,
+벡터 스토어의 쓰기 버전이 바뀌면 무효화
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueryResultCache:
+    """
+    LRU + TTL 쿼리 결과 캐시
+
+    - 키: 단위 벡터로 정규화한 뒤 decimals 자리로 반올림한 임베딩 + k + 필터 (+ namespace) 해시
+      (코사인 유사도는 크기와 무관하므로 정규화 후 반올림 → 같은 질문의 미세한 부동소수 차이도 같은 키)
+    - 값: (저장 시각, 스토어 쓰기 버전, 결과 리스트)
+    - 조회 시 스토어 쓰기 버전이 다르거나 TTL이 지났으면 항목을 버리고 miss
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 300.0, decimals: int = 4):
+        """
+        Args:
+            max_entries: 최대 항목 수 (넘으면 가장 오래 사용하지 않은 항목부터 제거)
+            ttl_seconds: 항목 유효 시간(초), None이면 만료 없음 (쓰기 버전으로만 무효화)
+            decimals: 키 계산 시 임베딩 반올림 자릿수
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.decimals = decimals
+        self._entries: "OrderedDict[str, Tuple[float, Hashable, List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def make_key(
+        self,
+        query_embedding: Sequence[float],
+        k: int,
+        filter_metadata: Optional[Dict] = None,
+        namespace: str = ""
+    ) -> Optional[str]:
+        """
+        캐시 키 계산
+
+        Args:
+            query_embedding: 쿼리 임베딩
+            k: 반환할 문서 수
+            filter_metadata: 메타데이터 필터
+            namespace: 같은 임베딩이라도 결과가 달라지는 조건 (검색 모드, 어휘 색인용 질의문 등)
+
+        Returns:
+            16진수 해시 키 (영벡터/잘못된 임베딩이면 None - 캐시하지 않음)
+        """
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.ndim != 1 or not np.isfinite(norm) or norm == 0:
+            return None
+
+        # + 0.0으로 -0.0을 0.0으로 맞춤 (바이트 표현이 다름)
+        rounded = np.round(vector / norm, self.decimals).astype("<f4") + np.float32(0.0)
+        digest = hashlib.blake2b(rounded.tobytes(), digest_size=16)
+        digest.update(json.dumps([k, filter_metadata, namespace], sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str, version: Hashable) -> Optional[List[Any]]:
+        """
+        캐시 조회 (hit이면 최근 사용으로 이동)
+
+        Args:
+            key: make_key로 계산한 키
+            version: 현재 스토어 쓰기 버전
+
+        Returns:
+            결과 리스트 사본 또는 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, stored_version, results = entry
+            if stored_version != version:
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(results)
+
+    def put(self, key: str, version: Hashable, results: List[Any]) -> None:
+        """결과 저장 (최대 항목 수를 넘으면 LRU 제거)"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), version, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """모든 항목 제거 (통계는 유지)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """hit/miss, 제거/만료/무효화 통계"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
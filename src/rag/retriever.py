@@ -2,11 +2,14 @@
 RAG Retriever (LangChain 최신 버전 완전 호환)
 """
 
-from typing import List
+from typing import List, Optional
 from langchain_core.documents import Document
 
 from src.vectorstore.base import VectorStore
+from src.vectorstore.coarse_index import CoarseIndex
 from src.embeddings.embedder import EmbeddingGenerator
+from src.rag.lexical_index import BM25Index
+from src.rag.query_cache import QueryResultCache
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -18,10 +21,53 @@ class RAGRetriever:
     BaseRetriever 상속 절대 금지 (Pydantic 필드 충돌 때문)
     """
 
-    def __init__(self, vector_store: VectorStore, embedding_generator: EmbeddingGenerator, k: int = 5):
+    RETRIEVAL_MODES = ("vector", "lexical_prefilter", "coarse")
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        embedding_generator: EmbeddingGenerator,
+        k: int = 5,
+        retrieval_mode: str = "vector",
+        lexical_index: Optional[BM25Index] = None,
+        lexical_top_n: int = 100,
+        ann_candidates: int = 0,
+        coarse_index: Optional[CoarseIndex] = None,
+        coarse_top_n: int = 100,
+        result_cache: Optional[QueryResultCache] = None
+    ):
+        """
+        Args:
+            vector_store: 벡터 스토어
+            embedding_generator: 임베딩 생성기
+            k: 반환할 문서 수
+            retrieval_mode: "vector" (전체 벡터 검색),
+                "lexical_prefilter" (BM25 상위 후보 ∪ ANN 후보만 정확한 코사인 점수 계산) 또는
+                "coarse" (저차원 coarse 인덱스 상위 후보만 전체 차원으로 재점수 계산)
+            lexical_index: lexical_prefilter 모드에서 사용할 BM25 색인
+            lexical_top_n: BM25 후보 수
+            ann_candidates: 후보에 합칠 벡터 검색 결과 수 (0이면 사용 안 함)
+            coarse_index: coarse 모드에서 사용할 저차원 인덱스 (coarse 차원은 CoarseIndex에서 설정)
+            coarse_top_n: coarse 후보 수
+            result_cache: 쿼리 결과 캐시 (스토어 write_version이 None이면 사용하지 않음)
+        """
+        if retrieval_mode not in self.RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval_mode}")
+        if retrieval_mode == "lexical_prefilter" and lexical_index is None:
+            raise ValueError("lexical_prefilter mode requires a lexical_index")
+        if retrieval_mode == "coarse" and coarse_index is None:
+            raise ValueError("coarse mode requires a coarse_index")
+
         self.vector_store = vector_store
         self.embedding_generator = embedding_generator
         self.k = k
+        self.retrieval_mode = retrieval_mode
+        self.lexical_index = lexical_index
+        self.lexical_top_n = lexical_top_n
+        self.ann_candidates = ann_candidates
+        self.coarse_index = coarse_index
+        self.coarse_top_n = coarse_top_n
+        self.result_cache = result_cache
 
     def get_relevant_documents(self, query: str) -> List[Document]:
         """LangChain Retriever에서 호출하는 핵심 메서드"""
@@ -33,8 +79,8 @@ class RAGRetriever:
         # 쿼리 임베딩 생성
         query_embedding = self.embedding_generator.embed_text(query)
 
-        # 유사도 검색
-        docs = self.vector_store.similarity_search(query_embedding, k=self.k)
+        # 유사도 검색 (결과 캐시 hit이면 검색 생략)
+        docs = self._search_cached(query, query_embedding)
 
         # LangChain Document 변환
         results = []
@@ -52,6 +98,68 @@ class RAGRetriever:
 
         return results
 
+    def _search(self, query: str, query_embedding: List[float]):
+        """검색 모드별 유사도 검색"""
+        if self.retrieval_mode == "lexical_prefilter":
+            return self._search_lexical_prefilter(query, query_embedding)
+        if self.retrieval_mode == "coarse":
+            return self._search_coarse(query_embedding)
+        return self.vector_store.similarity_search(query_embedding, k=self.k)
+
+    def _search_cached(self, query: str, query_embedding: List[float]):
+        """결과 캐시를 거친 검색 (스토어 쓰기 버전이 바뀌면 캐시 항목은 무효)"""
+        if self.result_cache is None:
+            return self._search(query, query_embedding)
+
+        try:
+            version = self.vector_store.write_version()
+        except Exception as e:
+            logger.warning(f"Failed to read store write version, bypassing result cache: {e}")
+            version = None
+
+        # 어휘 후보는 질의문에 따라 달라지므로 lexical_prefilter 모드는 질의문도 키에 포함
+        namespace = self.retrieval_mode
+        if self.retrieval_mode == "lexical_prefilter":
+            namespace += "\x00" + query
+        key = self.result_cache.make_key(query_embedding, self.k, namespace=namespace) if version is not None else None
+        if key is None:
+            return self._search(query, query_embedding)
+
+        cached = self.result_cache.get(key, version)
+        if cached is not None:
+            return cached
+
+        docs = self._search(query, query_embedding)
+        # 빈 결과는 스토어 오류일 수 있으므로 캐시하지 않음
+        if docs:
+            self.result_cache.put(key, version, docs)
+        return docs
+
+    def _search_lexical_prefilter(self, query: str, query_embedding: List[float]):
+        """BM25 상위 후보(+ANN 후보)만 벡터 스토어에서 정확한 코사인 점수 계산"""
+        candidates = [key for key, _ in self.lexical_index.search(query, self.lexical_top_n)]
+        if self.ann_candidates > 0:
+            candidates.extend(
+                (d.document_id, d.chunk_id)
+                for d in self.vector_store.similarity_search(query_embedding, k=self.ann_candidates)
+            )
+
+        if not candidates:
+            # 일치하는 용어가 없는 쿼리는 전체 벡터 검색으로 대체
+            logger.info("No lexical candidates, falling back to vector search")
+            return self.vector_store.similarity_search(query_embedding, k=self.k)
+
+        return self.vector_store.similarity_search_candidates(query_embedding, candidates, k=self.k)
+
+    def _search_coarse(self, query_embedding: List[float]):
+        """coarse 인덱스 상위 후보만 벡터 스토어에서 전체 차원 코사인 점수 계산"""
+        candidates = [key for key, _ in self.coarse_index.search(query_embedding, self.coarse_top_n)]
+        if not candidates:
+            logger.info("Coarse index is empty, falling back to vector search")
+            return self.vector_store.similarity_search(query_embedding, k=self.k)
+
+        return self.vector_store.similarity_search_candidates(query_embedding, candidates, k=self.k)
+
     # 비동기 버전 (필수 아님, 있어도 무방)
     async def aget_relevant_documents(self, query: str) -> List[Document]:
         return self.get_relevant_documents(query)
@@ -1,11 +1,14 @@
 # src/services/ingestion_service.py
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 from src.ingestion.parser import DocumentParser
 from src.preprocessing.cleaner import TextCleaner
 from src.preprocessing.chunker import DocumentChunker, Chunk
 from src.embeddings.embedder import EmbeddingGenerator
 from src.vectorstore.base import VectorStore, VectorDocument
+from src.vectorstore.snapshot import SnapshotPublisher
+from src.vectorstore.coarse_index import CoarseIndex
+from src.rag.lexical_index import BM25Index
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -18,6 +21,8 @@ def process_document_ingestion(
     embedding_generator: EmbeddingGenerator,
     chunk_size: int = 500,
     overlap: int = 50,
+    lexical_index: Optional[BM25Index] = None,
+    coarse_index: Optional[CoarseIndex] = None,
 ) -> Dict:
 
     logger.info(f"[Ingestion] Start processing: {filename}")
@@ -56,13 +61,39 @@ def process_document_ingestion(
             )
         )
 
-    # 7. VectorStore 저장
+    # 7. VectorStore 저장 - 재수집 시 이전 청크는 제거 (새 버전의 청크 수가 줄어도 고아 청크가 남지 않음)
+    #    처음 수집하는 문서는 삭제하지 않음 (DynamoDB 추가 조회/버전 증가, HNSW/LSM 툼스톤 누적 방지)
+    if vector_store.get_document(filename) is not None:
+        vector_store.delete_document(filename)
     vector_store.add_documents(docs)
 
     logger.info(f"[Ingestion] Saved {len(docs)} chunks for file: {filename}")
 
+    # 7-1. (선택) BM25 어휘 색인 갱신 - 재수집 시 이전 청크는 제거
+    if lexical_index is not None:
+        lexical_index.remove_document(filename)
+        for chunk in chunks:
+            lexical_index.add(filename, chunk.chunk_id, chunk.text)
+
+    # 7-2. (선택) 저차원 coarse 인덱스 갱신
+    if coarse_index is not None:
+        coarse_index.remove_document(filename)
+        coarse_index.add_documents(docs)
+
     return {
         "document_id": filename,
         "num_chunks": len(chunks),
         "chunks": [c.text for c in chunks],   # 문자열만 반환
     }
+
+
+def publish_index_snapshot(vector_store: VectorStore, snapshot_publisher: SnapshotPublisher) -> Dict:
+    """
+    쿼리 Lambda용 인덱스 스냅샷을 S3에 게시
+
+    스냅샷은 코퍼스 전체를 다시 쓰므로 문서마다 호출하지 않고,
+    여러 문서를 수집한 뒤 한 번 호출 (배치 수집 종료 시 또는 별도 배포 단계)
+    """
+    result = snapshot_publisher.publish_from_store(vector_store)
+    logger.info(f"[Ingestion] Published index snapshot: {result['count']} vectors")
+    return result
@@ -6,11 +6,14 @@ Streamlit, API, Lambda 어디서든 호출 가능하도록
 RAG Retrieval + LLM 호출을 담당하는 Service Layer
 """
 
-from typing import Dict
+from typing import Dict, Optional
 
 from src.rag.retriever import RAGRetriever
 from src.rag.pipeline import RAGPipeline
+from src.rag.lexical_index import BM25Index
+from src.rag.query_cache import QueryResultCache
 from src.vectorstore.base import VectorStore
+from src.vectorstore.coarse_index import CoarseIndex
 from src.embeddings.embedder import EmbeddingGenerator
 
 from src.utils.logger import get_logger
@@ -22,7 +25,10 @@ def process_rag_query(
     query: str,
     vector_store: VectorStore,
     embedding_generator: EmbeddingGenerator,
-    top_k: int = 5
+    top_k: int = 5,
+    lexical_index: Optional[BM25Index] = None,
+    coarse_index: Optional[CoarseIndex] = None,
+    result_cache: Optional[QueryResultCache] = None
 ) -> Dict:
     """
     RAG 질의응답 서비스.
@@ -32,6 +38,9 @@ def process_rag_query(
         vector_store: 검색용 벡터 스토어
         embedding_generator: 임베딩 생성기
         top_k: 검색할 문서 수
+        lexical_index: BM25 색인 (주어지면 어휘 후보만 벡터 점수 계산)
+        coarse_index: 저차원 coarse 인덱스 (lexical_index가 없을 때 주어지면 coarse 후보만 재점수 계산)
+        result_cache: 쿼리 결과 캐시 (호출 간에 공유해야 효과가 있음)
     
     Returns:
         {
@@ -43,10 +52,20 @@ def process_rag_query(
     logger.info(f"[RAG] Start query: {query}")
 
     # Retriever 생성
+    if lexical_index is not None:
+        retrieval_mode = "lexical_prefilter"
+    elif coarse_index is not None:
+        retrieval_mode = "coarse"
+    else:
+        retrieval_mode = "vector"
     retriever = RAGRetriever(
         vector_store=vector_store,
         embedding_generator=embedding_generator,
-        k=top_k
+        k=top_k,
+        retrieval_mode=retrieval_mode,
+        lexical_index=lexical_index,
+        coarse_index=coarse_index,
+        result_cache=result_cache
     )
 
     # 파이프라인 생성
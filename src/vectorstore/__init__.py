@@ -5,13 +5,20 @@ DynamoDB 또는 로컬 벡터 스토어 래퍼
 
 from .base import VectorStore, VectorDocument
 from .mock_store import MockVectorStore
+from .hnsw_store import HNSWVectorStore
+from .ivf_store import IVFVectorStore
+from .snapshot import SnapshotVectorStore
+from .local_store import LocalVectorStore
+from .sharded_store import ShardedVectorStore
+from .lsm_store import LSMVectorStore
+from .factory import create_vector_store
 
 # DynamoDB VectorStore는 선택적 import (boto3 의존성)
 try:
     import boto3
     from .dynamodb_store import DynamoDBVectorStore
-    __all__ = ["VectorStore", "VectorDocument", "DynamoDBVectorStore", "MockVectorStore"]
+    __all__ = ["VectorStore", "VectorDocument", "DynamoDBVectorStore", "MockVectorStore", "HNSWVectorStore", "IVFVectorStore", "SnapshotVectorStore", "LocalVectorStore", "ShardedVectorStore", "LSMVectorStore", "create_vector_store"]
 except ImportError:
     DynamoDBVectorStore = None
-    __all__ = ["VectorStore", "VectorDocument", "MockVectorStore"]
+    __all__ = ["VectorStore", "VectorDocument", "MockVectorStore", "HNSWVectorStore", "IVFVectorStore", "SnapshotVectorStore", "LocalVectorStore", "ShardedVectorStore", "LSMVectorStore", "create_vector_store"]
 
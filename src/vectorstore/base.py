@@ -3,7 +3,7 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import Hashable, List, Dict, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
 
@@ -20,6 +20,9 @@ class VectorDocument:
 class VectorStore(ABC):
     """벡터 스토어 인터페이스"""
     
+    # 추가/삭제 호출 수 (쓰기를 직접 처리하는 인메모리 스토어가 0으로 초기화하고 증가시킴)
+    _writes: Optional[int] = None
+    
     @abstractmethod
     def add_documents(self, documents: List[VectorDocument]) -> bool:
         """
@@ -53,6 +56,67 @@ class VectorStore(ABC):
         """
         pass
     
+    def similarity_search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[List[VectorDocument]]:
+        """
+        여러 쿼리 유사도 검색
+        
+        기본 구현은 쿼리마다 similarity_search를 호출하며,
+        행렬 기반 스토어는 한 번의 행렬 곱으로 처리하도록 재정의함
+        
+        Args:
+            query_embeddings: 쿼리 임베딩 행렬 (쿼리 수 x 차원)
+            k: 쿼리별 반환할 문서 수
+            filter_metadata: 모든 쿼리에 공통으로 적용할 메타데이터 필터
+            
+        Returns:
+            쿼리 순서대로 검색된 문서 리스트
+        """
+        return [
+            self.similarity_search(list(query_embedding), k=k, filter_metadata=filter_metadata)
+            for query_embedding in query_embeddings
+        ]
+    
+    def similarity_search_candidates(
+        self,
+        query_embedding: List[float],
+        candidate_ids: Sequence[Tuple[str, str]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[VectorDocument]:
+        """
+        후보 청크만 정확한 코사인 유사도로 점수 계산 (어휘 색인 등으로 후보를 먼저 좁힌 경우)
+        
+        기본 구현은 후보를 무시하고 similarity_search로 대체하며,
+        청크 키로 임베딩에 바로 접근할 수 있는 스토어는 후보 행만 점수 계산하도록 재정의함
+        
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+            candidate_ids: (document_id, chunk_id) 후보 리스트
+            k: 반환할 문서 수
+            filter_metadata: 메타데이터 필터
+            
+        Returns:
+            검색된 문서 리스트
+        """
+        return self.similarity_search(query_embedding, k=k, filter_metadata=filter_metadata)
+    
+    def write_version(self) -> Optional[Hashable]:
+        """
+        쓰기 버전 (추가/삭제 후에는 다른 값이 되어야 함, 쿼리 결과 캐시 무효화에 사용)
+        
+        기본 구현은 _writes 카운터를 반환하며 (None이면 버전을 알 수 없음 → 결과 캐시 사용 안 함),
+        다른 프로세스도 쓰는 스토어는 저장소의 버전을 반환하도록 재정의함
+        
+        Returns:
+            비교 가능한 버전 값 또는 None
+        """
+        return self._writes
+    
     @abstractmethod
     def delete_document(self, document_id: str) -> bool:
         """
@@ -0,0 +1,190 @@
+"""
+DynamoDB 대량 쓰기
+아이템을 25개 단위 BatchWriteItem 요청으로 나누어 스레드 풀에서 동시에 보내고,
+UnprocessedItems/스로틀링은 full jitter 지수 백오프로 재시도하면서 동시 요청 수를 조절 (AIMD)
+"""
+
+import logging
+import random
+import threading
+import time
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+BATCH_WRITE_LIMIT = 25  # BatchWriteItem 요청당 최대 아이템 수
+BATCH_WRITE_MAX_RETRIES = 8
+
+# 용량 초과로 요청 전체가 거절된 경우 (UnprocessedItems와 같이 취급)
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+
+class BulkWriter:
+    """
+    병렬 BatchWriteItem 쓰기
+
+    - 동시 요청 수는 min_workers ~ max_workers 사이에서 조절:
+      스로틀링(UnprocessedItems 또는 용량 초과 오류)이 나면 절반으로 줄이고,
+      현재 동시 요청 수만큼 연속 성공하면 1 늘림
+    - 같은 키가 여러 번 들어오면 마지막 요청만 보냄 (한 요청 안의 중복 키는 DynamoDB가 거부)
+    - 조절된 동시 요청 수와 스레드 풀은 호출 간에 유지됨 (스레드별 리소스 재사용, close()로 종료)
+    """
+
+    def __init__(
+        self,
+        resource_factory: Callable[[], Any],
+        table_name: str,
+        max_workers: int = 8,
+        min_workers: int = 1,
+        key_attributes: Tuple[str, ...] = ("document_id", "chunk_id"),
+        max_retries: int = BATCH_WRITE_MAX_RETRIES
+    ):
+        """
+        Args:
+            resource_factory: 호출한 스레드에서 사용할 DynamoDB 서비스 리소스 반환
+                (boto3 리소스는 스레드 간 공유 불가 - 스레드별로 캐시해서 반환해야 함)
+            table_name: 테이블 이름
+            max_workers: 최대 동시 요청 수 (스레드 풀 크기)
+            min_workers: 스로틀링 시 줄일 수 있는 최소 동시 요청 수
+            key_attributes: 중복 제거에 사용할 기본 키 속성
+            max_retries: 배치당 최대 재시도 횟수
+        """
+        if max_workers < 1 or not 1 <= min_workers <= max_workers:
+            raise ValueError("require 1 <= min_workers <= max_workers")
+
+        self.resource_factory = resource_factory
+        self.table_name = table_name
+        self.max_workers = max_workers
+        self.min_workers = min_workers
+        self.key_attributes = key_attributes
+        self.max_retries = max_retries
+
+        self._cond = threading.Condition()
+        self._limit = max_workers
+        self._active = 0
+        self._successes = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dynamodb-write")
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """쓰기 스레드 풀 종료"""
+        self._executor.shutdown(wait=True)
+
+    @property
+    def concurrency(self) -> int:
+        """현재 동시 요청 수 한도"""
+        return self._limit
+
+    def put_items(self, items: Iterable[Dict]) -> Dict[str, Any]:
+        """아이템 일괄 기록 (같은 키는 덮어씀)"""
+        requests = {
+            tuple(item[name] for name in self.key_attributes): {"PutRequest": {"Item": item}}
+            for item in items
+        }
+        return self._write(list(requests.values()))
+
+    def delete_keys(self, keys: Iterable[Dict]) -> Dict[str, Any]:
+        """키 일괄 삭제"""
+        requests = {
+            tuple(key[name] for name in self.key_attributes): {"DeleteRequest": {"Key": key}}
+            for key in keys
+        }
+        return self._write(list(requests.values()))
+
+    def _write(self, requests: List[Dict]) -> Dict[str, Any]:
+        """
+        요청을 배치로 나누어 병렬 실행
+
+        Returns:
+            통계 (items, batches, retries, throttles, seconds, items_per_second, concurrency)
+
+        Raises:
+            RuntimeError: 재시도 후에도 처리되지 않은 아이템이 남은 경우
+        """
+        started = time.perf_counter()
+        batches = [requests[start:start + BATCH_WRITE_LIMIT] for start in range(0, len(requests), BATCH_WRITE_LIMIT)]
+        counters = {"retries": 0, "throttles": 0}
+
+        futures = [self._executor.submit(self._write_batch, batch, counters) for batch in batches]
+        for future in futures:
+            future.result()
+
+        seconds = time.perf_counter() - started
+        stats = {
+            "items": len(requests),
+            "batches": len(batches),
+            **counters,
+            "seconds": seconds,
+            "items_per_second": len(requests) / seconds if seconds > 0 else 0.0,
+            "concurrency": self._limit,
+        }
+        logger.info(
+            f"Bulk write: {stats['items']} items in {seconds:.2f}s "
+            f"({stats['items_per_second']:.0f} items/s, throttles={stats['throttles']}, concurrency={self._limit})"
+        )
+        return stats
+
+    def _write_batch(self, batch: Sequence[Dict], counters: Dict[str, int]) -> None:
+        """BatchWriteItem 1건 (UnprocessedItems는 지수 백오프로 재시도)"""
+        resource = self.resource_factory()
+        request = {self.table_name: list(batch)}
+        attempt = 0
+        while request:
+            self._acquire()
+            throttled: Optional[bool] = None
+            try:
+                try:
+                    response = resource.batch_write_item(RequestItems=request)
+                    request = response.get("UnprocessedItems") or {}
+                    throttled = bool(request)
+                except ClientError as e:
+                    if e.response.get("Error", {}).get("Code") not in THROTTLING_ERROR_CODES:
+                        raise
+                    throttled = True
+            finally:
+                self._release(throttled)
+
+            if request:
+                attempt += 1
+                with self._cond:
+                    counters["retries"] += 1
+                    counters["throttles"] += 1
+                if attempt > self.max_retries:
+                    raise RuntimeError("BatchWriteItem left unprocessed items after retries")
+                # full jitter 지수 백오프
+                time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+
+    def _acquire(self) -> None:
+        """동시 요청 수 한도 안에서 슬롯 획득"""
+        with self._cond:
+            while self._active >= self._limit:
+                self._cond.wait()
+            self._active += 1
+
+    def _release(self, throttled: Optional[bool]) -> None:
+        """슬롯 반환 및 한도 조절 (throttled가 None이면 오류로 끝난 요청 - 조절하지 않음)"""
+        with self._cond:
+            self._active -= 1
+            if throttled:
+                previous = self._limit
+                self._limit = max(self.min_workers, self._limit // 2)
+                self._successes = 0
+                if self._limit != previous:
+                    logger.info(f"Bulk write throttled: concurrency {previous} -> {self._limit}")
+            elif throttled is not None:
+                self._successes += 1
+                if self._successes >= self._limit and self._limit < self.max_workers:
+                    self._limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
@@ -0,0 +1,140 @@
+"""
+저차원 coarse 인덱스 (Matryoshka 방식)
+임베딩의 앞쪽 차원(prefix) 또는 코퍼스로 학습한 PCA 투영만 별도 행렬로 보관하여
+상위 N개 후보를 고르고, 후보만 벡터 스토어의 전체 차원 벡터로 재점수 계산
+"""
+
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from .base import VectorDocument
+from .matrix_index import MatrixIndex, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+ChunkKey = Tuple[str, str]
+
+# PCA 학습에 사용할 최대 벡터 수
+PCA_MAX_TRAIN_SIZE = 20000
+
+
+class CoarseIndex:
+    """
+    Matryoshka 저차원 보조 인덱스
+
+    - prefix: 임베딩 앞 dimension개 차원 (all-MiniLM-L6-v2, Cohere v3 등 prefix 절단에 강한 모델)
+    - pca: 코퍼스 임베딩으로 학습한 상위 dimension개 주성분 투영 (fit 후 추가)
+
+    384차원 → 64차원이면 쿼리당 읽는 행렬이 1/6
+    """
+
+    PROJECTIONS = ("prefix", "pca")
+
+    def __init__(self, dimension: int = 64, projection: str = "prefix"):
+        """
+        Args:
+            dimension: coarse 차원 수
+            projection: "prefix" 또는 "pca"
+        """
+        if projection not in self.PROJECTIONS:
+            raise ValueError(f"Unknown coarse projection: {projection}")
+        if dimension < 1:
+            raise ValueError("dimension must be at least 1")
+
+        self.dimension = dimension
+        self.projection = projection
+        self._mean: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None
+        self._index = MatrixIndex()
+        self._doc_chunks: Dict[str, Dict[str, None]] = {}
+
+    @classmethod
+    def from_documents(
+        cls,
+        documents: List[VectorDocument],
+        dimension: int = 64,
+        projection: str = "prefix"
+    ) -> "CoarseIndex":
+        """문서 전체로 인덱스 생성 (pca면 같은 문서로 투영 학습)"""
+        index = cls(dimension=dimension, projection=projection)
+        if projection == "pca" and documents:
+            index.fit([doc.embedding for doc in documents])
+        index.add_documents(documents)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.projection == "prefix" or self._components is not None
+
+    def fit(self, embeddings: Sequence[Sequence[float]]) -> "CoarseIndex":
+        """
+        PCA 투영 학습 (정규화 벡터의 평균 중심화 후 SVD)
+
+        Raises:
+            ValueError: 이미 벡터가 추가된 경우 (기존 행과 투영이 달라짐)
+        """
+        if len(self._index):
+            raise ValueError("CoarseIndex must be fit before vectors are added")
+        if self.projection != "pca":
+            return self
+
+        vectors, valid = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        vectors = vectors[valid]
+        if vectors.shape[0] > PCA_MAX_TRAIN_SIZE:
+            rng = np.random.default_rng(0)
+            vectors = vectors[rng.choice(vectors.shape[0], size=PCA_MAX_TRAIN_SIZE, replace=False)]
+
+        self._mean = vectors.mean(axis=0)
+        _, _, vt = np.linalg.svd(vectors - self._mean, full_matrices=False)
+        self._components = np.ascontiguousarray(vt[:self.dimension].T, dtype=np.float32)
+        logger.info(f"CoarseIndex PCA fit: {vectors.shape[1]} -> {self._components.shape[1]} dims")
+        return self
+
+    def project(self, embeddings: Sequence[Sequence[float]]) -> np.ndarray:
+        """
+        전체 차원 임베딩 → coarse 벡터
+
+        Raises:
+            ValueError: pca 투영을 학습하지 않은 경우
+        """
+        vectors, _ = normalize_rows(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        if self.projection == "prefix":
+            return vectors[:, :self.dimension]
+        if self._components is None:
+            raise ValueError("PCA projection is not fit")
+        return (vectors - self._mean) @ self._components
+
+    def add_documents(self, documents: List[VectorDocument]) -> None:
+        """청크 추가 (같은 청크가 있으면 교체)"""
+        if not documents:
+            return
+        keys = [(doc.document_id, doc.chunk_id) for doc in documents]
+        self._index.add_batch(keys, self.project([doc.embedding for doc in documents]))
+        for document_id, chunk_id in keys:
+            self._doc_chunks.setdefault(document_id, {})[chunk_id] = None
+
+    def remove_document(self, document_id: str) -> int:
+        """
+        문서의 모든 청크 제거
+
+        Returns:
+            제거된 청크 수
+        """
+        chunk_ids = list(self._doc_chunks.pop(document_id, {}))
+        for chunk_id in chunk_ids:
+            self._index.remove((document_id, chunk_id))
+        return len(chunk_ids)
+
+    def search(self, query_embedding: Sequence[float], top_n: int = 100) -> List[Tuple[ChunkKey, float]]:
+        """
+        coarse 상위 top_n 청크
+
+        Returns:
+            ((document_id, chunk_id), coarse 유사도) 리스트 (유사도 내림차순)
+        """
+        if not len(self._index):
+            return []
+        return self._index.search(self.project(query_embedding)[0], top_n)
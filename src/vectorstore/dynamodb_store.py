@@ -4,14 +4,54 @@ DynamoDB를 벡터 데이터베이스로 사용
 """
 
 import boto3
+import heapq
 import json
 import logging
+import random
+import threading
+import time
 import numpy as np
-from typing import List, Dict, Optional
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
 from .base import VectorStore, VectorDocument
+from .bulk_writer import BulkWriter
+from .embedding_codec import encode_embedding, decode_embedding, is_legacy_embedding
+from .matrix_index import normalize_rows, top_k_indices, top_k_rows
+from .quantization import ProductQuantizer, measure_recall
+from .vector_cache import VectorCache
 
 logger = logging.getLogger(__name__)
 
+# 쓰기마다 증가하는 버전(epoch) 아이템 키 - 웜 컨테이너 캐시 무효화에 사용
+META_DOCUMENT_ID = "__meta__"
+VERSION_KEY = {"document_id": META_DOCUMENT_ID, "chunk_id": "version"}
+
+# 최상위 속성으로 승격된 메타데이터 키의 속성 이름 접두사
+METADATA_ATTRIBUTE_PREFIX = "meta_"
+
+# 2단계 검색: 점수 계산 스캔은 키 + 임베딩만, 상위 k개의 텍스트/메타데이터는 BatchGetItem으로 조회
+ATTRIBUTE_PLACEHOLDERS = {
+    "document_id": "#doc",
+    "chunk_id": "#chunk",
+    "embedding": "#emb",
+    "metadata": "#meta",
+    "text": "#text",
+    "pq_code": "#pq",
+}
+BATCH_GET_LIMIT = 100  # BatchGetItem 요청당 최대 키 수
+BATCH_GET_MAX_RETRIES = 8
+
+
+def _heap_order(entry: Tuple[float, int, Dict]) -> Tuple[float, int]:
+    """세그먼트별 힙 항목 병합 순서 (유사도 내림차순, 같으면 순번 오름차순 - 아이템 dict는 비교하지 않음)"""
+    return entry[0], -entry[1]
+
+# PQ 코드북은 부분 공간별로 나누어 저장 (1024차원 코드북 전체는 아이템 크기 제한 400KB를 넘음)
+PQ_CODEBOOK_CHUNK_ID = "pq_codebook"
+
 
 class DynamoDBVectorStore(VectorStore):
     """DynamoDB 기반 벡터 스토어"""
@@ -20,7 +60,15 @@ class DynamoDBVectorStore(VectorStore):
         self,
         table_name: str,
         region: str = "ap-northeast-2",
-        embedding_dimension: int = 384
+        embedding_dimension: int = 384,
+        scan_segments: int = 4,
+        enable_cache: bool = True,
+        indexed_metadata_keys: Optional[List[str]] = None,
+        metadata_gsi: Optional[Dict[str, str]] = None,
+        pq_codec: Optional[ProductQuantizer] = None,
+        store_embeddings: bool = True,
+        oversample: int = 4,
+        write_workers: int = 4
     ):
         """
         DynamoDB 벡터 스토어 초기화
@@ -29,28 +77,100 @@ class DynamoDBVectorStore(VectorStore):
             table_name: DynamoDB 테이블 이름
             region: AWS 리전
             embedding_dimension: 임베딩 차원
+            scan_segments: 유사도 검색 시 병렬 스캔 세그먼트 수 (1이면 단일 스레드 스캔)
+            enable_cache: 디코딩된 임베딩 행렬을 프로세스 메모리에 캐시할지 여부
+                (버전 아이템이 바뀌지 않으면 쿼리당 GetItem 1회 + 행렬 곱만 수행)
+            indexed_metadata_keys: 최상위 속성(meta_<key>)으로 승격할 메타데이터 키
+                (해당 키 필터는 FilterExpression으로 DynamoDB에서 평가)
+            metadata_gsi: 메타데이터 키 → GSI 이름 (GSI 파티션 키 = meta_<key>, 프로젝션 ALL)
+                (해당 키 필터는 Scan 대신 GSI Query로 일치하는 파티션만 읽음)
+            pq_codec: 학습된 PQ 코덱 (지정하면 pq_code 속성을 기록하고 코드로 점수 계산,
+                저장된 코드북은 load_pq_codec / 새로 학습은 train_pq_codec)
+            store_embeddings: PQ 사용 시 float32 임베딩도 저장할지 여부
+                (True: 상위 k * oversample개를 float32로 재점수 계산,
+                 False: 코드만 저장하여 아이템/스캔 페이지 크기 축소, 반환 임베딩은 근사값)
+            oversample: PQ 재점수 계산 후보 배수
+            write_workers: 문서 추가/삭제 시 최대 동시 BatchWriteItem 요청 수
+                (스로틀링이 나면 BulkWriter가 자동으로 줄였다가 다시 늘림)
         """
+        if scan_segments < 1:
+            raise ValueError("scan_segments must be at least 1")
+        if write_workers < 1:
+            raise ValueError("write_workers must be at least 1")
+        
         self.table_name = table_name
+        self.region = region
         self.embedding_dimension = embedding_dimension
+        self.scan_segments = scan_segments
+        self.enable_cache = enable_cache
+        self.metadata_gsi = dict(metadata_gsi or {})
+        # GSI가 있는 키는 항상 승격되어야 함
+        self.indexed_metadata_keys = list(dict.fromkeys(
+            list(indexed_metadata_keys or []) + list(self.metadata_gsi)
+        ))
+        self.pq_codec = pq_codec
+        # 코드북 버전 (코드는 버전별 속성 pq_code_v<버전>에 기록, 직접 지정한 코덱/이전 형식 코드북은 None → pq_code)
+        self.pq_codec_version: Optional[int] = None
+        self.store_embeddings = store_embeddings
+        self.oversample = max(1, oversample)
+        self.write_workers = write_workers
+        self._cache = VectorCache()
+        self._local = threading.local()
+        # 세그먼트 스캔 스레드 풀은 스토어가 소유 (스레드별 boto3 세션/리소스를 검색 간에 재사용)
+        self._executor = (
+            ThreadPoolExecutor(max_workers=scan_segments, thread_name_prefix="dynamodb-scan")
+            if scan_segments > 1 else None
+        )
         self.dynamodb = boto3.resource("dynamodb", region_name=region)
         self.table = self.dynamodb.Table(table_name)
+        self._writer = BulkWriter(lambda: self._thread_resource(), table_name, max_workers=write_workers)
+        # 마지막 대량 쓰기/삭제 통계 (items_per_second, throttles 등)
+        self.last_write_stats: Dict = {}
         logger.info(f"DynamoDBVectorStore initialized: table={table_name}")
     
+    def __enter__(self) -> "DynamoDBVectorStore":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """세그먼트 스캔/대량 쓰기 스레드 풀 종료"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._writer.close()
+    
     def add_documents(self, documents: List[VectorDocument]) -> bool:
-        """문서 추가"""
+        """문서 추가 (BulkWriter로 25개 단위 BatchWriteItem을 병렬 실행)"""
         try:
-            with self.table.batch_writer() as batch:
-                for doc in documents:
-                    item = {
-                        "document_id": doc.document_id,
-                        "chunk_id": doc.chunk_id,
-                        "text": doc.text,
-                        "embedding": json.dumps(doc.embedding),  # JSON 문자열로 저장
-                        "metadata": json.dumps(doc.metadata),
-                    }
-                    batch.put_item(Item=item)
-            
-            logger.info(f"Added {len(documents)} documents to DynamoDB")
+            items = []
+            for doc in documents:
+                item = {
+                    "document_id": doc.document_id,
+                    "chunk_id": doc.chunk_id,
+                    "text": doc.text,
+                    "embedding": encode_embedding(doc.embedding),  # float32 바이너리(B)로 저장
+                    "metadata": json.dumps(doc.metadata),
+                }
+                if self.pq_codec is not None:
+                    code = self._encode_pq(doc.embedding)
+                    if code is not None:
+                        item[self._pq_attribute(self.pq_codec_version)] = code
+                    if not self.store_embeddings:
+                        del item["embedding"]
+                item.update(self._promoted_attributes(doc.metadata))
+                items.append(item)
+            
+            try:
+                self.last_write_stats = self._writer.put_items(items)
+            finally:
+                # 일부만 기록된 경우에도 캐시는 무효화되어야 함
+                self._bump_version()
+            
+            logger.info(
+                f"Added {len(documents)} documents to DynamoDB "
+                f"({self.last_write_stats['items_per_second']:.0f} items/s)"
+            )
             return True
         except Exception as e:
             logger.error(f"Failed to add documents: {e}")
@@ -68,51 +188,659 @@ class DynamoDBVectorStore(VectorStore):
             # 전체 스캔 후 메모리에서 유사도 계산 (작은 규모용)
             # 프로덕션에서는 OpenSearch, Pinecone 등 전용 벡터 DB 사용 권장
             
-            response = self.table.scan()
-            items = response.get("Items", [])
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vec)
+            if query_norm == 0:
+                logger.warning("Query embedding is zero vector")
+                return []
+            query_vec = query_vec / query_norm
             
-            # 유사도 계산
-            similarities = []
-            query_vec = np.array(query_embedding)
+            results = self._search(query_vec[None, :], k, filter_metadata)[0]
+            logger.info(f"Found {len(results)} similar documents ({self.scan_segments} scan segments)")
+            return results
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}")
+            return []
+    
+    def similarity_search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[List[VectorDocument]]:
+        """
+        여러 쿼리 유사도 검색
+        
+        캐시 경로는 GEMM 1회, 스캔/푸시다운 경로는 테이블을 한 번만 읽으며
+        페이지마다 모든 쿼리를 함께 점수화 (쿼리 수만큼 스캔을 반복하지 않음)
+        """
+        try:
+            if len(query_embeddings) == 0:
+                return []
+            queries, valid = normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+            results = [[] for _ in range(queries.shape[0])]
+            if not valid.any():
+                return results
             
+            valid_ids = np.flatnonzero(valid)
+            for q, docs in zip(valid_ids, self._search(queries[valid_ids], k, filter_metadata)):
+                results[q] = docs
+            logger.info(f"Batch search: {len(results)} queries ({self.scan_segments} scan segments)")
+            return results
+        except Exception as e:
+            logger.error(f"Batch similarity search failed: {e}")
+            return [[] for _ in range(len(query_embeddings))]
+    
+    def _search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        filter_metadata: Optional[Dict]
+    ) -> List[List[VectorDocument]]:
+        """정규화된 (쿼리 수, d) 쿼리 행렬로 검색 경로 선택"""
+        if self.pq_codec is not None and queries.shape[1] != self.pq_codec.dimension:
+            raise ValueError(
+                f"Query dimension {queries.shape[1]} does not match PQ codec dimension {self.pq_codec.dimension}"
+            )
+        if self.enable_cache:
+            return self._search_cached(queries, k, filter_metadata)
+        if self._can_push_down(filter_metadata):
+            return self._search_pushdown(queries, k, filter_metadata)
+        return self._search_scan(queries, k, filter_metadata)
+    
+    def cache_stats(self) -> Dict:
+        """웜 컨테이너 캐시 hit/miss 및 메모리 사용량"""
+        return self._cache.stats()
+    
+    def write_version(self) -> int:
+        """쓰기 버전 (버전 아이템 epoch - 다른 컨테이너의 쓰기도 반영, GetItem 1회)"""
+        return self._current_version()
+    
+    def _current_version(self) -> int:
+        """저장소 버전(epoch) 조회 - GetItem 1회"""
+        response = self.table.get_item(Key=VERSION_KEY, ConsistentRead=True)
+        return int(response.get("Item", {}).get("epoch", 0))
+    
+    def _bump_version(self) -> None:
+        """쓰기 후 저장소 버전 증가 (다른 컨테이너의 캐시도 무효화됨)"""
+        self.table.update_item(
+            Key=VERSION_KEY,
+            UpdateExpression="ADD epoch :one",
+            ExpressionAttributeValues={":one": 1}
+        )
+        self._cache.invalidate()
+    
+    def _search_cached(
+        self,
+        queries: np.ndarray,
+        k: int,
+        filter_metadata: Optional[Dict]
+    ) -> List[List[VectorDocument]]:
+        """캐시된 임베딩 행렬로 검색 (버전이 바뀌었으면 전체 스캔으로 다시 적재)"""
+        # 스캔 전에 버전을 읽어야 스캔 도중의 쓰기가 다음 쿼리에서 감지됨
+        version = self._current_version()
+        if not self._cache.lookup(version):
+            # 캐시가 낡았고 필터를 DynamoDB로 내릴 수 있으면 일치하는 아이템만 읽음
+            if self._can_push_down(filter_metadata):
+                return self._search_pushdown(queries, k, filter_metadata)
+            self._load_cache(version)
+        
+        if self.pq_codec is not None:
+            return self._search_cached_codes(queries, k, filter_metadata)
+        
+        rows = None
+        if filter_metadata:
+            rows = [
+                self._cache.index.row_of(key)
+                for key, payload in self._cache.payloads.items()
+                if self._matches_filter(payload["metadata"], filter_metadata)
+            ]
+        
+        return self._hydrate([
+            [(key, self._cached_embedding(key)) for key, _ in hits]
+            for hits in self._cache.index.search_batch(queries, k, rows=rows)
+        ])
+    
+    def _search_cached_codes(
+        self,
+        queries: np.ndarray,
+        k: int,
+        filter_metadata: Optional[Dict]
+    ) -> List[List[VectorDocument]]:
+        """캐시된 PQ 코드 행렬에 ADC로 점수 계산 후 후보를 재점수 계산/조회"""
+        keys = self._cache.code_keys
+        codes = self._cache.codes
+        if filter_metadata:
+            rows = np.asarray([
+                row for row, key in enumerate(keys)
+                if self._matches_filter(self._cache.payloads[key]["metadata"], filter_metadata)
+            ], dtype=np.int64)
+            codes = codes[rows]
+            keys = [keys[row] for row in rows]
+        if not keys:
+            return [[] for _ in range(queries.shape[0])]
+        
+        top = top_k_rows(self.pq_codec.score(codes, queries), self._candidate_count(k))
+        winners = [[(keys[i], codes[i]) for i in top[q]] for q in range(queries.shape[0])]
+        return self._finish_pq(winners, queries, k)
+    
+    def _cached_embedding(self, key: Tuple[str, str]) -> np.ndarray:
+        """캐시 행의 원본 임베딩 복원 (정규화 벡터 x 원본 노름)"""
+        row = self._cache.index.row_of(key)
+        return self._cache.index.vectors[row] * self._cache.payloads[key]["norm"]
+    
+    def _load_cache(self, version: int) -> None:
+        """병렬 세그먼트 스캔으로 전체 임베딩(PQ 사용 시 코드)을 읽어 캐시 적재"""
+        if self.pq_codec is not None:
+            keys = []
+            codes = []
+            payloads = []
+            for segment_keys, segment_codes, segment_payloads in self._run_segments(self._collect_code_segment):
+                keys.extend(segment_keys)
+                codes.extend(segment_codes)
+                payloads.extend(segment_payloads)
+            self._cache.load_codes(
+                version, keys,
+                np.vstack(codes) if codes else np.empty((0, self.pq_codec.n_subvectors), dtype=np.uint8),
+                payloads
+            )
+            return
+        
+        keys = []
+        vectors = []
+        payloads = []
+        for segment_keys, segment_vectors, segment_payloads in self._run_segments(self._collect_segment):
+            keys.extend(segment_keys)
+            vectors.extend(segment_vectors)
+            payloads.extend(segment_payloads)
+        
+        # 차원이 다른(잘못 저장된) 레코드는 캐시에서 제외
+        if vectors:
+            dimension = vectors[0].shape[0]
+            kept = [i for i, vec in enumerate(vectors) if vec.shape[0] == dimension]
+            if len(kept) != len(vectors):
+                logger.warning(f"Skipped {len(vectors) - len(kept)} embeddings with mismatched dimension")
+                keys = [keys[i] for i in kept]
+                vectors = [vectors[i] for i in kept]
+                payloads = [payloads[i] for i in kept]
+        self._cache.load(version, keys, vectors, payloads)
+    
+    def _collect_segment(self, segment: int) -> Tuple[List, List, List]:
+        """단일 스캔 세그먼트의 키/임베딩/부가 정보 수집"""
+        keys = []
+        vectors = []
+        payloads = []
+        projection = self._projection_kwargs("document_id", "chunk_id", "embedding", "metadata")
+        for items in self._iter_segment_pages(segment, projection):
             for item in items:
-                # 메타데이터 필터링
-                if filter_metadata:
-                    item_metadata = json.loads(item.get("metadata", "{}"))
-                    if not self._matches_filter(item_metadata, filter_metadata):
-                        continue
-                
-                # 임베딩 로드
-                doc_embedding = json.loads(item.get("embedding", "[]"))
-                doc_vec = np.array(doc_embedding)
-                
-                # 코사인 유사도 계산
-                similarity = np.dot(query_vec, doc_vec) / (
-                    np.linalg.norm(query_vec) * np.linalg.norm(doc_vec)
-                )
-                
-                similarities.append((similarity, item))
-            
-            # 유사도 순으로 정렬
-            similarities.sort(key=lambda x: x[0], reverse=True)
-            
-            # 상위 k개 반환
-            results = []
-            for similarity, item in similarities[:k]:
-                doc = VectorDocument(
-                    document_id=item["document_id"],
-                    chunk_id=item["chunk_id"],
-                    text=item["text"],
-                    embedding=json.loads(item.get("embedding", "[]")),
+                if item["document_id"] == META_DOCUMENT_ID:
+                    continue
+                doc_vec = decode_embedding(item.get("embedding"))
+                norm = float(np.linalg.norm(doc_vec)) if doc_vec.size else 0.0
+                if norm == 0 or not np.isfinite(norm):
+                    continue
+                keys.append((item["document_id"], item["chunk_id"]))
+                vectors.append(doc_vec)
+                # 텍스트는 캐시하지 않음 (상위 k개만 BatchGetItem으로 조회)
+                payloads.append({
+                    "metadata": json.loads(item.get("metadata", "{}")),
+                    "norm": norm,
+                })
+        return keys, vectors, payloads
+    
+    def _collect_code_segment(self, segment: int) -> Tuple[List, List, List]:
+        """단일 스캔 세그먼트의 키/PQ 코드/메타데이터 수집 (임베딩 속성은 읽지 않음)"""
+        keys = []
+        codes = []
+        payloads = []
+        projection = self._projection_kwargs(
+            "document_id", "chunk_id", self._pq_attribute(self.pq_codec_version), "metadata"
+        )
+        for items in self._iter_segment_pages(segment, projection):
+            for item in items:
+                if item["document_id"] == META_DOCUMENT_ID:
+                    continue
+                code = self._item_code(item)
+                if code is None:
+                    continue
+                keys.append((item["document_id"], item["chunk_id"]))
+                codes.append(code)
+                payloads.append({"metadata": json.loads(item.get("metadata", "{}"))})
+        return keys, codes, payloads
+    
+    def _promoted_attributes(self, metadata: Dict) -> Dict:
+        """승격 대상 메타데이터 키를 최상위 속성으로 변환"""
+        attributes = {}
+        for key in self.indexed_metadata_keys:
+            value = metadata.get(key)
+            if value is None or isinstance(value, (list, dict)):
+                continue
+            if isinstance(value, float):
+                value = Decimal(str(value))  # DynamoDB 숫자 타입은 float 불가
+            attributes[METADATA_ATTRIBUTE_PREFIX + key] = value
+        return attributes
+    
+    def _can_push_down(self, filter_metadata: Optional[Dict]) -> bool:
+        """필터 중 하나라도 승격된 키면 DynamoDB 측 필터링 가능"""
+        return bool(filter_metadata) and any(key in self.indexed_metadata_keys for key in filter_metadata)
+    
+    def _search_pushdown(
+        self,
+        queries: np.ndarray,
+        k: int,
+        filter_metadata: Dict
+    ) -> List[List[VectorDocument]]:
+        """
+        승격된 키 필터를 DynamoDB에서 평가하고, 나머지 키만 클라이언트에서 평가
+        
+        - GSI가 있는 키: 해당 GSI에 Query (일치하는 파티션만 읽음)
+        - 그 외 승격 키: Scan FilterExpression
+        """
+        pushed = {key: value for key, value in filter_metadata.items() if key in self.indexed_metadata_keys}
+        residual = {key: value for key, value in filter_metadata.items() if key not in pushed} or None
+        
+        gsi_key = next((key for key in pushed if key in self.metadata_gsi), None)
+        conditions = [
+            Attr(METADATA_ATTRIBUTE_PREFIX + key).eq(self._attribute_value(value))
+            for key, value in pushed.items() if key != gsi_key
+        ]
+        filter_expression = None
+        for condition in conditions:
+            filter_expression = condition if filter_expression is None else filter_expression & condition
+        
+        extra_kwargs = self._scoring_projection(residual)
+        if filter_expression is not None:
+            extra_kwargs["FilterExpression"] = filter_expression
+        
+        if gsi_key is not None:
+            query_kwargs = {
+                "IndexName": self.metadata_gsi[gsi_key],
+                "KeyConditionExpression": Key(METADATA_ATTRIBUTE_PREFIX + gsi_key).eq(
+                    self._attribute_value(pushed[gsi_key])
+                ),
+                **extra_kwargs,
+            }
+            partial_heaps = [self._top_k_from_pages(
+                self._iter_query_pages(query_kwargs), queries, self._candidate_count(k), residual
+            )]
+        else:
+            partial_heaps = self._run_segments(
+                self._scan_segment_top_k, queries, self._candidate_count(k), residual, extra_kwargs
+            )
+        
+        return self._merge_heaps(partial_heaps, queries, k)
+    
+    @staticmethod
+    def _attribute_value(value):
+        """필터 값을 DynamoDB 속성 값 타입으로 변환"""
+        return Decimal(str(value)) if isinstance(value, float) else value
+    
+    def _iter_query_pages(self, query_kwargs: Dict):
+        """Query를 LastEvaluatedKey를 따라 끝까지 페이지 단위로 반환"""
+        query_kwargs = dict(query_kwargs)
+        while True:
+            response = self.table.query(**query_kwargs)
+            yield response.get("Items", [])
+            
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            query_kwargs["ExclusiveStartKey"] = last_key
+    
+    def _item_to_document(self, item: Dict) -> VectorDocument:
+        """DynamoDB 아이템을 VectorDocument로 변환"""
+        return VectorDocument(
+            document_id=item["document_id"],
+            chunk_id=item["chunk_id"],
+            text=item["text"],
+            embedding=self._item_vector(item).tolist(),
+            metadata=json.loads(item.get("metadata", "{}"))
+        )
+    
+    def _item_vector(self, item: Dict) -> np.ndarray:
+        """아이템 임베딩 (float32가 없으면 PQ 코드 복원값)"""
+        if "embedding" in item or self.pq_codec is None:
+            return decode_embedding(item.get("embedding"))
+        code = self._item_code(item)
+        if code is None:
+            return np.empty(0, dtype=np.float32)
+        return self.pq_codec.decode(code)[0]
+    
+    @staticmethod
+    def _pq_attribute(version: Optional[int]) -> str:
+        """PQ 코드 속성 이름 (코드북 버전별, 버전이 없으면 이전 형식 pq_code)"""
+        return "pq_code" if version is None else f"pq_code_v{version}"
+    
+    def _item_code(self, item: Dict) -> Optional[np.ndarray]:
+        """아이템의 현재 코드북 버전 PQ 코드 (없거나 길이가 코덱과 다르면 None)"""
+        value = item.get(self._pq_attribute(self.pq_codec_version))
+        if value is None:
+            return None
+        code = np.frombuffer(getattr(value, "value", value), dtype=np.uint8)
+        return code if code.shape[0] == self.pq_codec.n_subvectors else None
+    
+    def _encode_pq(self, embedding: List[float]) -> Optional[bytes]:
+        """정규화한 임베딩의 PQ 코드 바이트열 (영벡터/차원 불일치면 None)"""
+        vector, valid = normalize_rows(np.asarray(embedding, dtype=np.float32)[None, :])
+        if not valid[0] or vector.shape[1] != self.pq_codec.dimension:
+            return None
+        return self.pq_codec.encode(vector)[0].tobytes()
+    
+    def _search_scan(
+        self,
+        queries: np.ndarray,
+        k: int,
+        filter_metadata: Optional[Dict]
+    ) -> List[List[VectorDocument]]:
+        """캐시 없이 세그먼트별 top-k 힙을 유지하며 스캔"""
+        partial_heaps = self._run_segments(
+            self._scan_segment_top_k, queries, self._candidate_count(k), filter_metadata,
+            self._scoring_projection(filter_metadata)
+        )
+        return self._merge_heaps(partial_heaps, queries, k)
+    
+    def _merge_heaps(
+        self,
+        partial_heaps: List[List[List]],
+        queries: np.ndarray,
+        k: int
+    ) -> List[List[VectorDocument]]:
+        """세그먼트별 쿼리 힙을 쿼리 단위로 병합한 뒤 상위 k개만 BatchGetItem으로 채움"""
+        if self.pq_codec is not None:
+            winners = [
+                [
+                    ((item["document_id"], item["chunk_id"]), self._item_code(item))
+                    for _, _, item in heapq.nlargest(
+                        self._candidate_count(k), (entry for heaps in partial_heaps for entry in heaps[q]),
+                        key=_heap_order
+                    )
+                ]
+                for q in range(queries.shape[0])
+            ]
+            return self._finish_pq(winners, queries, k)
+        
+        winners = []
+        for q in range(len(partial_heaps[0])):
+            top_items = heapq.nlargest(
+                k, (entry for heaps in partial_heaps for entry in heaps[q]), key=_heap_order
+            )
+            winners.append([
+                ((item["document_id"], item["chunk_id"]), decode_embedding(item.get("embedding")))
+                for _, _, item in top_items
+            ])
+        return self._hydrate(winners)
+    
+    def _candidate_count(self, k: int) -> int:
+        """PQ 재점수 계산 시 1차 후보 수 (k * oversample)"""
+        if self.pq_codec is not None and self.store_embeddings:
+            return k * self.oversample
+        return k
+    
+    def _finish_pq(
+        self,
+        winners: List[List[Tuple[Tuple[str, str], np.ndarray]]],
+        queries: np.ndarray,
+        k: int
+    ) -> List[List[VectorDocument]]:
+        """
+        ADC 후보 목록을 최종 결과로 변환
+        
+        - float32 임베딩을 저장하는 경우: 후보 전체를 BatchGetItem으로 읽어 정확한 유사도로 상위 k개 선택
+        - 코드만 저장하는 경우: ADC 순위 그대로, 임베딩은 코드 복원값
+        """
+        if not self.store_embeddings:
+            return self._hydrate([
+                [(key, self.pq_codec.decode(code)[0]) for key, code in query_winners[:k]]
+                for query_winners in winners
+            ])
+        
+        fetched = self._batch_get(
+            [key for query_winners in winners for key, _ in query_winners],
+            attributes=("document_id", "chunk_id", "embedding", "text", "metadata")
+        )
+        results = []
+        for q, query_winners in enumerate(winners):
+            scored = []
+            for key, _ in query_winners:
+                item = fetched.get(key)
+                if item is None:
+                    continue  # 스캔과 조회 사이에 삭제된 청크
+                embedding = decode_embedding(item.get("embedding"))
+                norm = float(np.linalg.norm(embedding)) if embedding.shape[0] == queries.shape[1] else 0.0
+                if norm == 0 or not np.isfinite(norm):
+                    continue
+                scored.append((float(embedding @ queries[q]) / norm, len(scored), key, item, embedding))
+            results.append([
+                VectorDocument(
+                    document_id=key[0],
+                    chunk_id=key[1],
+                    text=item.get("text", ""),
+                    embedding=embedding.tolist(),
                     metadata=json.loads(item.get("metadata", "{}"))
                 )
-                results.append(doc)
+                for _, _, key, item, embedding in heapq.nlargest(k, scored, key=lambda entry: entry[:2])
+            ])
+        return results
+    
+    @staticmethod
+    def _projection_kwargs(*attributes: str) -> Dict:
+        """ProjectionExpression 인자 (예약어 충돌을 피하기 위해 속성 이름 치환, 버전별 코드 속성은 #<이름>)"""
+        placeholders = {name: ATTRIBUTE_PLACEHOLDERS.get(name, "#" + name) for name in attributes}
+        return {
+            "ProjectionExpression": ", ".join(placeholders[name] for name in attributes),
+            "ExpressionAttributeNames": {placeholder: name for name, placeholder in placeholders.items()},
+        }
+    
+    def _scoring_projection(self, client_filter: Optional[Dict]) -> Dict:
+        """점수 계산 스캔 프로젝션 (클라이언트 측 필터가 있을 때만 metadata 포함)"""
+        attributes = ["document_id", "chunk_id"]
+        attributes += ["embedding"] if self.pq_codec is None else [self._pq_attribute(self.pq_codec_version)]
+        if client_filter:
+            attributes.append("metadata")
+        return self._projection_kwargs(*attributes)
+    
+    def _hydrate(
+        self,
+        winners: List[List[Tuple[Tuple[str, str], np.ndarray]]]
+    ) -> List[List[VectorDocument]]:
+        """
+        쿼리별 (키, 임베딩) 상위 목록에 텍스트/메타데이터를 채워 VectorDocument로 변환
+        
+        모든 쿼리의 키를 모아 BatchGetItem으로 한 번에 조회 (점수 순서는 유지)
+        """
+        fetched = self._batch_get([key for query_winners in winners for key, _ in query_winners])
+        results = []
+        for query_winners in winners:
+            documents = []
+            for key, embedding in query_winners:
+                item = fetched.get(key)
+                if item is None:
+                    continue  # 스캔과 조회 사이에 삭제된 청크
+                documents.append(VectorDocument(
+                    document_id=key[0],
+                    chunk_id=key[1],
+                    text=item.get("text", ""),
+                    embedding=np.asarray(embedding, dtype=np.float32).tolist(),
+                    metadata=json.loads(item.get("metadata", "{}"))
+                ))
+            results.append(documents)
+        return results
+    
+    def _batch_get(
+        self,
+        keys: List[Tuple[str, str]],
+        attributes: Tuple[str, ...] = ("document_id", "chunk_id", "text", "metadata")
+    ) -> Dict[Tuple[str, str], Dict]:
+        """
+        BatchGetItem으로 텍스트/메타데이터 조회 (UnprocessedKeys는 지수 백오프로 재시도)
+        
+        Args:
+            keys: 조회할 (document_id, chunk_id) 키
+            attributes: 읽을 속성
+        
+        Raises:
+            RuntimeError: 재시도 후에도 처리되지 않은 키가 남은 경우
+        """
+        results: Dict[Tuple[str, str], Dict] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        projection = self._projection_kwargs(*attributes)
+        for start in range(0, len(unique_keys), BATCH_GET_LIMIT):
+            request = {
+                self.table_name: {
+                    "Keys": [
+                        {"document_id": document_id, "chunk_id": chunk_id}
+                        for document_id, chunk_id in unique_keys[start:start + BATCH_GET_LIMIT]
+                    ],
+                    **projection,
+                }
+            }
+            attempt = 0
+            while request:
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in response.get("Responses", {}).get(self.table_name, []):
+                    results[(item["document_id"], item["chunk_id"])] = item
+                
+                request = response.get("UnprocessedKeys") or {}
+                if request:
+                    attempt += 1
+                    if attempt > BATCH_GET_MAX_RETRIES:
+                        raise RuntimeError("BatchGetItem left unprocessed keys after retries")
+                    # full jitter 지수 백오프
+                    time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+        return results
+    
+    def _run_segments(self, segment_fn, *args) -> List:
+        """세그먼트별 작업을 스레드 풀에서 실행하고 세그먼트 순서대로 결과 반환"""
+        if self.scan_segments == 1:
+            return [segment_fn(0, *args)]
+        futures = [
+            self._executor.submit(segment_fn, segment, *args)
+            for segment in range(self.scan_segments)
+        ]
+        return [future.result() for future in futures]
+    
+    def _iter_segment_pages(self, segment: int, extra_kwargs: Optional[Dict] = None):
+        """단일 스캔 세그먼트를 LastEvaluatedKey를 따라 끝까지 페이지 단위로 반환"""
+        table = self.table if self.scan_segments == 1 else self._segment_table()
+        scan_kwargs: Dict = dict(extra_kwargs or {})
+        if self.scan_segments > 1:
+            scan_kwargs.update(Segment=segment, TotalSegments=self.scan_segments)
+        
+        while True:
+            response = table.scan(**scan_kwargs)
+            yield response.get("Items", [])
             
-            logger.info(f"Found {len(results)} similar documents")
-            return results
-        except Exception as e:
-            logger.error(f"Similarity search failed: {e}")
-            return []
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            scan_kwargs["ExclusiveStartKey"] = last_key
+    
+    def _segment_table(self):
+        """스레드별 Table 리소스 (boto3 리소스는 스레드 간 공유 불가)"""
+        table = getattr(self._local, "table", None)
+        if table is None:
+            session = boto3.session.Session()
+            table = session.resource("dynamodb", region_name=self.region).Table(self.table_name)
+            self._local.table = table
+        return table
+    
+    def _thread_resource(self):
+        """스레드별 DynamoDB 서비스 리소스 (BulkWriter 병렬 요청용)"""
+        resource = getattr(self._local, "resource", None)
+        if resource is None:
+            resource = boto3.session.Session().resource("dynamodb", region_name=self.region)
+            self._local.resource = resource
+        return resource
+    
+    def _scan_segment_top_k(
+        self,
+        segment: int,
+        queries: np.ndarray,
+        k: int,
+        filter_metadata: Optional[Dict],
+        extra_kwargs: Optional[Dict] = None
+    ) -> List[List[Tuple[float, int, Dict]]]:
+        """
+        단일 스캔 세그먼트를 끝까지 읽으며 쿼리별 로컬 top-k 유지
+        
+        Returns:
+            쿼리별 (유사도, 순번, 아이템) 힙 (각 최대 k개)
+        """
+        return self._top_k_from_pages(
+            self._iter_segment_pages(segment, extra_kwargs), queries, k, filter_metadata
+        )
+    
+    def _top_k_from_pages(
+        self,
+        pages,
+        queries: np.ndarray,
+        k: int,
+        filter_metadata: Optional[Dict]
+    ) -> List[List[Tuple[float, int, Dict]]]:
+        """페이지 스트림을 점수화하며 쿼리별 크기 k의 최소 힙 유지"""
+        heaps: List[List[Tuple[float, int, Dict]]] = [[] for _ in range(queries.shape[0])]
+        seq = 0
+        for items in pages:
+            kept, scores = self._score_items(items, queries, filter_metadata)
+            for q, heap in enumerate(heaps):
+                # 페이지 내 상위 k개만 힙 후보로 사용
+                for i in top_k_indices(scores[q], k):
+                    similarity = float(scores[q, i])
+                    entry = (similarity, seq + int(i), kept[i])
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif similarity > heap[0][0]:
+                        heapq.heapreplace(heap, entry)
+            seq += len(kept)
+        return heaps
+    
+    def _score_items(
+        self,
+        items: List[Dict],
+        queries: np.ndarray,
+        filter_metadata: Optional[Dict]
+    ) -> Tuple[List[Dict], np.ndarray]:
+        """
+        스캔 페이지 한 장을 행렬로 쌓아 모든 쿼리의 코사인 유사도를 한 번에 계산
+        
+        Returns:
+            (점수화된 아이템, (쿼리 수, 아이템 수) 점수 행렬)
+        """
+        kept = []
+        vectors = []
+        for item in items:
+            if item["document_id"] == META_DOCUMENT_ID:
+                continue
+            
+            # 메타데이터 필터링
+            if filter_metadata:
+                item_metadata = json.loads(item.get("metadata", "{}"))
+                if not self._matches_filter(item_metadata, filter_metadata):
+                    continue
+            
+            if self.pq_codec is not None:
+                # PQ 코드 ADC 점수 (코드가 없는 아이템은 train_pq_codec 백필 전 기록분)
+                code = self._item_code(item)
+                if code is not None:
+                    kept.append(item)
+                    vectors.append(code)
+                continue
+            
+            # 임베딩 로드 (바이너리/기존 JSON 형식 모두 지원)
+            doc_vec = decode_embedding(item.get("embedding"))
+            if doc_vec.shape[0] != queries.shape[1]:
+                continue
+            kept.append(item)
+            vectors.append(doc_vec)
+        
+        if not kept:
+            return [], np.empty((queries.shape[0], 0), dtype=np.float32)
+        if self.pq_codec is not None:
+            return kept, self.pq_codec.score(np.vstack(vectors), queries)
+        
+        matrix, valid = normalize_rows(np.vstack(vectors))
+        kept = [item for item, ok in zip(kept, valid) if ok]
+        return kept, queries @ matrix[valid].T
     
     def _matches_filter(self, metadata: Dict, filter_metadata: Dict) -> bool:
         """메타데이터 필터 매칭 확인"""
@@ -122,24 +850,26 @@ class DynamoDBVectorStore(VectorStore):
         return True
     
     def delete_document(self, document_id: str) -> bool:
-        """문서 삭제"""
+        """
+        문서 삭제
+        
+        키만 프로젝션한 Query를 LastEvaluatedKey를 따라 끝까지 읽은 뒤 BulkWriter로 병렬 삭제
+        """
         try:
-            # 해당 document_id의 모든 청크 삭제
-            response = self.table.query(
-                KeyConditionExpression="document_id = :doc_id",
-                ExpressionAttributeValues={":doc_id": document_id}
-            )
-            
-            with self.table.batch_writer() as batch:
-                for item in response.get("Items", []):
-                    batch.delete_item(
-                        Key={
-                            "document_id": item["document_id"],
-                            "chunk_id": item["chunk_id"]
-                        }
-                    )
+            keys = [
+                {"document_id": item["document_id"], "chunk_id": item["chunk_id"]}
+                for items in self._iter_query_pages({
+                    "KeyConditionExpression": Key("document_id").eq(document_id),
+                    **self._projection_kwargs("document_id", "chunk_id"),
+                })
+                for item in items
+            ]
+            try:
+                self.last_write_stats = self._writer.delete_keys(keys)
+            finally:
+                self._bump_version()
             
-            logger.info(f"Deleted document: {document_id}")
+            logger.info(f"Deleted document: {document_id} ({len(keys)} chunks)")
             return True
         except Exception as e:
             logger.error(f"Failed to delete document: {e}")
@@ -159,15 +889,363 @@ class DynamoDBVectorStore(VectorStore):
             if not items:
                 return None
             
-            item = items[0]
-            return VectorDocument(
-                document_id=item["document_id"],
-                chunk_id=item["chunk_id"],
-                text=item["text"],
-                embedding=json.loads(item.get("embedding", "[]")),
-                metadata=json.loads(item.get("metadata", "{}"))
-            )
+            return self._item_to_document(items[0])
         except Exception as e:
             logger.error(f"Failed to get document: {e}")
             return None
-
+    
+    def get_document_chunks(self, document_id: str) -> Iterator[VectorDocument]:
+        """
+        문서의 모든 청크를 chunk_index 순서로 반환 (제너레이터)
+        
+        키 + 메타데이터만 페이지 단위로 읽어 순서를 정한 뒤,
+        텍스트/임베딩은 BATCH_GET_LIMIT개씩 BatchGetItem으로 읽어 순서대로 내보냄
+        (chunk_id 정렬 키는 문자열 순서라 chunk_10이 chunk_2보다 앞에 옴)
+        
+        Raises:
+            RuntimeError/ClientError: 조회가 실패한 경우 (일부 청크만 반환하고 끝난 것처럼 보이지 않도록 전파)
+        """
+        try:
+            order = []
+            for items in self._iter_query_pages({
+                "KeyConditionExpression": Key("document_id").eq(document_id),
+                **self._projection_kwargs("document_id", "chunk_id", "metadata"),
+            }):
+                for item in items:
+                    chunk_index = json.loads(item.get("metadata", "{}")).get("chunk_index")
+                    # chunk_index가 없는 청크는 chunk_id 순으로 맨 뒤에
+                    rank = (0, chunk_index) if isinstance(chunk_index, int) else (1, 0)
+                    order.append((rank, item["chunk_id"]))
+            order.sort()
+            
+            keys = [(document_id, chunk_id) for _, chunk_id in order]
+            attributes = ("document_id", "chunk_id", "text", "metadata", "embedding")
+            if self.pq_codec is not None:
+                attributes += (self._pq_attribute(self.pq_codec_version),)
+            for start in range(0, len(keys), BATCH_GET_LIMIT):
+                batch = keys[start:start + BATCH_GET_LIMIT]
+                items = self._batch_get(batch, attributes=attributes)
+                for key in batch:
+                    # 조회 도중 삭제된 청크는 건너뜀
+                    if key in items:
+                        yield self._item_to_document(items[key])
+        except Exception as e:
+            logger.error(f"Failed to get document chunks: {e}")
+            raise
+    
+    def get_all_documents(self) -> List[VectorDocument]:
+        """모든 문서 반환 (병렬 세그먼트 스캔, 스냅샷 게시 등에 사용)"""
+        def collect(segment: int) -> List[VectorDocument]:
+            documents = []
+            for items in self._iter_segment_pages(segment):
+                for item in items:
+                    if item["document_id"] != META_DOCUMENT_ID:
+                        documents.append(self._item_to_document(item))
+            return documents
+        
+        return [doc for segment_docs in self._run_segments(collect) for doc in segment_docs]
+    
+    def migrate_embeddings(self) -> int:
+        """
+        JSON 문자열로 저장된 기존 임베딩을 float32 바이너리 형식으로 변환
+        
+        Returns:
+            변환된 아이템 수
+        """
+        migrated = 0
+        scan_kwargs = {
+            "ProjectionExpression": "document_id, chunk_id, embedding",
+        }
+        try:
+            while True:
+                response = self.table.scan(**scan_kwargs)
+                for item in response.get("Items", []):
+                    if not is_legacy_embedding(item.get("embedding")):
+                        continue
+                    try:
+                        self.table.update_item(
+                            Key={
+                                "document_id": item["document_id"],
+                                "chunk_id": item["chunk_id"]
+                            },
+                            UpdateExpression="SET embedding = :embedding",
+                            # 동시에 다른 쓰기가 이미 변환한 아이템은 건너뜀
+                            ConditionExpression="attribute_type(embedding, :string_type)",
+                            ExpressionAttributeValues={
+                                ":embedding": encode_embedding(decode_embedding(item["embedding"])),
+                                ":string_type": "S",
+                            }
+                        )
+                        migrated += 1
+                    except ClientError as e:
+                        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                            raise
+                
+                last_key = response.get("LastEvaluatedKey")
+                if not last_key:
+                    break
+                scan_kwargs["ExclusiveStartKey"] = last_key
+            
+            logger.info(f"Migrated {migrated} embeddings to binary format")
+            return migrated
+        except Exception as e:
+            logger.error(f"Embedding migration failed after {migrated} items: {e}")
+            raise
+    
+    def train_pq_codec(
+        self,
+        n_subvectors: Optional[int] = None,
+        n_centroids: int = 256,
+        sample_size: int = 20000,
+        recall_queries: int = 100
+    ) -> int:
+        """
+        저장된 float32 임베딩으로 PQ 코드북을 학습/저장하고 기존 아이템에 새 버전 코드 백필
+        
+        학습에서 제외한 벡터를 쿼리로 정확 검색 대비 recall@10을 측정하여 로그로 남김
+        
+        새 코드는 버전별 속성(pq_code_v<버전>)에 UpdateItem으로 추가하므로 현재 코드북의 코드는
+        그대로 남고, 백필이 모두 끝난 뒤 헤더를 기록해야 새 코드북이 활성화됨.
+        도중에 실패해도 이전 코드북과 코드로 계속 검색 가능.
+        각 갱신은 읽은 임베딩(코드만 저장한 아이템은 현재 코드)이 그대로일 때만 적용되어
+        동시에 교체된 청크를 덮어쓰지 않음. 코드만 저장한 아이템은 현재 코드의 복원값으로 다시 인코딩.
+        
+        Args:
+            n_subvectors: 코드 바이트 수 (차원의 약수, None이면 48 이하 약수 중 최대: 384차원 → 48, 1024차원 → 32)
+            n_centroids: 부분 공간별 centroid 수 (최대 256)
+            sample_size: 학습/recall 측정에 사용할 최대 벡터 수
+            recall_queries: recall 측정용으로 학습에서 제외할 벡터 수
+        
+        Returns:
+            새 버전 코드를 기록한 아이템 수
+        """
+        try:
+            vectors = []
+            for _, segment_vectors, _ in self._run_segments(self._collect_segment):
+                vectors.extend(segment_vectors)
+            if not vectors:
+                raise ValueError("No embeddings to train PQ codec on")
+            
+            dimension = vectors[0].shape[0]
+            matrix, _ = normalize_rows(np.vstack([vec for vec in vectors if vec.shape[0] == dimension]))
+            
+            # recall 측정 쿼리는 학습/검색 대상에서 제외한 벡터 (포함하면 자기 자신을 찾아 recall이 부풀려짐)
+            order = np.random.default_rng(0).permutation(matrix.shape[0])
+            n_queries = min(recall_queries, matrix.shape[0] // 10)
+            queries = matrix[order[:n_queries]]
+            sample = matrix[order[n_queries:]][:sample_size]
+            codec = ProductQuantizer(
+                n_subvectors=n_subvectors, n_centroids=n_centroids, max_train_size=sample_size
+            ).fit(sample)
+            if n_queries:
+                recall = measure_recall(codec, sample, queries, k=10)
+                rescored_recall = measure_recall(codec, sample, queries, k=10, oversample=self.oversample)
+                logger.info(
+                    f"PQ codec trained: {codec.n_subvectors} bytes/vector, held-out recall@10={recall:.3f} "
+                    f"(oversample={self.oversample} rescored: {rescored_recall:.3f})"
+                )
+            
+            active = self._read_pq_codec()
+            active_codec, active_version, active_header = active if active is not None else (None, None, {})
+            previous_version = active_header.get("previous_version")
+            version = time.time_ns()
+            
+            self._save_pq_codec(codec, version)
+            counts = self._run_segments(
+                self._backfill_segment, codec, version, active_codec, active_version,
+                None if previous_version is None else int(previous_version)
+            )
+            encoded = sum(written for written, _ in counts)
+            skipped = sum(skipped for _, skipped in counts)
+            self._activate_pq_codec(codec, version, active_version)
+            
+            self.pq_codec = codec
+            self.pq_codec_version = version
+            self._cache.invalidate()
+            self._bump_version()
+            logger.info(f"PQ codec {version} activated: {encoded} items backfilled, {skipped} skipped")
+            return encoded
+        except Exception as e:
+            logger.error(f"PQ codec training failed, previous codebook stays active: {e}")
+            raise
+    
+    def _backfill_segment(
+        self,
+        segment: int,
+        codec: ProductQuantizer,
+        version: int,
+        active_codec: Optional[ProductQuantizer],
+        active_version: Optional[int],
+        previous_version: Optional[int]
+    ) -> Tuple[int, int]:
+        """
+        단일 스캔 세그먼트의 아이템에 새 버전 코드 속성 추가 (조건부 UpdateItem)
+        
+        현재 코드북 이전 버전(previous_version)의 코드 속성은 함께 제거
+        
+        Returns:
+            (기록한 아이템 수, 건너뛴 아이템 수 - 임베딩/코드가 없거나 도중에 교체/삭제된 청크)
+        """
+        table = self.table if self.scan_segments == 1 else self._segment_table()
+        active_attribute = self._pq_attribute(active_version)
+        update = "SET #code = :code"
+        names = {"#code": self._pq_attribute(version)}
+        if previous_version is not None:
+            update += " REMOVE #previous"
+            names["#previous"] = self._pq_attribute(previous_version)
+        
+        written = 0
+        skipped = 0
+        projection = self._projection_kwargs("document_id", "chunk_id", "embedding", active_attribute)
+        for items in self._iter_segment_pages(segment, projection):
+            for item in items:
+                if item["document_id"] == META_DOCUMENT_ID:
+                    continue
+                
+                vector = decode_embedding(item.get("embedding"))
+                if "embedding" in item:
+                    condition = Attr("embedding").eq(item["embedding"])
+                elif active_codec is not None and item.get(active_attribute) is not None:
+                    # 코드만 저장한 아이템: 현재 코드의 복원값으로 다시 인코딩
+                    value = item[active_attribute]
+                    code = np.frombuffer(getattr(value, "value", value), dtype=np.uint8)
+                    if code.shape[0] == active_codec.n_subvectors:
+                        vector = active_codec.decode(code)[0]
+                    condition = Attr(active_attribute).eq(value)
+                else:
+                    skipped += 1
+                    continue
+                
+                normalized, valid = normalize_rows(vector[None, :]) if vector.size else (None, [False])
+                if not valid[0] or vector.shape[0] != codec.dimension:
+                    skipped += 1
+                    continue
+                try:
+                    table.update_item(
+                        Key={"document_id": item["document_id"], "chunk_id": item["chunk_id"]},
+                        UpdateExpression=update,
+                        ConditionExpression=condition,
+                        ExpressionAttributeNames=names,
+                        ExpressionAttributeValues={":code": codec.encode(normalized)[0].tobytes()}
+                    )
+                    written += 1
+                except ClientError as e:
+                    if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                        raise
+                    skipped += 1  # 스캔 이후 교체/삭제된 청크
+        return written, skipped
+    
+    def load_pq_codec(self) -> bool:
+        """
+        테이블에 저장된 PQ 코드북 적재
+        
+        Returns:
+            코드북이 있어 적재했는지 여부
+        
+        Raises:
+            ValueError: 부분 공간 코드북 아이템이 누락된 경우
+        """
+        loaded = self._read_pq_codec()
+        if loaded is None:
+            return False
+        self.pq_codec, self.pq_codec_version, _ = loaded
+        self._cache.invalidate()
+        logger.info(
+            f"Loaded PQ codec {self.pq_codec_version}: "
+            f"{self.pq_codec.n_subvectors} subvectors x {self.pq_codec.codebooks.shape[1]} centroids"
+        )
+        return True
+    
+    def _read_pq_codec(self) -> Optional[Tuple[ProductQuantizer, Optional[int], Dict]]:
+        """
+        활성 코드북 읽기
+        
+        Returns:
+            (코덱, 코드북 버전, 헤더 아이템) 또는 코드북이 없으면 None
+        
+        Raises:
+            ValueError: 부분 공간 코드북 아이템이 누락된 경우
+        """
+        header = None
+        # (코드북 버전, 부분 공간 번호) → 코드북 (이전 형식 부분 아이템은 버전 None)
+        parts: Dict[Tuple[Optional[str], int], object] = {}
+        query_kwargs = {
+            "KeyConditionExpression": "document_id = :doc_id",
+            "ExpressionAttributeValues": {":doc_id": META_DOCUMENT_ID},
+        }
+        for items in self._iter_query_pages(query_kwargs):
+            for item in items:
+                chunk_id = item["chunk_id"]
+                if chunk_id == PQ_CODEBOOK_CHUNK_ID:
+                    header = item
+                elif chunk_id.startswith(PQ_CODEBOOK_CHUNK_ID + "#"):
+                    parts[self._codebook_part(chunk_id)] = item["codebook"]
+        if header is None:
+            return None
+        
+        version = header.get("codebook_version")
+        version = None if version is None else int(version)
+        part_version = None if version is None else str(version)
+        n_subvectors = int(header["n_subvectors"])
+        n_centroids = int(header["n_centroids"])
+        sub_dimension = int(header["dimension"]) // n_subvectors
+        if any((part_version, j) not in parts for j in range(n_subvectors)):
+            raise ValueError("PQ codebook is incomplete")
+        codebooks = np.stack([
+            np.frombuffer(
+                getattr(parts[part_version, j], "value", parts[part_version, j]), dtype="<f4"
+            ).reshape(n_centroids, sub_dimension)
+            for j in range(n_subvectors)
+        ])
+        return ProductQuantizer.from_codebooks(codebooks), version, header
+    
+    @staticmethod
+    def _codebook_part(chunk_id: str) -> Tuple[Optional[str], int]:
+        """부분 코드북 chunk_id ("pq_codebook#<버전>#<번호>", 이전 형식은 "pq_codebook#<번호>") 해석"""
+        fields = chunk_id.split("#")[1:]
+        if len(fields) == 1:
+            return None, int(fields[0])
+        return fields[0], int(fields[1])
+    
+    def _save_pq_codec(self, codec: ProductQuantizer, version: int) -> None:
+        """코드북을 메타 파티션에 버전별 부분 공간 아이템으로 저장 (헤더를 기록하기 전에는 적재되지 않음)"""
+        self._writer.put_items([
+            {
+                "document_id": META_DOCUMENT_ID,
+                "chunk_id": f"{PQ_CODEBOOK_CHUNK_ID}#{version}#{j:03d}",
+                "codebook": np.ascontiguousarray(codebook, dtype="<f4").tobytes(),
+            }
+            for j, codebook in enumerate(codec.codebooks)
+        ])
+    
+    def _activate_pq_codec(self, codec: ProductQuantizer, version: int, previous_version: Optional[int]) -> None:
+        """
+        헤더 아이템을 기록해 코드북 버전을 활성화한 뒤 다른 버전의 부분 공간 아이템 삭제
+        
+        아이템의 이전 버전 코드 속성은 아직 이전 코드북을 쓰는 컨테이너를 위해 남겨 두고,
+        다음 학습의 백필에서 제거 (헤더의 previous_version)
+        """
+        header = {
+            "document_id": META_DOCUMENT_ID,
+            "chunk_id": PQ_CODEBOOK_CHUNK_ID,
+            "n_subvectors": codec.codebooks.shape[0],
+            "n_centroids": codec.codebooks.shape[1],
+            "dimension": codec.dimension,
+            "codebook_version": version,
+        }
+        if previous_version is not None:
+            header["previous_version"] = previous_version
+        self.table.put_item(Item=header)
+        
+        stale = []
+        query_kwargs = {
+            "KeyConditionExpression": Key("document_id").eq(META_DOCUMENT_ID),
+            **self._projection_kwargs("document_id", "chunk_id"),
+        }
+        for items in self._iter_query_pages(query_kwargs):
+            for item in items:
+                chunk_id = item["chunk_id"]
+                if chunk_id.startswith(PQ_CODEBOOK_CHUNK_ID + "#") and self._codebook_part(chunk_id)[0] != str(version):
+                    stale.append({"document_id": META_DOCUMENT_ID, "chunk_id": chunk_id})
+        if stale:
+            self._writer.delete_keys(stale)
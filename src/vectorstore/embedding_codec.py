@@ -0,0 +1,54 @@
+"""
+임베딩 직렬화 유틸리티
+DynamoDB Binary(B) 속성에 float32 바이트로 저장하고, 기존 JSON 문자열 형식도 읽을 수 있도록 지원
+"""
+
+import json
+import numpy as np
+from typing import Any, Sequence
+
+# 리틀 엔디안 float32 (플랫폼에 관계없이 동일한 바이트 배열)
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def encode_embedding(embedding: Sequence[float]) -> bytes:
+    """
+    임베딩을 float32 바이트열로 인코딩
+
+    Args:
+        embedding: 임베딩 벡터
+
+    Returns:
+        DynamoDB Binary 속성으로 저장할 바이트열 (384차원 = 1,536바이트)
+    """
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def decode_embedding(value: Any) -> np.ndarray:
+    """
+    저장된 임베딩 디코딩
+
+    - Binary/bytes: np.frombuffer로 복사 없이 읽기 (읽기 전용 배열)
+    - str: 기존 JSON 문자열 형식 (마이그레이션 전 레코드)
+
+    Args:
+        value: DynamoDB에서 읽은 embedding 속성 값
+
+    Returns:
+        float32 벡터 (값이 없으면 빈 배열)
+    """
+    if value is None:
+        return np.empty(0, dtype=EMBEDDING_DTYPE)
+
+    # boto3.dynamodb.types.Binary는 원본 바이트를 .value에 보관
+    raw = getattr(value, "value", value)
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        return np.frombuffer(raw, dtype=EMBEDDING_DTYPE)
+    if isinstance(raw, str):
+        return np.asarray(json.loads(raw or "[]"), dtype=np.float32)
+    return np.asarray(raw, dtype=np.float32)
+
+
+def is_legacy_embedding(value: Any) -> bool:
+    """JSON 문자열로 저장된 기존 형식 여부"""
+    return isinstance(value, str)
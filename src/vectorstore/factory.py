@@ -0,0 +1,106 @@
+"""
+벡터 스토어 팩토리
+configs/config_rag.yaml의 vectorstore 섹션으로 스토어 구현 선택
+"""
+
+import logging
+import os
+from typing import Dict, Optional
+from .base import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# 같은 디렉토리를 여는 LocalVectorStore는 프로세스 안에서 하나만 유지
+# (여러 인스턴스가 같은 WAL에 쓰고 각자 압축하면 세대가 엇갈림)
+_local_stores: Dict[str, VectorStore] = {}
+
+
+def create_vector_store(config: Optional[Dict] = None) -> VectorStore:
+    """
+    설정으로 벡터 스토어 생성
+
+    환경 변수 VECTORSTORE_TYPE / VECTORSTORE_LOCAL_PATH가 있으면 설정값보다 우선
+
+    Args:
+        config: vectorstore 설정 섹션
+            - type: mock, local, hnsw, ivf, sharded, lsm, dynamodb
+            - local_path, compact_threshold: local 타입 설정
+            - n_shards: sharded 타입 워커 프로세스 수 (기본값: CPU 코어 수)
+            - lsm_main_type, merge_threshold: lsm 타입 메인 세그먼트 종류(mock, hnsw, ivf)와 병합 임계값
+            - quantization, oversample, pq_subvectors: mock/local/sharded 타입 양자화 스캔 설정
+              (pq_subvectors가 없으면 임베딩 차원의 48 이하 약수 중 가장 큰 값)
+              (dynamodb 타입은 quantization이 pq면 테이블에 저장된 PQ 코드북을 적재)
+            - store_embeddings: dynamodb PQ 사용 시 float32 임베딩도 저장할지 여부
+            - table_name, region, write_workers: dynamodb 타입 설정
+
+    Returns:
+        VectorStore 인스턴스
+
+    Raises:
+        ValueError: 알 수 없는 타입인 경우
+    """
+    config = dict(config or {})
+    store_type = os.environ.get("VECTORSTORE_TYPE", config.get("type", "mock")).lower()
+    quantization = {
+        "quantization": config.get("quantization"),
+        "oversample": config.get("oversample", 4),
+        "pq_subvectors": config.get("pq_subvectors"),
+    }
+
+    if store_type == "mock":
+        from .mock_store import MockVectorStore
+        return MockVectorStore(**quantization)
+
+    if store_type == "local":
+        from .local_store import LocalVectorStore
+        path = os.path.abspath(os.environ.get("VECTORSTORE_LOCAL_PATH", config.get("local_path", "./data/vectorstore")))
+        if path not in _local_stores:
+            _local_stores[path] = LocalVectorStore(
+                path,
+                compact_threshold=config.get("compact_threshold", 1000),
+                **quantization
+            )
+        return _local_stores[path]
+
+    if store_type == "hnsw":
+        from .hnsw_store import HNSWVectorStore
+        return HNSWVectorStore()
+
+    if store_type == "ivf":
+        from .ivf_store import IVFVectorStore
+        return IVFVectorStore()
+
+    if store_type == "sharded":
+        from .sharded_store import ShardedVectorStore
+        return ShardedVectorStore(n_shards=config.get("n_shards"), **quantization)
+
+    if store_type == "lsm":
+        from .lsm_store import LSMVectorStore
+        main_type = config.get("lsm_main_type", "hnsw")
+        if main_type == "mock":
+            from .mock_store import MockVectorStore
+            main_factory = lambda: MockVectorStore(**quantization)
+        elif main_type == "hnsw":
+            from .hnsw_store import HNSWVectorStore
+            main_factory = HNSWVectorStore
+        elif main_type == "ivf":
+            from .ivf_store import IVFVectorStore
+            main_factory = IVFVectorStore
+        else:
+            raise ValueError(f"Unknown LSM main segment type: {main_type}")
+        return LSMVectorStore(main_factory, merge_threshold=config.get("merge_threshold", 1000))
+
+    if store_type == "dynamodb":
+        from .dynamodb_store import DynamoDBVectorStore
+        store = DynamoDBVectorStore(
+            table_name=config.get("table_name", "rag-documents"),
+            region=config.get("region", "ap-northeast-2"),
+            store_embeddings=config.get("store_embeddings", True),
+            oversample=quantization["oversample"],
+            write_workers=config.get("write_workers", 4)
+        )
+        if quantization["quantization"] == "pq" and not store.load_pq_codec():
+            logger.warning("No PQ codebook in table; run train_pq_codec() first (using float32 embeddings)")
+        return store
+
+    raise ValueError(f"Unknown vector store type: {store_type}")
@@ -0,0 +1,382 @@
+"""
+HNSW 벡터 스토어 구현
+계층형 근접 그래프(Hierarchical Navigable Small World) 기반 근사 최근접 이웃 검색
+"""
+
+import copy
+import heapq
+import logging
+import math
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .base import VectorStore, VectorDocument
+
+logger = logging.getLogger(__name__)
+
+
+class HNSWVectorStore(VectorStore):
+    """
+    순수 NumPy HNSW 그래프 인덱스 벡터 스토어
+
+    - 코사인 유사도 기준 (삽입 시 벡터를 정규화하여 내적으로 계산)
+    - add_documents는 그래프에 점진적으로 노드를 삽입
+    - delete_document는 노드를 tombstone 처리 (그래프 탐색에는 계속 사용, 결과에서만 제외)
+    - similarity_search_batch는 기본 구현(쿼리별 탐색) 사용: 탐색 경로가 쿼리마다 달라 GEMM으로 묶을 수 없고,
+      전체 행렬 곱으로 바꾸면 근사 검색이 아닌 O(N) 정확 검색이 됨
+    """
+
+    def __init__(
+        self,
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 50,
+        seed: Optional[int] = None
+    ):
+        """
+        HNSW 스토어 초기화
+
+        Args:
+            M: 상위 레이어의 노드당 최대 이웃 수 (레이어 0은 2M)
+            ef_construction: 삽입 시 후보 리스트 크기
+            ef_search: 검색 시 후보 리스트 크기 (k보다 작으면 k 사용)
+            seed: 레벨 샘플링 난수 시드
+        """
+        if M < 2:
+            raise ValueError("M must be at least 2")
+
+        self.M = M
+        self.max_neighbors_0 = 2 * M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._level_mult = 1.0 / math.log(M)
+        self._rng = np.random.default_rng(seed)
+
+        self.dimension: Optional[int] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._docs: List[VectorDocument] = []
+        self._neighbors: List[List[List[int]]] = []
+        self._entry_point: Optional[int] = None
+        self._max_level = -1
+
+        self._deleted: Set[int] = set()
+        self._node_of: Dict[Tuple[str, str], int] = {}
+        self._doc_nodes: Dict[str, Dict[int, None]] = {}
+        self._writes = 0
+        logger.info(f"HNSWVectorStore initialized: M={M}, ef_construction={ef_construction}, ef_search={ef_search}")
+
+    def __len__(self) -> int:
+        return len(self._docs) - len(self._deleted)
+
+    @property
+    def tombstone_count(self) -> int:
+        """그래프에 남아 있는 삭제 표시 노드 수 (rebuild로 제거)"""
+        return len(self._deleted)
+
+    def copy(self) -> "HNSWVectorStore":
+        """
+        그래프 복사본 (벡터 행렬/이웃 리스트/색인을 복사하여 서로 영향 없음)
+
+        LSM 병합이 검색 중인 기존 그래프는 그대로 두고 복사본에 델타만 삽입할 때 사용
+        """
+        clone = copy.copy(self)
+        clone._rng = copy.deepcopy(self._rng)
+        clone._vectors = None if self._vectors is None else self._vectors.copy()
+        clone._docs = list(self._docs)
+        clone._neighbors = [[list(links) for links in layers] for layers in self._neighbors]
+        clone._deleted = set(self._deleted)
+        clone._node_of = dict(self._node_of)
+        clone._doc_nodes = {document_id: dict(nodes) for document_id, nodes in self._doc_nodes.items()}
+        return clone
+
+    def delete_chunks(self, keys: Iterable[Tuple[str, str]]) -> int:
+        """
+        청크 단위 삭제 (해당 노드만 tombstone 처리, 같은 문서의 다른 청크는 유지)
+
+        Returns:
+            삭제된 청크 수
+        """
+        self._writes += 1
+        nodes = [self._node_of[key] for key in dict.fromkeys(keys) if key in self._node_of]
+        for node in nodes:
+            self._tombstone(node)
+        return len(nodes)
+
+    def add_documents(self, documents: List[VectorDocument]) -> bool:
+        """문서 추가 (그래프에 점진적으로 삽입)"""
+        try:
+            self._writes += 1
+            added = 0
+            for doc in documents:
+                vec = np.asarray(doc.embedding, dtype=np.float32)
+                if self.dimension is None:
+                    self.dimension = vec.shape[0]
+                if vec.shape != (self.dimension,):
+                    raise ValueError(
+                        f"Embedding dimension mismatch: expected {self.dimension}, got {vec.shape}"
+                    )
+
+                norm = np.linalg.norm(vec)
+                if not np.isfinite(norm) or norm == 0:
+                    logger.warning(f"Document {doc.document_id}_{doc.chunk_id} has zero or invalid embedding, skipping")
+                    continue
+
+                # 같은 청크 재삽입은 기존 노드를 tombstone 처리 후 새 노드로 삽입
+                key = (doc.document_id, doc.chunk_id)
+                if key in self._node_of:
+                    self._tombstone(self._node_of[key])
+
+                node = self._append_node(doc, vec / norm)
+                self._node_of[key] = node
+                self._doc_nodes.setdefault(doc.document_id, {})[node] = None
+                self._insert(node)
+                added += 1
+
+            logger.info(f"Added {added} documents to HNSWVectorStore")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add documents: {e}")
+            return False
+
+    def similarity_search(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None,
+        ef_search: Optional[int] = None
+    ) -> List[VectorDocument]:
+        """
+        근사 유사도 검색
+
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+            k: 반환할 문서 수
+            filter_metadata: 메타데이터 필터 (그래프 탐색 후 적용, 부족하면 ef 확장)
+            ef_search: 이번 호출에만 적용할 후보 리스트 크기
+
+        Returns:
+            검색된 문서 리스트
+        """
+        try:
+            if self._entry_point is None or len(self) == 0:
+                logger.warning("Vector store is empty")
+                return []
+
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vec)
+            if query_norm == 0:
+                logger.warning("Query embedding is zero vector")
+                return []
+            query_vec = query_vec / query_norm
+
+            ef = max(ef_search or self.ef_search, k)
+            total_nodes = len(self._docs)
+            while True:
+                candidates = self._search(query_vec, ef)
+                results = [
+                    self._docs[node]
+                    for _, node in candidates
+                    if node not in self._deleted
+                    and (not filter_metadata or self._matches_filter(self._docs[node].metadata, filter_metadata))
+                ][:k]
+
+                # tombstone/필터로 결과가 부족하면 ef를 늘려 재탐색
+                if len(results) >= k or ef >= total_nodes:
+                    break
+                ef = min(ef * 2, total_nodes)
+
+            logger.info(f"Found {len(results)} similar documents (ef={ef})")
+            return results
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}", exc_info=True)
+            return []
+
+    def _matches_filter(self, metadata: Dict, filter_metadata: Dict) -> bool:
+        """메타데이터 필터 매칭 확인"""
+        for key, value in filter_metadata.items():
+            if key not in metadata or metadata[key] != value:
+                return False
+        return True
+
+    def delete_document(self, document_id: str) -> bool:
+        """문서 삭제 (모든 청크 노드를 tombstone 처리)"""
+        try:
+            self._writes += 1
+            nodes = self._doc_nodes.pop(document_id, {})
+            for node in nodes:
+                self._tombstone(node)
+
+            logger.info(f"Deleted document: {document_id} ({len(nodes)} chunks)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete document: {e}")
+            return False
+
+    def get_document(self, document_id: str) -> Optional[VectorDocument]:
+        """문서 조회"""
+        # 첫 번째 청크만 반환
+        for node in self._doc_nodes.get(document_id, {}):
+            return self._docs[node]
+        return None
+
+    def get_all_documents(self) -> List[VectorDocument]:
+        """모든 문서 반환 (tombstone 제외)"""
+        return [doc for node, doc in enumerate(self._docs) if node not in self._deleted]
+
+    def rebuild(self) -> None:
+        """tombstone 노드를 제거하고 그래프를 재구성"""
+        documents = self.get_all_documents()
+        self.dimension = None
+        self._vectors = None
+        self._docs = []
+        self._neighbors = []
+        self._entry_point = None
+        self._max_level = -1
+        self._deleted = set()
+        self._node_of = {}
+        self._doc_nodes = {}
+        self.add_documents(documents)
+        logger.info(f"HNSW graph rebuilt with {len(documents)} documents")
+
+    # ------------------------------
+    # 그래프 내부 구현
+    # ------------------------------
+    def _append_node(self, doc: VectorDocument, vec: np.ndarray) -> int:
+        """정규화 벡터를 행렬에 추가하고 노드 번호 반환"""
+        node = len(self._docs)
+        if self._vectors is None:
+            self._vectors = np.empty((1024, self.dimension), dtype=np.float32)
+        elif node >= self._vectors.shape[0]:
+            grown = np.empty((self._vectors.shape[0] * 2, self.dimension), dtype=np.float32)
+            grown[:node] = self._vectors[:node]
+            self._vectors = grown
+
+        self._vectors[node] = vec
+        self._docs.append(doc)
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        self._neighbors.append([[] for _ in range(level + 1)])
+        return node
+
+    def _tombstone(self, node: int) -> None:
+        """노드를 삭제 표시"""
+        self._deleted.add(node)
+        doc = self._docs[node]
+        key = (doc.document_id, doc.chunk_id)
+        if self._node_of.get(key) == node:
+            del self._node_of[key]
+        chunks = self._doc_nodes.get(doc.document_id)
+        if chunks is not None:
+            chunks.pop(node, None)
+            if not chunks:
+                del self._doc_nodes[doc.document_id]
+
+    def _insert(self, node: int) -> None:
+        """노드를 그래프에 연결"""
+        level = len(self._neighbors[node]) - 1
+        if self._entry_point is None:
+            self._entry_point = node
+            self._max_level = level
+            return
+
+        query = self._vectors[node]
+        entry = [self._entry_point]
+
+        # 상위 레이어는 탐욕 탐색으로 진입점만 좁힘
+        for layer in range(self._max_level, level, -1):
+            entry = [self._search_layer(query, entry, 1, layer)[0][1]]
+
+        for layer in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(query, entry, self.ef_construction, layer)
+            max_neighbors = self.max_neighbors_0 if layer == 0 else self.M
+            neighbors = self._select_neighbors(query, candidates, self.M)
+            self._neighbors[node][layer] = neighbors
+
+            for neighbor in neighbors:
+                links = self._neighbors[neighbor][layer]
+                links.append(node)
+                if len(links) > max_neighbors:
+                    sims = self._vectors[links] @ self._vectors[neighbor]
+                    ranked = sorted(zip(sims.tolist(), links), reverse=True)
+                    self._neighbors[neighbor][layer] = self._select_neighbors(
+                        self._vectors[neighbor], ranked, max_neighbors
+                    )
+            entry = [n for _, n in candidates]
+
+        if level > self._max_level:
+            self._entry_point = node
+            self._max_level = level
+
+    def _select_neighbors(
+        self,
+        query: np.ndarray,
+        candidates: List[Tuple[float, int]],
+        m: int
+    ) -> List[int]:
+        """
+        이웃 선택 휴리스틱: 이미 선택된 이웃보다 쿼리에 더 가까운 후보만 채택해 다양성 확보,
+        부족하면 버려진 후보로 채움
+        """
+        selected: List[int] = []
+        pruned: List[int] = []
+        for sim, candidate in candidates:
+            if len(selected) >= m:
+                break
+            if selected and float(np.max(self._vectors[selected] @ self._vectors[candidate])) >= sim:
+                pruned.append(candidate)
+            else:
+                selected.append(candidate)
+
+        for candidate in pruned:
+            if len(selected) >= m:
+                break
+            selected.append(candidate)
+        return selected
+
+    def _search_layer(
+        self,
+        query: np.ndarray,
+        entry_points: List[int],
+        ef: int,
+        layer: int
+    ) -> List[Tuple[float, int]]:
+        """
+        단일 레이어 best-first 탐색
+
+        Returns:
+            (유사도, 노드) 리스트 (유사도 내림차순, 최대 ef개)
+        """
+        visited = set(entry_points)
+        sims = self._vectors[entry_points] @ query
+        candidates = [(-s, n) for s, n in zip(sims.tolist(), entry_points)]
+        results = [(s, n) for s, n in zip(sims.tolist(), entry_points)]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if -neg_sim < results[0][0] and len(results) >= ef:
+                break
+
+            links = self._neighbors[node][layer] if layer < len(self._neighbors[node]) else []
+            fresh = [n for n in links if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+
+            # 이웃 유사도는 한 번의 행렬 곱으로 계산
+            for n, s in zip(fresh, (self._vectors[fresh] @ query).tolist()):
+                if len(results) < ef or s > results[0][0]:
+                    heapq.heappush(candidates, (-s, n))
+                    heapq.heappush(results, (s, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _search(self, query: np.ndarray, ef: int) -> List[Tuple[float, int]]:
+        """전체 레이어 검색 (레이어 0에서 ef개 후보 반환)"""
+        entry = [self._entry_point]
+        for layer in range(self._max_level, 0, -1):
+            entry = [self._search_layer(query, entry, 1, layer)[0][1]]
+        return self._search_layer(query, entry, ef, 0)
@@ -0,0 +1,204 @@
+"""
+벡터 인덱스 바이너리 파일 형식
+고정 길이 헤더(매직/버전/차원/dtype/행 수/체크섬) + 정렬된 벡터 블록 + 노름 블록 + ID/오프셋 테이블
+읽기는 np.memmap으로 복사 없이 열고, 손상되었거나 차원이 다른 파일은 거부
+"""
+
+import json
+import logging
+import os
+import struct
+import zlib
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b"RAGVIDX\x00"
+INDEX_FORMAT_VERSION = 1
+
+# magic, version, dtype 코드, dimension, rows, vectors/norms/table 오프셋, table 크기, payload/header CRC32
+_HEADER = struct.Struct("<8sHHIQQQQQII")
+HEADER_SIZE = _HEADER.size  # 64바이트
+# 블록 시작 위치 정렬 (캐시 라인 단위, 헤더 크기와 같음)
+BLOCK_ALIGNMENT = 64
+
+_DTYPE_CODES = {1: np.dtype("<f4"), 2: np.dtype("<f2")}
+_DTYPE_BY_NAME = {dtype: code for code, dtype in _DTYPE_CODES.items()}
+
+# 체크섬 계산 시 한 번에 읽는 바이트 수
+_CRC_BLOCK_BYTES = 1 << 24
+
+
+@dataclass
+class IndexFile:
+    """read_index_file 결과 (vectors/norms는 파일을 가리키는 읽기 전용 memmap)"""
+    version: int
+    vectors: np.ndarray
+    norms: np.ndarray
+    ids: List[Tuple[str, str]]
+    offsets: Dict[str, List[int]]
+
+    @property
+    def dimension(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // BLOCK_ALIGNMENT) * BLOCK_ALIGNMENT
+
+
+def _crc32(data, crc: int = 0) -> int:
+    """버퍼를 블록 단위로 CRC32 계산 (memmap이면 필요한 페이지만 차례로 읽음)"""
+    view = memoryview(data)
+    for start in range(0, len(view), _CRC_BLOCK_BYTES):
+        crc = zlib.crc32(view[start:start + _CRC_BLOCK_BYTES], crc)
+    return crc
+
+
+def write_index_file(
+    path: str,
+    vectors: np.ndarray,
+    ids: Sequence[Tuple[str, str]],
+    norms: Optional[np.ndarray] = None,
+    offsets: Optional[Dict[str, List[int]]] = None,
+    dtype: str = "float32"
+) -> int:
+    """
+    벡터 행렬을 인덱스 파일로 기록 (임시 파일에 쓴 뒤 원자적으로 교체)
+
+    Args:
+        path: 출력 파일 경로
+        vectors: (행 수, 차원) 벡터 행렬
+        ids: 행별 (document_id, chunk_id)
+        norms: 행별 원본 노름 (None이면 1)
+        offsets: document_id → [시작 행, 끝 행) 범위
+        dtype: 벡터 저장 형식 ("float32" 또는 "float16")
+
+    Returns:
+        기록한 파일 크기 (바이트)
+
+    Raises:
+        ValueError: 지원하지 않는 dtype이거나 행 수가 ids와 다른 경우
+    """
+    store_dtype = np.dtype(dtype).newbyteorder("<")
+    if store_dtype not in _DTYPE_BY_NAME:
+        raise ValueError(f"Unsupported index dtype: {dtype}")
+
+    vectors = np.ascontiguousarray(vectors, dtype=store_dtype)
+    if vectors.ndim != 2:
+        raise ValueError("vectors must be a 2-D matrix")
+    rows, dimension = vectors.shape
+    if rows != len(ids):
+        raise ValueError(f"Row count mismatch: vectors={rows}, ids={len(ids)}")
+    norms = np.ones(rows, dtype="<f4") if norms is None else np.ascontiguousarray(norms, dtype="<f4")
+    if norms.shape != (rows,):
+        raise ValueError(f"Row count mismatch: vectors={rows}, norms={norms.shape[0]}")
+
+    table = json.dumps(
+        {"ids": [list(key) for key in ids], "offsets": offsets or {}}, ensure_ascii=False
+    ).encode("utf-8")
+
+    vectors_offset = _align(HEADER_SIZE)
+    norms_offset = _align(vectors_offset + vectors.nbytes)
+    table_offset = _align(norms_offset + norms.nbytes)
+    # 블록은 복사 없는 uint8 뷰로 기록
+    blocks = [
+        (vectors_offset, vectors.reshape(-1).view(np.uint8)),
+        (norms_offset, norms.view(np.uint8)),
+        (table_offset, np.frombuffer(table, dtype=np.uint8)),
+    ]
+
+    # 체크섬은 헤더 이후 전체(정렬 패딩 포함)에 대해 계산
+    payload_crc = 0
+    position = HEADER_SIZE
+    for offset, block in blocks:
+        payload_crc = _crc32(bytes(offset - position), payload_crc)
+        payload_crc = _crc32(block, payload_crc)
+        position = offset + block.nbytes
+
+    header = _HEADER.pack(
+        INDEX_MAGIC, INDEX_FORMAT_VERSION, _DTYPE_BY_NAME[store_dtype], dimension, rows,
+        vectors_offset, norms_offset, table_offset, len(table), payload_crc, 0
+    )
+    header = header[:-4] + struct.pack("<I", zlib.crc32(header[:-4]))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        position = HEADER_SIZE
+        for offset, block in blocks:
+            f.write(bytes(offset - position))
+            f.write(memoryview(block))
+            position = offset + block.nbytes
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return position
+
+
+def read_index_file(path: str, dimension: Optional[int] = None, verify: bool = True) -> IndexFile:
+    """
+    인덱스 파일 열기 (벡터/노름 블록은 복사 없이 memmap)
+
+    Args:
+        path: 인덱스 파일 경로
+        dimension: 기대하는 벡터 차원 (None이면 확인하지 않음, 빈 인덱스는 항상 통과)
+        verify: 페이로드 CRC32 확인 여부 (파일 전체를 한 번 읽음)
+
+    Returns:
+        IndexFile
+
+    Raises:
+        ValueError: 매직/버전/헤더 체크섬/크기/페이로드 체크섬이 맞지 않거나 차원이 다른 경우
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"Index file truncated: {path}")
+
+    (magic, version, dtype_code, file_dimension, rows,
+     vectors_offset, norms_offset, table_offset, table_size,
+     payload_crc, header_crc) = _HEADER.unpack(header)
+    if magic != INDEX_MAGIC:
+        raise ValueError(f"Not a vector index file: {path}")
+    if version != INDEX_FORMAT_VERSION:
+        raise ValueError(f"Unsupported index format version: {version}")
+    if zlib.crc32(header[:-4]) != header_crc:
+        raise ValueError(f"Index header checksum mismatch: {path}")
+    if dtype_code not in _DTYPE_CODES:
+        raise ValueError(f"Unsupported index dtype code: {dtype_code}")
+    if dimension is not None and rows and file_dimension != dimension:
+        raise ValueError(f"Index dimension mismatch: expected={dimension}, file={file_dimension}")
+
+    dtype = _DTYPE_CODES[dtype_code]
+    if (
+        vectors_offset < HEADER_SIZE
+        or norms_offset < vectors_offset + rows * file_dimension * dtype.itemsize
+        or table_offset < norms_offset + rows * 4
+        or table_offset + table_size != file_size
+    ):
+        raise ValueError(f"Index file size mismatch (truncated or corrupted): {path}")
+
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    if verify and _crc32(raw[HEADER_SIZE:]) != payload_crc:
+        raise ValueError(f"Index payload checksum mismatch: {path}")
+
+    table = json.loads(bytes(raw[table_offset:]).decode("utf-8"))
+    ids = [tuple(key) for key in table["ids"]]
+    if len(ids) != rows:
+        raise ValueError(f"Index id table mismatch: rows={rows}, ids={len(ids)}")
+
+    if rows == 0:
+        # 빈 배열은 mmap할 수 없음
+        vectors = np.empty((0, file_dimension), dtype=dtype)
+        norms = np.empty(0, dtype="<f4")
+    else:
+        vectors = np.memmap(path, dtype=dtype, mode="r", offset=vectors_offset, shape=(rows, file_dimension))
+        norms = np.memmap(path, dtype="<f4", mode="r", offset=norms_offset, shape=(rows,))
+    return IndexFile(version=version, vectors=vectors, norms=norms, ids=ids, offsets=table["offsets"])
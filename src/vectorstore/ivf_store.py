@@ -0,0 +1,338 @@
+"""
+IVF 벡터 스토어 구현
+k-means centroid로 청크를 posting list에 나누고, 쿼리 시 가까운 nprobe개 리스트만 검색
+"""
+
+import heapq
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from .base import VectorStore, VectorDocument
+from .kmeans import assign_clusters, kmeans
+from .matrix_index import MatrixIndex, normalize_rows, top_k_indices, top_k_rows
+
+logger = logging.getLogger(__name__)
+
+
+class IVFVectorStore(VectorStore):
+    """
+    Inverted File(IVF) 인덱스 벡터 스토어
+
+    - 학습 전에는 단일 posting list에 대한 정확 검색으로 동작
+    - 학습 후에는 각 posting list가 독립된 연속 행렬(MatrixIndex)을 가짐
+    - nprobe로 recall/지연 시간 균형을 호출 단위로 조절
+    """
+
+    def __init__(
+        self,
+        n_lists: int = 64,
+        nprobe: int = 8,
+        auto_train: bool = True,
+        min_train_size: Optional[int] = None,
+        retrain_growth: float = 2.0,
+        max_train_samples: int = 50000,
+        seed: Optional[int] = None
+    ):
+        """
+        IVF 스토어 초기화
+
+        Args:
+            n_lists: posting list(centroid) 수
+            nprobe: 기본 검색 대상 리스트 수
+            auto_train: 문서가 충분히 쌓이면 자동 학습/재학습 여부
+            min_train_size: 자동 학습을 시작할 최소 문서 수 (기본값: n_lists * 8)
+            retrain_growth: 마지막 학습 대비 문서 수가 이 배수만큼 늘면 자동 재학습
+            max_train_samples: k-means 학습에 사용할 최대 샘플 수
+            seed: k-means 난수 시드
+        """
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.auto_train = auto_train
+        self.min_train_size = min_train_size or n_lists * 8
+        self.retrain_growth = retrain_growth
+        self.max_train_samples = max_train_samples
+        self.seed = seed
+
+        self.documents: Dict[Tuple[str, str], VectorDocument] = {}
+        self._doc_chunks: Dict[str, Dict[str, None]] = {}
+        self._assignments: Dict[Tuple[str, str], int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[MatrixIndex] = [MatrixIndex()]
+        self._trained_size = 0
+        self._writes = 0
+        logger.info(f"IVFVectorStore initialized: n_lists={n_lists}, nprobe={nprobe}")
+
+    def __len__(self) -> int:
+        return len(self._assignments)
+
+    @property
+    def is_trained(self) -> bool:
+        """centroid 학습 여부"""
+        return self._centroids is not None
+
+    def list_sizes(self) -> List[int]:
+        """posting list별 벡터 수"""
+        return [len(posting) for posting in self._lists]
+
+    def add_documents(self, documents: List[VectorDocument]) -> bool:
+        """문서 추가 (학습된 경우 가장 가까운 centroid의 리스트에 할당)"""
+        try:
+            self._writes += 1
+            if not documents:
+                return True
+
+            normalized, valid = normalize_rows([doc.embedding for doc in documents])
+            dimension = self._lists[0].dimension
+            if dimension is not None and normalized.shape[1] != dimension:
+                raise ValueError(
+                    f"Embedding dimension mismatch: expected {dimension}, got {normalized.shape[1]}"
+                )
+
+            if self.is_trained:
+                list_ids = assign_clusters(normalized, self._centroids, spherical=True)
+            else:
+                list_ids = np.zeros(len(documents), dtype=np.int64)
+
+            for i, doc in enumerate(documents):
+                key = (doc.document_id, doc.chunk_id)
+                self._remove_key(key)
+                self.documents[key] = doc
+                self._doc_chunks.setdefault(doc.document_id, {})[doc.chunk_id] = None
+                if not valid[i]:
+                    logger.warning(f"Document {doc.document_id}_{doc.chunk_id} has zero or invalid embedding, not indexed")
+                    continue
+                list_id = int(list_ids[i])
+                self._lists[list_id].add(key, normalized[i])
+                self._assignments[key] = list_id
+
+            logger.info(f"Added {len(documents)} documents to IVFVectorStore")
+
+            if self.auto_train and self._needs_training():
+                self.train()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add documents: {e}")
+            return False
+
+    def train(self, n_lists: Optional[int] = None) -> None:
+        """
+        centroid 학습 및 posting list 재구성 (코퍼스가 커졌을 때 재학습/재분배에도 사용)
+
+        Args:
+            n_lists: 새 posting list 수 (None이면 기존 설정 유지)
+        """
+        if n_lists is not None:
+            self.n_lists = n_lists
+
+        keys = [key for posting in self._lists for key in posting.keys]
+        if not keys:
+            logger.warning("No vectors to train IVF index")
+            return
+        vectors = np.concatenate([posting.vectors for posting in self._lists if len(posting)])
+
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if len(vectors) > self.max_train_samples:
+            sample = vectors[rng.choice(len(vectors), size=self.max_train_samples, replace=False)]
+
+        self._centroids = kmeans(sample, self.n_lists, spherical=True, seed=self.seed)
+        list_ids = assign_clusters(vectors, self._centroids, spherical=True)
+
+        self._lists = [MatrixIndex(dimension=vectors.shape[1]) for _ in range(len(self._centroids))]
+        for list_id in range(len(self._lists)):
+            rows = np.flatnonzero(list_ids == list_id)
+            self._lists[list_id].add_batch([keys[i] for i in rows], vectors[rows])
+        self._assignments = {key: int(list_id) for key, list_id in zip(keys, list_ids)}
+        self._trained_size = len(keys)
+
+        logger.info(f"IVF index trained: {len(keys)} vectors, {len(self._lists)} lists")
+
+    def similarity_search(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None,
+        nprobe: Optional[int] = None
+    ) -> List[VectorDocument]:
+        """
+        유사도 검색
+
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+            k: 반환할 문서 수
+            filter_metadata: 메타데이터 필터
+            nprobe: 이번 호출에서 검색할 posting list 수 (None이면 기본값)
+
+        Returns:
+            검색된 문서 리스트
+        """
+        try:
+            if not self._assignments:
+                logger.warning("Vector store is empty")
+                return []
+
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vec)
+            if query_norm == 0:
+                logger.warning("Query embedding is zero vector")
+                return []
+            query_vec = query_vec / query_norm
+
+            if self.is_trained:
+                probe = top_k_indices(self._centroids @ query_vec, nprobe or self.nprobe)
+            else:
+                probe = [0]
+
+            hits: List[Tuple[float, Tuple[str, str]]] = []
+            scanned = 0
+            for list_id in probe:
+                posting = self._lists[list_id]
+                rows = None
+                if filter_metadata:
+                    rows = [
+                        row for row, key in enumerate(posting.keys)
+                        if self._matches_filter(self.documents[key].metadata, filter_metadata)
+                    ]
+                scanned += len(posting) if rows is None else len(rows)
+                hits.extend((score, key) for key, score in posting.search(query_vec, k, rows=rows))
+
+            results = [self.documents[key] for _, key in heapq.nlargest(k, hits)]
+            logger.info(f"Found {len(results)} similar documents (scanned {scanned} vectors in {len(probe)} lists)")
+            return results
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}", exc_info=True)
+            return []
+
+    def similarity_search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[VectorDocument]]:
+        """
+        여러 쿼리 유사도 검색
+
+        centroid 선택을 GEMM 1회로 처리하고, posting list마다 그 리스트를 탐색하는
+        쿼리들을 모아 한 번의 행렬 곱으로 점수 계산
+        """
+        try:
+            if len(query_embeddings) == 0:
+                return []
+            queries, valid = normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+            if not self._assignments:
+                return [[] for _ in range(queries.shape[0])]
+
+            if self.is_trained:
+                probes = top_k_rows(queries @ self._centroids.T, nprobe or self.nprobe)
+            else:
+                probes = np.zeros((queries.shape[0], 1), dtype=np.int64)
+
+            hits: List[List[Tuple[float, Tuple[str, str]]]] = [[] for _ in range(queries.shape[0])]
+            for list_id in np.unique(probes):
+                query_ids = np.flatnonzero((probes == list_id).any(axis=1) & valid)
+                posting = self._lists[list_id]
+                if query_ids.size == 0 or len(posting) == 0:
+                    continue
+                rows = None
+                if filter_metadata:
+                    rows = [
+                        row for row, key in enumerate(posting.keys)
+                        if self._matches_filter(self.documents[key].metadata, filter_metadata)
+                    ]
+                for q, list_hits in zip(query_ids, posting.search_batch(queries[query_ids], k, rows=rows)):
+                    hits[q].extend((score, key) for key, score in list_hits)
+
+            results = [[self.documents[key] for _, key in heapq.nlargest(k, query_hits)] for query_hits in hits]
+            logger.info(f"Batch search: {len(results)} queries")
+            return results
+        except Exception as e:
+            logger.error(f"Batch similarity search failed: {e}", exc_info=True)
+            return [[] for _ in range(len(query_embeddings))]
+
+    def similarity_search_candidates(
+        self,
+        query_embedding: List[float],
+        candidate_ids: Sequence[Tuple[str, str]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[VectorDocument]:
+        """후보 청크만 점수 계산 (posting list와 무관하게 정확 검색)"""
+        try:
+            keys = []
+            vectors = []
+            for key in dict.fromkeys(tuple(key) for key in candidate_ids):
+                list_id = self._assignments.get(key)
+                if list_id is None:
+                    continue
+                if filter_metadata and not self._matches_filter(self.documents[key].metadata, filter_metadata):
+                    continue
+                posting = self._lists[list_id]
+                keys.append(key)
+                vectors.append(posting.vectors[posting.row_of(key)])
+            if not keys:
+                return []
+            
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vec)
+            if query_norm == 0:
+                logger.warning("Query embedding is zero vector")
+                return []
+            scores = np.vstack(vectors) @ (query_vec / query_norm)
+            return [self.documents[keys[i]] for i in top_k_indices(scores, k)]
+        except Exception as e:
+            logger.error(f"Candidate search failed: {e}", exc_info=True)
+            return []
+
+    def _matches_filter(self, metadata: Dict, filter_metadata: Dict) -> bool:
+        """메타데이터 필터 매칭 확인"""
+        for key, value in filter_metadata.items():
+            if key not in metadata or metadata[key] != value:
+                return False
+        return True
+
+    def delete_document(self, document_id: str) -> bool:
+        """문서 삭제"""
+        try:
+            self._writes += 1
+            chunk_ids = list(self._doc_chunks.get(document_id, {}))
+            for chunk_id in chunk_ids:
+                self._remove_key((document_id, chunk_id))
+
+            logger.info(f"Deleted document: {document_id} ({len(chunk_ids)} chunks)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete document: {e}")
+            return False
+
+    def get_document(self, document_id: str) -> Optional[VectorDocument]:
+        """문서 조회"""
+        # 첫 번째 청크만 반환
+        for chunk_id in self._doc_chunks.get(document_id, {}):
+            return self.documents[(document_id, chunk_id)]
+        return None
+
+    def get_all_documents(self) -> List[VectorDocument]:
+        """모든 문서 반환"""
+        return list(self.documents.values())
+
+    def _needs_training(self) -> bool:
+        """자동 학습/재학습 필요 여부"""
+        if not self.is_trained:
+            return len(self) >= self.min_train_size
+        return len(self) >= self._trained_size * self.retrain_growth
+
+    def _remove_key(self, key: Tuple[str, str]) -> None:
+        """청크를 문서 테이블과 posting list에서 제거"""
+        if self.documents.pop(key, None) is None:
+            return
+        list_id = self._assignments.pop(key, None)
+        if list_id is not None:
+            self._lists[list_id].remove(key)
+
+        document_id, chunk_id = key
+        chunks = self._doc_chunks.get(document_id)
+        if chunks is not None:
+            chunks.pop(chunk_id, None)
+            if not chunks:
+                del self._doc_chunks[document_id]
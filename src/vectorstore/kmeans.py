@@ -0,0 +1,81 @@
+"""
+k-means 클러스터링 유틸리티
+IVF 인덱스 centroid 학습 및 양자화 코드북 학습에 사용
+"""
+
+import numpy as np
+from typing import Optional
+
+
+def assign_clusters(data: np.ndarray, centroids: np.ndarray, spherical: bool = False) -> np.ndarray:
+    """
+    각 벡터를 가장 가까운 centroid에 할당
+
+    Args:
+        data: (n, d) 벡터 행렬
+        centroids: (k, d) centroid 행렬
+        spherical: True면 내적 최대(코사인), False면 유클리드 거리 최소
+
+    Returns:
+        (n,) 클러스터 번호 배열
+    """
+    products = data @ centroids.T
+    if spherical:
+        return np.argmax(products, axis=1)
+    # ||x - c||^2 = ||x||^2 - 2x·c + ||c||^2 에서 ||x||^2는 비교에 불필요
+    distances = np.sum(centroids * centroids, axis=1)[None, :] - 2.0 * products
+    return np.argmin(distances, axis=1)
+
+
+def kmeans(
+    data: np.ndarray,
+    n_clusters: int,
+    n_iter: int = 20,
+    spherical: bool = False,
+    seed: Optional[int] = None
+) -> np.ndarray:
+    """
+    Lloyd k-means 학습
+
+    Args:
+        data: (n, d) 학습 벡터 행렬
+        n_clusters: 클러스터 수 (n보다 크면 n으로 줄임)
+        n_iter: 최대 반복 횟수
+        spherical: True면 centroid를 단위 벡터로 유지 (코사인 k-means)
+        seed: 난수 시드
+
+    Returns:
+        (n_clusters, d) float32 centroid 행렬
+    """
+    data = np.asarray(data, dtype=np.float32)
+    n = data.shape[0]
+    if n == 0:
+        raise ValueError("Cannot train k-means on empty data")
+
+    n_clusters = min(n_clusters, n)
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(n, size=n_clusters, replace=False)].copy()
+
+    assignments = None
+    for _ in range(n_iter):
+        new_assignments = assign_clusters(data, centroids, spherical=spherical)
+        if assignments is not None and np.array_equal(assignments, new_assignments):
+            break
+        assignments = new_assignments
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, data)
+        counts = np.bincount(assignments, minlength=n_clusters)
+
+        # 빈 클러스터는 임의의 학습 벡터로 다시 시작
+        empty = counts == 0
+        if np.any(empty):
+            sums[empty] = data[rng.choice(n, size=int(empty.sum()), replace=True)]
+            counts[empty] = 1
+        centroids = sums / counts[:, None]
+
+        if spherical:
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids = centroids / np.where(norms > 0, norms, 1.0)
+
+    return centroids.astype(np.float32)
@@ -0,0 +1,549 @@
+"""
+로컬 파일 기반 벡터 스토어
+추가/삭제를 append-only WAL에 기록하고, 주기적으로 메모리 매핑 세그먼트로 압축(compaction)
+재시작 시 재수집 없이 세그먼트를 mmap으로 열고 WAL 꼬리만 다시 적용
+"""
+
+import base64
+import heapq
+import json
+import logging
+import os
+import shutil
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from .base import VectorStore, VectorDocument
+from .embedding_codec import decode_embedding, encode_embedding
+from .matrix_index import MatrixIndex, quantized_search, top_k_indices
+from .quantization import create_quantizer, encode_in_blocks
+from .snapshot import load_snapshot, write_snapshot_arrays
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+
+
+class LocalVectorStore(VectorStore):
+    """
+    디스크 영속 벡터 스토어 (로컬 개발/Streamlit/src.api 핸들러용)
+
+    디렉토리 구성 (세대 번호 N은 CURRENT 파일에 기록):
+    - segment-N/: 압축된 세그먼트 (체크섬 인덱스 파일 vectors.idx + 텍스트/메타데이터 manifest.json)
+    - wal-N.log: 세그먼트 이후의 추가/삭제 기록 (JSON Lines)
+
+    압축은 새 세대의 세그먼트와 빈 WAL을 먼저 만든 뒤 CURRENT를 원자적으로 교체하므로,
+    도중에 중단되어도 이전 세대가 그대로 남음
+
+    quantization을 지정하면 세그먼트의 양자화 코드만 메모리에 두고 스캔하며,
+    float32 mmap 행렬은 재점수 계산할 후보 행만 읽음
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        compact_threshold: int = 1000,
+        fsync: bool = False,
+        quantization: Optional[str] = None,
+        oversample: int = 4,
+        pq_subvectors: Optional[int] = None
+    ):
+        """
+        Args:
+            directory: 저장 디렉토리
+            compact_threshold: WAL 레코드가 이 수 이상 쌓이면 자동 압축 (0이면 자동 압축 안 함)
+            fsync: WAL 기록마다 fsync 여부 (전원 장애까지 대비할 때만 필요)
+            quantization: 양자화 방식 (None/"none", "int8", "binary", "pq")
+            oversample: 양자화 스캔 후 float32로 재점수 계산할 후보 배수
+            pq_subvectors: pq 코드 바이트 수 (임베딩 차원의 약수, None이면 첫 삽입 시 차원에서 결정)
+        """
+        self.directory = directory
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self.quantization = quantization
+        self.oversample = max(1, oversample)
+        self.pq_subvectors = pq_subvectors
+        create_quantizer(quantization)  # 알 수 없는 방식이면 여기서 ValueError
+        os.makedirs(directory, exist_ok=True)
+
+        self._generation = self._read_current()
+        self._open_generation()
+        logger.info(
+            f"LocalVectorStore opened: {directory} (generation={self._generation}, "
+            f"segment={len(self._segment_ids)}, wal={self._wal_records})"
+        )
+
+    def __len__(self) -> int:
+        return sum(len(chunks) for chunks in self._doc_chunks.values())
+
+    @property
+    def wal_records(self) -> int:
+        """마지막 압축 이후 WAL 레코드 수"""
+        return self._wal_records
+
+    def write_version(self) -> Tuple[int, int]:
+        """쓰기 버전 (세대 번호, WAL 레코드 수) - 쓰기마다 WAL 레코드가 늘고, 압축하면 세대가 바뀜"""
+        return self._generation, self._wal_records
+
+    def add_documents(self, documents: List[VectorDocument]) -> bool:
+        """문서 추가 (WAL 기록 후 메모리 상태에 반영)"""
+        try:
+            if not documents:
+                return True
+            # 적용할 수 없는 레코드가 WAL에 남지 않도록 기록 전에 검증
+            self._validate_embeddings(documents)
+            self._append_wal([self._add_record(doc) for doc in documents])
+            for doc in documents:
+                self._apply_add(doc)
+
+            logger.info(f"Added {len(documents)} documents to LocalVectorStore")
+            self._maybe_compact()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add documents: {e}")
+            return False
+
+    def similarity_search(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[VectorDocument]:
+        """유사도 검색 (세그먼트 mmap 행렬 + WAL 델타 인덱스 결과 병합)"""
+        try:
+            if not self._doc_chunks:
+                logger.warning("Vector store is empty")
+                return []
+
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vec)
+            if query_norm == 0:
+                logger.warning("Query embedding is zero vector")
+                return []
+            query_vec = query_vec / query_norm
+
+            hits: List[Tuple[float, int, VectorDocument]] = []
+
+            # 압축된 세그먼트: 삭제/교체되지 않은 행만 점수 계산
+            rows = np.flatnonzero(self._segment_live)
+            if filter_metadata and rows.size:
+                rows = np.asarray([
+                    row for row in rows
+                    if self._matches_filter(self._segment_metadata[row], filter_metadata)
+                ], dtype=np.int64)
+            if self._segment_codes is not None and rows.size > k * self.oversample:
+                [(hit_rows, scores)] = quantized_search(
+                    self._segment_quantizer, self._segment_codes, self._segment_vectors,
+                    query_vec[None, :], k, self.oversample, rows=rows
+                )
+                for row, score in zip(hit_rows, scores):
+                    hits.append((float(score), len(hits), self._segment_document(int(row))))
+            elif rows.size:
+                scores = self._segment_vectors[rows] @ query_vec
+                for i in top_k_indices(scores, k):
+                    row = int(rows[i])
+                    hits.append((float(scores[i]), len(hits), self._segment_document(row)))
+
+            # WAL 델타
+            delta_rows = None
+            if filter_metadata:
+                delta_rows = [
+                    self._delta_index.row_of(key)
+                    for key, doc in self._delta_docs.items()
+                    if key in self._delta_index and self._matches_filter(doc.metadata, filter_metadata)
+                ]
+            for key, score in self._delta_index.search(query_vec, k, rows=delta_rows):
+                hits.append((score, len(hits), self._delta_docs[key]))
+
+            results = [doc for _, _, doc in heapq.nlargest(k, hits)]
+            logger.info(f"Found {len(results)} similar documents")
+            return results
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}", exc_info=True)
+            return []
+
+    def similarity_search_candidates(
+        self,
+        query_embedding: List[float],
+        candidate_ids: Sequence[Tuple[str, str]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[VectorDocument]:
+        """후보 청크만 점수 계산 (델타 우선, 나머지는 세그먼트 행)"""
+        try:
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vec)
+            if query_norm == 0:
+                logger.warning("Query embedding is zero vector")
+                return []
+            query_vec = query_vec / query_norm
+
+            delta_rows = []
+            segment_rows = []
+            for key in dict.fromkeys(tuple(key) for key in candidate_ids):
+                if key in self._delta_docs:
+                    doc = self._delta_docs[key]
+                    if key in self._delta_index and (
+                        not filter_metadata or self._matches_filter(doc.metadata, filter_metadata)
+                    ):
+                        delta_rows.append(self._delta_index.row_of(key))
+                    continue
+                row = self._segment_rows.get(key)
+                if row is None or not self._segment_live[row]:
+                    continue
+                if filter_metadata and not self._matches_filter(self._segment_metadata[row], filter_metadata):
+                    continue
+                segment_rows.append(row)
+
+            hits: List[Tuple[float, int, VectorDocument]] = []
+            if segment_rows:
+                rows = np.asarray(segment_rows, dtype=np.int64)
+                scores = self._segment_vectors[rows] @ query_vec
+                for i in top_k_indices(scores, k):
+                    hits.append((float(scores[i]), len(hits), self._segment_document(int(rows[i]))))
+            if delta_rows:
+                for key, score in self._delta_index.search(query_vec, k, rows=delta_rows):
+                    hits.append((score, len(hits), self._delta_docs[key]))
+            return [doc for _, _, doc in heapq.nlargest(k, hits)]
+        except Exception as e:
+            logger.error(f"Candidate search failed: {e}", exc_info=True)
+            return []
+
+    def _matches_filter(self, metadata: Dict, filter_metadata: Dict) -> bool:
+        """메타데이터 필터 매칭 확인"""
+        for key, value in filter_metadata.items():
+            if key not in metadata or metadata[key] != value:
+                return False
+        return True
+
+    def delete_document(self, document_id: str) -> bool:
+        """문서 삭제 (WAL에 삭제 레코드 기록)"""
+        try:
+            chunk_count = len(self._doc_chunks.get(document_id, {}))
+            if chunk_count:
+                self._append_wal([{"op": "delete", "document_id": document_id}])
+                self._apply_delete(document_id)
+                self._maybe_compact()
+
+            logger.info(f"Deleted document: {document_id} ({chunk_count} chunks)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete document: {e}")
+            return False
+
+    def get_document(self, document_id: str) -> Optional[VectorDocument]:
+        """문서 조회"""
+        # 첫 번째 청크만 반환
+        for chunk_id in self._doc_chunks.get(document_id, {}):
+            return self._get_chunk((document_id, chunk_id))
+        return None
+
+    def get_all_documents(self) -> List[VectorDocument]:
+        """모든 문서 반환"""
+        return [
+            self._get_chunk((document_id, chunk_id))
+            for document_id, chunks in self._doc_chunks.items()
+            for chunk_id in chunks
+        ]
+
+    def compact(self) -> None:
+        """
+        세그먼트와 WAL을 새 세대 세그먼트 하나로 압축
+
+        1. segment-(N+1)/ 과 빈 wal-(N+1).log 작성
+        2. CURRENT를 N+1로 원자적 교체 (커밋 지점)
+        3. 이전 세대 파일 삭제 후 새 세그먼트를 mmap으로 다시 열기
+        """
+        next_generation = self._generation + 1
+        segment_dir = self._segment_dir(next_generation)
+        if os.path.exists(segment_dir):
+            shutil.rmtree(segment_dir)  # 이전에 중단된 압축의 잔여물
+
+        self._write_segment(segment_dir)
+        open(self._wal_path(next_generation), "w", encoding="utf-8").close()
+
+        current_tmp = os.path.join(self.directory, CURRENT_FILE + ".tmp")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(str(next_generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(current_tmp, os.path.join(self.directory, CURRENT_FILE))
+
+        previous = self._generation
+        self._generation = next_generation
+        self._open_generation()
+        shutil.rmtree(self._segment_dir(previous), ignore_errors=True)
+        if os.path.exists(self._wal_path(previous)):
+            os.remove(self._wal_path(previous))
+
+        logger.info(f"LocalVectorStore compacted: generation={next_generation}, rows={len(self._segment_ids)}")
+
+    def _write_segment(self, segment_dir: str) -> None:
+        """
+        살아 있는 세그먼트 행과 델타 인덱스 행을 새 세그먼트로 기록
+
+        mmap 행렬과 델타 행렬을 numpy로 그대로 이어 붙여 기록 (행별 VectorDocument/float 리스트 변환 없음).
+        영벡터라 인덱싱되지 않은 델타 청크는 기존 스냅샷과 같이 제외
+        """
+        rows = np.flatnonzero(self._segment_live)
+        delta_keys = list(self._delta_index.keys)
+        delta_vectors = self._delta_index.vectors
+        ids = [self._segment_ids[row] for row in rows] + delta_keys
+        if not ids:
+            empty = np.empty((0, 0), dtype=np.float32)
+            write_snapshot_arrays(segment_dir, empty, np.empty(0, dtype=np.float32), [], [], [])
+            return
+
+        # 델타는 압축 임계값 이하라 원본 노름은 문서 임베딩에서 계산
+        delta_norms = np.asarray([
+            np.linalg.norm(np.asarray(self._delta_docs[key].embedding, dtype=np.float32)) for key in delta_keys
+        ], dtype=np.float32)
+        order = np.asarray(sorted(range(len(ids)), key=ids.__getitem__), dtype=np.int64)
+        # 세그먼트 행과 델타 행을 합친 순서 → 원본 위치
+        from_segment = order < rows.size
+
+        dimension = self._segment_vectors.shape[1] if rows.size else delta_vectors.shape[1]
+        vectors = np.empty((len(ids), dimension), dtype=np.float32)
+        norms = np.empty(len(ids), dtype=np.float32)
+        segment_positions = rows[order[from_segment]]
+        delta_positions = order[~from_segment] - rows.size
+        if segment_positions.size:
+            vectors[from_segment] = self._segment_vectors[segment_positions]
+            norms[from_segment] = self._segment_norms[segment_positions]
+        if delta_positions.size:
+            vectors[~from_segment] = delta_vectors[delta_positions]
+            norms[~from_segment] = delta_norms[delta_positions]
+
+        texts = []
+        metadata = []
+        for position in order:
+            if position < rows.size:
+                texts.append(self._segment_texts[rows[position]])
+                metadata.append(self._segment_metadata[rows[position]])
+            else:
+                doc = self._delta_docs[delta_keys[position - rows.size]]
+                texts.append(doc.text)
+                metadata.append(doc.metadata)
+        write_snapshot_arrays(segment_dir, vectors, norms, [ids[i] for i in order], texts, metadata)
+
+    def _maybe_compact(self) -> None:
+        """WAL이 임계값을 넘으면 압축"""
+        if self.compact_threshold and self._wal_records >= self.compact_threshold:
+            self.compact()
+
+    def _read_current(self) -> int:
+        """CURRENT 파일의 세대 번호 (없으면 0)"""
+        path = os.path.join(self.directory, CURRENT_FILE)
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+
+    def _segment_dir(self, generation: int) -> str:
+        return os.path.join(self.directory, f"segment-{generation}")
+
+    def _wal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"wal-{generation}.log")
+
+    def _open_generation(self) -> None:
+        """현재 세대의 세그먼트를 mmap으로 열고 WAL을 재적용"""
+        self._segment_vectors = np.empty((0, 0), dtype=np.float32)
+        self._segment_ids: List[Tuple[str, str]] = []
+        self._segment_texts: List[str] = []
+        self._segment_metadata: List[Dict] = []
+        self._segment_norms = np.empty(0, dtype=np.float32)
+        self._segment_rows: Dict[Tuple[str, str], int] = {}
+        self._segment_live = np.zeros(0, dtype=bool)
+        self._segment_quantizer = create_quantizer(self.quantization, self.pq_subvectors)
+        self._segment_codes: Optional[np.ndarray] = None
+
+        self._delta_docs: Dict[Tuple[str, str], VectorDocument] = {}
+        self._delta_index = MatrixIndex(
+            quantizer=create_quantizer(self.quantization, self.pq_subvectors), oversample=self.oversample
+        )
+        # document_id → 청크 ID (세그먼트와 델타 모두 포함)
+        self._doc_chunks: Dict[str, Dict[str, None]] = {}
+        self._wal_records = 0
+
+        segment_dir = self._segment_dir(self._generation)
+        if os.path.exists(segment_dir):
+            manifest, vectors = load_snapshot(segment_dir)
+            self._segment_vectors = vectors
+            self._segment_ids = [tuple(key) for key in manifest["ids"]]
+            self._segment_texts = manifest["texts"]
+            self._segment_metadata = manifest["metadata"]
+            self._segment_norms = np.asarray(manifest["norms"], dtype=np.float32)
+            self._segment_rows = {key: row for row, key in enumerate(self._segment_ids)}
+            self._segment_live = np.ones(len(self._segment_ids), dtype=bool)
+            if self._segment_quantizer is not None and len(self._segment_ids):
+                self._segment_quantizer.fit(vectors)
+                self._segment_codes = encode_in_blocks(self._segment_quantizer, vectors)
+            for document_id, chunk_id in self._segment_ids:
+                self._doc_chunks.setdefault(document_id, {})[chunk_id] = None
+
+        self._replay_wal()
+
+    def _replay_wal(self) -> None:
+        """
+        WAL 레코드를 순서대로 다시 적용
+
+        마지막 레코드만 기록 도중 중단되었을 수 있으므로, 줄바꿈으로 끝나지 않았거나 해석할 수 없는
+        마지막 레코드는 파일에서 잘라냄 (남겨 두면 다음 추가 레코드가 같은 줄에 붙어 함께 유실됨).
+        중간 레코드가 해석되지 않으면 wal-N.quarantine으로 옮기고 WAL에서 제거 (한 레코드 때문에
+        스토어를 열지 못하면 API 전체가 시작되지 않음).
+        해석은 되지만 적용할 수 없는 레코드(차원 불일치 등)는 로그를 남기고 건너뜀.
+        """
+        path = self._wal_path(self._generation)
+        if not os.path.exists(path):
+            return
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        lines = data.split(b"\n")
+        # 마지막 요소는 줄바꿈 뒤 남은 바이트 (정상이면 빈 값)
+        tail = lines.pop()
+        records = []
+        kept_lines = []
+        corrupted = []
+        for line_no, line in enumerate(lines, start=1):
+            try:
+                records.append(json.loads(line.decode("utf-8")) if line.strip() else None)
+                kept_lines.append(line)
+            except ValueError:
+                if line_no == len(lines) and not tail:
+                    # 줄바꿈까지 기록되었지만 내용이 깨진 마지막 레코드
+                    tail = line
+                else:
+                    logger.error(f"Quarantining corrupted WAL record at {path}:{line_no}")
+                    corrupted.append(line)
+
+        if corrupted:
+            with open(path[:-len(".log")] + ".quarantine", "ab") as f:
+                f.write(b"".join(line + b"\n" for line in corrupted))
+                f.flush()
+                os.fsync(f.fileno())
+        if corrupted or tail:
+            if tail:
+                logger.warning(f"Truncating torn WAL record at {path} ({len(tail)} bytes)")
+            # 정상 레코드만 남긴 WAL을 임시 파일에 쓴 뒤 원자적으로 교체
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(line + b"\n" for line in kept_lines))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+        for line_no, record in enumerate(records, start=1):
+            if record is None:
+                continue
+            try:
+                if record["op"] == "add":
+                    self._apply_add(VectorDocument(
+                        document_id=record["document_id"],
+                        chunk_id=record["chunk_id"],
+                        text=record["text"],
+                        embedding=decode_embedding(base64.b64decode(record["embedding"])).tolist(),
+                        metadata=record["metadata"]
+                    ))
+                elif record["op"] == "delete":
+                    self._apply_delete(record["document_id"])
+            except Exception as e:
+                logger.error(f"Skipping WAL record that cannot be applied at {path}:{line_no}: {e}")
+            self._wal_records += 1
+
+    def _embedding_dimension(self) -> Optional[int]:
+        """세그먼트/델타에 이미 들어 있는 임베딩 차원 (비어 있으면 None)"""
+        if len(self._segment_ids):
+            return int(self._segment_vectors.shape[1])
+        return self._delta_index.dimension
+
+    def _validate_embeddings(self, documents: List[VectorDocument]) -> None:
+        """
+        추가할 임베딩 검증 (1차원, 유한값, 기존/배치 내 차원 일치, 양자화기 차원 제약)
+
+        Raises:
+            ValueError: 검증에 실패한 경우
+        """
+        dimension = self._embedding_dimension()
+        for doc in documents:
+            vector = np.asarray(doc.embedding, dtype=np.float32)
+            if vector.ndim != 1 or vector.size == 0:
+                raise ValueError(f"Invalid embedding shape for {doc.document_id}_{doc.chunk_id}: {vector.shape}")
+            if dimension is None:
+                dimension = vector.size
+            if vector.size != dimension:
+                raise ValueError(
+                    f"Embedding dimension mismatch for {doc.document_id}_{doc.chunk_id}: "
+                    f"expected {dimension}, got {vector.size}"
+                )
+            if not np.all(np.isfinite(vector)):
+                raise ValueError(f"Non-finite embedding for {doc.document_id}_{doc.chunk_id}")
+        if dimension is not None and self._segment_quantizer is not None:
+            self._segment_quantizer.bind_dimension(dimension)
+
+    @staticmethod
+    def _add_record(doc: VectorDocument) -> Dict:
+        """추가 WAL 레코드 (임베딩은 float32 바이트의 base64)"""
+        return {
+            "op": "add",
+            "document_id": doc.document_id,
+            "chunk_id": doc.chunk_id,
+            "text": doc.text,
+            "metadata": doc.metadata,
+            "embedding": base64.b64encode(encode_embedding(doc.embedding)).decode("ascii"),
+        }
+
+    def _append_wal(self, records: List[Dict]) -> None:
+        """WAL에 레코드 추가 (메모리 상태보다 먼저 기록)"""
+        with open(self._wal_path(self._generation), "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._wal_records += len(records)
+
+    def _apply_add(self, doc: VectorDocument) -> None:
+        """추가 레코드를 메모리 상태에 반영 (세그먼트의 같은 청크는 가려짐)"""
+        key = (doc.document_id, doc.chunk_id)
+        dimension = self._embedding_dimension()
+        if dimension is not None and len(doc.embedding) != dimension:
+            raise ValueError(f"Embedding dimension mismatch: expected {dimension}, got {len(doc.embedding)}")
+
+        # 인덱스 추가가 실패(ValueError)하면 상태를 바꾸지 않음
+        indexed = self._delta_index.add(key, doc.embedding)
+        row = self._segment_rows.get(key)
+        if row is not None:
+            self._segment_live[row] = False
+
+        self._delta_docs[key] = doc
+        if not indexed:
+            logger.warning(f"Document {doc.document_id}_{doc.chunk_id} has zero or invalid embedding, not indexed")
+        self._doc_chunks.setdefault(doc.document_id, {})[doc.chunk_id] = None
+
+    def _apply_delete(self, document_id: str) -> None:
+        """삭제 레코드를 메모리 상태에 반영"""
+        for chunk_id in self._doc_chunks.pop(document_id, {}):
+            key = (document_id, chunk_id)
+            if self._delta_docs.pop(key, None) is not None:
+                self._delta_index.remove(key)
+            row = self._segment_rows.get(key)
+            if row is not None:
+                self._segment_live[row] = False
+
+    def _get_chunk(self, key: Tuple[str, str]) -> VectorDocument:
+        """델타 우선으로 청크 조회"""
+        doc = self._delta_docs.get(key)
+        if doc is not None:
+            return doc
+        return self._segment_document(self._segment_rows[key])
+
+    def _segment_document(self, row: int) -> VectorDocument:
+        """세그먼트 행으로 VectorDocument 생성 (원본 노름으로 임베딩 복원)"""
+        document_id, chunk_id = self._segment_ids[row]
+        return VectorDocument(
+            document_id=document_id,
+            chunk_id=chunk_id,
+            text=self._segment_texts[row],
+            embedding=(np.asarray(self._segment_vectors[row]) * self._segment_norms[row]).tolist(),
+            metadata=self._segment_metadata[row]
+        )
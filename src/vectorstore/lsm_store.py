@@ -0,0 +1,407 @@
+"""
+LSM 방식 증분 벡터 스토어
+새 쓰기는 추가 전용 델타 세그먼트(브루트포스 행렬)에 쌓고, 삭제/교체는 툼스톤으로 기록
+백그라운드 병합이 델타를 무거운 읽기 인덱스(HNSW/IVF 등)로 합쳐 새 메인 세그먼트와 교체
+"""
+
+import heapq
+import logging
+import threading
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .base import VectorStore, VectorDocument
+from .matrix_index import normalize_rows
+from .mock_store import MockVectorStore
+
+logger = logging.getLogger(__name__)
+
+ChunkKey = Tuple[str, str]
+
+# 증분 병합 후 메인의 삭제 표시 노드가 살아 있는 노드보다 많으면 전체 재구성
+REBUILD_TOMBSTONE_RATIO = 1.0
+
+
+def _search_live(search: Callable[[int], List[Any]], k: int, tombstones: Dict[ChunkKey, int], key_of) -> List[Any]:
+    """
+    툼스톤으로 가려진 결과를 제외하고 상위 k개 반환
+
+    k + min(툼스톤 수, k)개부터 가져오고, 가려진 결과 때문에 k개가 안 되면 가져올 개수를
+    두 배씩 늘려 재검색 (세그먼트가 요청보다 적게 반환하면 끝까지 본 것이므로 중단)
+    툼스톤이 많아도 한 번에 k + 툼스톤 수만큼 가져오지 않으므로 HNSW ef가 불필요하게 커지지 않음
+    """
+    return _search_live_batch(lambda query_ids, fetch_k: [search(fetch_k)], 1, k, tombstones, key_of)[0]
+
+
+def _search_live_batch(
+    search: Callable[[List[int], int], List[List[Any]]],
+    n_queries: int,
+    k: int,
+    tombstones: Dict[ChunkKey, int],
+    key_of
+) -> List[List[Any]]:
+    """
+    _search_live의 여러 쿼리 버전 (search(쿼리 번호 리스트, fetch_k) → 쿼리별 결과)
+
+    재검색은 가려진 결과 때문에 k개가 모자란 쿼리만 모아 다시 요청
+    """
+    results: List[List[Any]] = [[] for _ in range(n_queries)]
+    pending = list(range(n_queries))
+    fetch_k = k + min(len(tombstones), k)
+    while pending:
+        retry = []
+        for query_id, found in zip(pending, search(pending, fetch_k)):
+            live = [item for item in found if key_of(item) not in tombstones]
+            if len(live) >= k or len(found) < fetch_k:
+                results[query_id] = live[:k]
+            else:
+                retry.append(query_id)
+        pending = retry
+        fetch_k *= 2
+    return results
+
+
+class LSMVectorStore(VectorStore):
+    """
+    메인 세그먼트 + 델타 세그먼트 벡터 스토어
+
+    - main: main_factory로 만든 읽기 인덱스 (병합 시에만 새로 만들고, 만든 뒤에는 변경하지 않음,
+      copy/delete_chunks를 지원하면 기존 메인 복사본에 델타만 삽입)
+    - active 델타: add_documents가 쓰는 MockVectorStore (행렬-벡터 곱 1회로 검색)
+    - frozen 델타: 병합 중인 이전 델타 (병합이 끝날 때까지 검색 대상)
+    - 툼스톤: 삭제/교체되어 main과 frozen에서 가려야 하는 청크 키 (키 → 기록 순번)
+      (frozen은 얼린 시점 이후 기록된 툼스톤만 적용 - 그 전에 교체된 청크는 frozen에 새 버전이 있음)
+
+    병합은 델타를 얼린 뒤 잠금 밖에서 새 메인을 만들고 참조만 교체하므로,
+    병합 도중에도 검색과 쓰기가 멈추지 않음
+    """
+
+    def __init__(
+        self,
+        main_factory: Callable[[], VectorStore] = MockVectorStore,
+        merge_threshold: int = 1000,
+        background_merge: bool = True
+    ):
+        """
+        Args:
+            main_factory: 메인 세그먼트 스토어 생성 함수 (예: HNSWVectorStore)
+            merge_threshold: 델타 청크 수 + 툼스톤 수가 이 값 이상이면 병합 (0이면 자동 병합 안 함)
+            background_merge: True면 자동 병합을 백그라운드 스레드에서 실행
+        """
+        self.main_factory = main_factory
+        self.merge_threshold = merge_threshold
+        self.background_merge = background_merge
+
+        self._lock = threading.RLock()
+        self._main: VectorStore = main_factory()
+        self._active = MockVectorStore()
+        self._frozen: Optional[MockVectorStore] = None
+        self._frozen_sequence = 0
+        self._tombstones: Dict[ChunkKey, int] = {}
+        self._sequence = 0
+        # 현재 살아 있는 청크 (병합 입력, 조회용 - 문서 객체는 세그먼트와 공유)
+        self._documents: Dict[ChunkKey, VectorDocument] = {}
+        self._doc_chunks: Dict[str, Dict[str, None]] = {}
+        self._merge_thread: Optional[threading.Thread] = None
+        self.merges = 0
+        self._writes = 0
+        logger.info(f"LSMVectorStore initialized (merge_threshold={merge_threshold})")
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def delta_size(self) -> int:
+        """병합되지 않은 델타 청크 수 (active + frozen)"""
+        with self._lock:
+            frozen = len(self._frozen.documents) if self._frozen is not None else 0
+            return len(self._active.documents) + frozen
+
+    @property
+    def tombstone_count(self) -> int:
+        """메인/frozen 세그먼트를 가리는 툼스톤 수"""
+        return len(self._tombstones)
+
+    def add_documents(self, documents: List[VectorDocument]) -> bool:
+        """문서 추가 (active 델타에 기록, 이전 세그먼트의 같은 청크는 툼스톤으로 가림)"""
+        try:
+            with self._lock:
+                self._writes += 1
+                if not self._active.add_documents(documents):
+                    return False
+                for doc in documents:
+                    key = (doc.document_id, doc.chunk_id)
+                    if key in self._documents:
+                        self._tombstone(key)
+                    self._documents[key] = doc
+                    self._doc_chunks.setdefault(doc.document_id, {})[doc.chunk_id] = None
+
+            logger.info(f"Added {len(documents)} documents to LSM delta segment")
+            self._maybe_merge()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add documents: {e}")
+            return False
+
+    def similarity_search(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[VectorDocument]:
+        """유사도 검색 (main + frozen + active 결과를 툼스톤 제외 후 병합)"""
+        try:
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vec)
+            if query_norm == 0:
+                logger.warning("Query embedding is zero vector")
+                return []
+
+            with self._lock:
+                main, frozen = self._main, self._frozen
+                tombstones = dict(self._tombstones)
+                frozen_tombstones = {
+                    key: sequence for key, sequence in tombstones.items() if sequence > self._frozen_sequence
+                }
+                hits = [
+                    (score, 0, rank, doc)
+                    for rank, (doc, score) in enumerate(
+                        self._active.similarity_search_with_scores(query_embedding, k, filter_metadata)
+                    )
+                ]
+
+            if frozen is not None:
+                frozen_hits = _search_live(
+                    lambda fetch_k: frozen.similarity_search_with_scores(query_embedding, fetch_k, filter_metadata),
+                    k, frozen_tombstones, lambda hit: (hit[0].document_id, hit[0].chunk_id)
+                )
+                for rank, (doc, score) in enumerate(frozen_hits):
+                    hits.append((score, 1, rank, doc))
+
+            query_unit = query_vec / query_norm
+            main_docs = _search_live(
+                lambda fetch_k: main.similarity_search(query_embedding, fetch_k, filter_metadata),
+                k, tombstones, lambda doc: (doc.document_id, doc.chunk_id)
+            )
+            for rank, doc in enumerate(main_docs):
+                # 메인 인덱스 종류와 관계없이 같은 코사인 점수로 병합
+                embedding = np.asarray(doc.embedding, dtype=np.float32)
+                score = float(embedding @ query_unit / np.linalg.norm(embedding))
+                hits.append((score, 2, rank, doc))
+
+            ranked = heapq.nlargest(k, hits, key=lambda entry: (entry[0], -entry[1], -entry[2]))
+            results = [doc for _, _, _, doc in ranked]
+            logger.info(f"Found {len(results)} similar documents (delta={self.delta_size})")
+            return results
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}", exc_info=True)
+            return []
+
+    def similarity_search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[List[VectorDocument]]:
+        """
+        여러 쿼리 유사도 검색
+
+        active/frozen 델타는 GEMM 1회씩, 메인은 메인의 similarity_search_batch로 검색
+        (Mock/IVF 메인은 행렬 곱, HNSW 메인은 쿼리별 그래프 탐색)하고,
+        메인 결과의 코사인 점수도 쿼리마다 행렬-벡터 곱 1회로 계산
+        """
+        try:
+            if len(query_embeddings) == 0:
+                return []
+            queries, valid = normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+            query_lists = [list(query) for query in query_embeddings]
+
+            with self._lock:
+                main, frozen = self._main, self._frozen
+                tombstones = dict(self._tombstones)
+                frozen_tombstones = {
+                    key: sequence for key, sequence in tombstones.items() if sequence > self._frozen_sequence
+                }
+                hits = [
+                    [(score, 0, rank, doc) for rank, (doc, score) in enumerate(query_hits)]
+                    for query_hits in self._active.similarity_search_batch_with_scores(query_lists, k, filter_metadata)
+                ]
+
+            if frozen is not None:
+                frozen_hits = _search_live_batch(
+                    lambda query_ids, fetch_k: frozen.similarity_search_batch_with_scores(
+                        [query_lists[q] for q in query_ids], fetch_k, filter_metadata
+                    ),
+                    len(query_lists), k, frozen_tombstones, lambda hit: (hit[0].document_id, hit[0].chunk_id)
+                )
+                for q, query_hits in enumerate(frozen_hits):
+                    hits[q].extend((score, 1, rank, doc) for rank, (doc, score) in enumerate(query_hits))
+
+            main_docs = _search_live_batch(
+                lambda query_ids, fetch_k: main.similarity_search_batch(
+                    [query_lists[q] for q in query_ids], fetch_k, filter_metadata
+                ),
+                len(query_lists), k, tombstones, lambda doc: (doc.document_id, doc.chunk_id)
+            )
+            for q, docs in enumerate(main_docs):
+                if not docs:
+                    continue
+                # 메인 인덱스 종류와 관계없이 같은 코사인 점수로 병합
+                embeddings = np.asarray([doc.embedding for doc in docs], dtype=np.float32)
+                scores = embeddings @ queries[q] / np.linalg.norm(embeddings, axis=1)
+                hits[q].extend((float(score), 2, rank, doc) for rank, (doc, score) in enumerate(zip(docs, scores)))
+
+            results = [
+                [doc for _, _, _, doc in heapq.nlargest(k, query_hits, key=lambda entry: (entry[0], -entry[1], -entry[2]))]
+                if valid[q] else []
+                for q, query_hits in enumerate(hits)
+            ]
+            logger.info(f"Batch search: {len(results)} queries (delta={self.delta_size})")
+            return results
+        except Exception as e:
+            logger.error(f"Batch similarity search failed: {e}", exc_info=True)
+            return [[] for _ in range(len(query_embeddings))]
+
+    def delete_document(self, document_id: str) -> bool:
+        """문서 삭제 (active 델타에서는 바로 제거, 이전 세그먼트는 툼스톤)"""
+        try:
+            with self._lock:
+                self._writes += 1
+                chunk_ids = list(self._doc_chunks.pop(document_id, {}))
+                self._active.delete_document(document_id)
+                for chunk_id in chunk_ids:
+                    key = (document_id, chunk_id)
+                    del self._documents[key]
+                    self._tombstone(key)
+
+            logger.info(f"Deleted document: {document_id} ({len(chunk_ids)} chunks)")
+            self._maybe_merge()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete document: {e}")
+            return False
+
+    def get_document(self, document_id: str) -> Optional[VectorDocument]:
+        """문서 조회"""
+        # 첫 번째 청크만 반환
+        with self._lock:
+            for chunk_id in self._doc_chunks.get(document_id, {}):
+                return self._documents[(document_id, chunk_id)]
+        return None
+
+    def get_all_documents(self) -> List[VectorDocument]:
+        """모든 문서 반환"""
+        with self._lock:
+            return list(self._documents.values())
+
+    def merge(self) -> bool:
+        """
+        델타를 메인 세그먼트로 병합 (호출 스레드에서 실행)
+
+        1. 잠금 안에서 active 델타를 frozen으로 얼리고 현재 살아 있는 청크와 툼스톤 순번을 기록
+        2. 잠금 밖에서 새 메인 세그먼트 생성 (검색/쓰기는 계속 진행)
+           - 메인이 copy/delete_chunks를 지원하면(HNSW) 기존 메인 복사본에서 병합 전 툼스톤 청크를
+             삭제하고 frozen 델타만 삽입 (병합 비용이 전체 코퍼스가 아니라 델타 크기에 비례)
+           - 아니면 살아 있는 청크 전체로 새로 생성
+        3. 잠금 안에서 메인 교체, frozen 해제, 병합 시작 전 툼스톤 제거
+           (병합 도중 기록된 툼스톤은 새 메인에도 적용되어야 하므로 유지)
+
+        Returns:
+            병합 여부 (다른 병합이 진행 중이면 False)
+        """
+        with self._lock:
+            if self._frozen is not None:
+                return False
+            self._frozen = self._active
+            self._frozen_sequence = self._sequence
+            self._active = MockVectorStore()
+            documents = list(self._documents.values())
+            merged_sequence = self._sequence
+            previous_main = self._main
+            removed = list(self._tombstones)
+            delta = list(self._frozen.documents.values())
+
+        try:
+            main = self._build_main(previous_main, documents, removed, delta)
+        except Exception as e:
+            logger.error(f"LSM merge failed: {e}")
+            with self._lock:
+                # frozen + active의 살아 있는 최신 청크로 active 델타를 다시 구성 (메인은 그대로)
+                restored = MockVectorStore()
+                restored.add_documents([
+                    doc for key, doc in self._documents.items()
+                    if key in self._frozen.documents or key in self._active.documents
+                ])
+                self._active = restored
+                self._frozen = None
+            return False
+
+        with self._lock:
+            self._main = main
+            self._frozen = None
+            self._tombstones = {
+                key: sequence for key, sequence in self._tombstones.items() if sequence > merged_sequence
+            }
+            self.merges += 1
+        logger.info(
+            f"LSM merge complete: main={len(documents)} chunks ({len(delta)} merged), pending delta={self.delta_size}"
+        )
+        return True
+
+    def _build_main(
+        self,
+        previous_main: VectorStore,
+        documents: List[VectorDocument],
+        removed: List[ChunkKey],
+        delta: List[VectorDocument]
+    ) -> VectorStore:
+        """
+        병합 결과 메인 세그먼트 생성 (잠금 밖에서 실행, previous_main은 검색에 계속 쓰이므로 변경하지 않음)
+
+        Raises:
+            RuntimeError: 메인 세그먼트 생성에 실패한 경우
+        """
+        if hasattr(previous_main, "copy") and hasattr(previous_main, "delete_chunks"):
+            main = previous_main.copy()
+            main.delete_chunks(removed)
+            if delta and not main.add_documents(delta):
+                raise RuntimeError("main segment insert failed")
+            if main.tombstone_count <= REBUILD_TOMBSTONE_RATIO * len(main):
+                return main
+            logger.info(f"LSM main has {main.tombstone_count} deleted nodes, rebuilding")
+
+        main = self.main_factory()
+        if documents and not main.add_documents(documents):
+            raise RuntimeError("main segment build failed")
+        return main
+
+    def wait_for_merge(self, timeout: Optional[float] = None) -> None:
+        """진행 중인 백그라운드 병합이 끝날 때까지 대기"""
+        thread = self._merge_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _tombstone(self, key: ChunkKey) -> None:
+        """이전 세그먼트의 청크를 가림 (순번으로 병합 이전/이후 툼스톤을 구분)"""
+        self._sequence += 1
+        self._tombstones[key] = self._sequence
+
+    def _maybe_merge(self) -> None:
+        """델타 + 툼스톤이 임계값을 넘으면 병합 (백그라운드 스레드는 하나만)"""
+        if self.merge_threshold <= 0:
+            return
+        with self._lock:
+            pending = len(self._active.documents) + len(self._tombstones)
+            if pending < self.merge_threshold or self._frozen is not None:
+                return
+            if self._merge_thread is not None and self._merge_thread.is_alive():
+                return
+            if not self.background_merge:
+                thread = None
+            else:
+                thread = threading.Thread(target=self.merge, name="lsm-merge", daemon=True)
+                self._merge_thread = thread
+
+        if thread is None:
+            self.merge()
+        else:
+            thread.start()
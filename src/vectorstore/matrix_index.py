@@ -0,0 +1,405 @@
+"""
+행렬 기반 정확(exact) 검색 엔진
+모든 임베딩을 하나의 연속된 float32 행렬에 L2 정규화된 상태로 보관
+"""
+
+import logging
+import numpy as np
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    행 단위 L2 정규화
+
+    Args:
+        matrix: (n, d) 행렬
+
+    Returns:
+        (정규화된 float32 행렬, 유효 행 마스크) - 노름이 0이거나 NaN/Inf인 행은 무효
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1)
+    valid = np.isfinite(norms) & (norms > 0)
+    safe_norms = np.where(valid, norms, 1.0).astype(np.float32)
+    return matrix / safe_norms[:, None], valid
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    점수 벡터에서 상위 k개 인덱스를 내림차순으로 반환 (argpartition + 부분 정렬)
+
+    Args:
+        scores: 1차원 점수 배열
+        k: 반환할 개수
+
+    Returns:
+        점수 내림차순 인덱스 배열
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    2차원 점수 행렬의 각 행에서 상위 k개 열 인덱스를 내림차순으로 반환
+
+    Args:
+        scores: (쿼리 수, 후보 수) 점수 행렬
+        k: 행별 반환 개수
+
+    Returns:
+        (쿼리 수, min(k, 후보 수)) 인덱스 행렬
+    """
+    n_queries, n = scores.shape
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((n_queries, 0), dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(n), (n_queries, 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def quantized_search(
+    quantizer,
+    codes: np.ndarray,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    oversample: int,
+    rows: Optional[np.ndarray] = None
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    양자화 코드로 쿼리별 상위 k * oversample개를 고른 뒤 float32 벡터로 재점수 계산
+
+    Args:
+        quantizer: 양자화기
+        codes: 전체 코드 행렬 (vectors와 같은 행 순서)
+        vectors: 전체 정규화 float32 행렬 (메모리 매핑 가능 - 후보 행만 읽음)
+        queries: (쿼리 수, d) 정규화된 쿼리 행렬
+        k: 쿼리별 반환 개수
+        oversample: 후보 배수
+        rows: 검색 대상 행 번호 (None이면 전체)
+
+    Returns:
+        쿼리별 (행 번호 배열, 정확한 유사도 배열) - 유사도 내림차순
+    """
+    candidate_codes = codes if rows is None else codes[rows]
+    top = top_k_rows(quantizer.score(candidate_codes, queries), k * oversample)
+    if rows is not None:
+        top = rows[top]
+
+    results = []
+    for q in range(queries.shape[0]):
+        # 메모리 매핑 행렬을 앞에서부터 읽도록 행 번호 정렬 후 재점수 계산
+        candidates = np.sort(top[q])
+        exact = np.asarray(vectors[candidates]) @ queries[q]
+        order = top_k_indices(exact, k)
+        results.append((candidates[order], exact[order]))
+    return results
+
+
+class MatrixIndex:
+    """
+    연속 float32 행렬 기반 코사인 유사도 검색 인덱스
+
+    - 삽입 시점에 정규화하므로 쿼리는 한 번의 행렬-벡터 곱으로 끝남
+    - 삭제는 마지막 행과 교체(swap-remove)하여 행렬을 연속 상태로 유지
+    - quantizer를 지정하면 양자화 코드로 먼저 스캔하고 상위 k * oversample개만 float32로 재점수 계산
+      (양자화기 학습/재학습은 삽입 시점에 수행하므로 검색 지연에 포함되지 않음)
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        initial_capacity: int = 1024,
+        quantizer=None,
+        oversample: int = 4
+    ):
+        """
+        Args:
+            dimension: 임베딩 차원 (None이면 첫 삽입 시 결정)
+            initial_capacity: 초기 행렬 용량 (행 수)
+            quantizer: 양자화기 (quantization.create_quantizer, None이면 float32 전체 스캔)
+            oversample: 양자화 스캔 후 재점수 계산할 후보 배수
+        """
+        self.dimension = dimension
+        self.quantizer = quantizer
+        self.oversample = max(1, oversample)
+        self._initial_capacity = max(1, initial_capacity)
+        self._matrix: Optional[np.ndarray] = None
+        # 행렬과 같은 행 순서의 양자화 코드 (삽입 시 학습/인코딩)
+        self._codes: Optional[np.ndarray] = None
+        self._codes_fit_size = 0
+        self._size = 0
+        self._keys: List[Hashable] = []
+        self._rows: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """현재 저장된 정규화 벡터 행렬 (복사 없는 view)"""
+        if self._matrix is None:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+        return self._matrix[:self._size]
+
+    @property
+    def keys(self) -> List[Hashable]:
+        """행 순서대로 정렬된 키 리스트"""
+        return self._keys
+
+    def row_of(self, key: Hashable) -> Optional[int]:
+        """키에 해당하는 행 번호 (없으면 None)"""
+        return self._rows.get(key)
+
+    def add(self, key: Hashable, embedding: Sequence[float]) -> bool:
+        """
+        단일 벡터 추가 (동일 키가 있으면 교체)
+
+        Returns:
+            인덱싱 여부 (영벡터/비정상 벡터는 인덱싱하지 않음)
+        """
+        return bool(self.add_batch([key], [embedding])[0])
+
+    def add_batch(self, keys: Sequence[Hashable], embeddings: Iterable[Sequence[float]]) -> np.ndarray:
+        """
+        여러 벡터를 한 번에 추가 (정규화와 용량 확장을 일괄 처리)
+
+        Args:
+            keys: 각 벡터의 키
+            embeddings: 임베딩 벡터들
+
+        Returns:
+            각 입력이 인덱싱되었는지 나타내는 bool 배열
+
+        Raises:
+            ValueError: 임베딩 차원이 인덱스 차원과 다르거나 양자화기와 맞지 않는 경우
+        """
+        keys = list(keys)
+        if not keys:
+            return np.zeros(0, dtype=bool)
+
+        matrix = np.asarray(list(embeddings), dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(keys):
+            raise ValueError("Embeddings must form a 2-D matrix with one row per key")
+
+        dimension = self.dimension or matrix.shape[1]
+        if matrix.shape[1] != dimension:
+            raise ValueError(
+                f"Embedding dimension mismatch: expected {dimension}, got {matrix.shape[1]}"
+            )
+        if self.quantizer is not None and self.dimension is None:
+            self.quantizer.bind_dimension(dimension)
+        self.dimension = dimension
+
+        normalized, valid = normalize_rows(matrix)
+
+        # 같은 배치 안의 중복 키는 마지막 값만 유지
+        last_position = {key: i for i, key in enumerate(keys)}
+        for i, key in enumerate(keys):
+            if key in self._rows:
+                self.remove(key)
+            if last_position[key] != i:
+                valid[i] = False
+
+        new_rows = np.flatnonzero(valid)
+        self._reserve(self._size + len(new_rows))
+        start = self._size
+        self._matrix[start:start + len(new_rows)] = normalized[new_rows]
+        if self._codes is not None and len(new_rows):
+            self._codes[start:start + len(new_rows)] = self.quantizer.encode(normalized[new_rows])
+        for offset, i in enumerate(new_rows):
+            self._keys.append(keys[i])
+            self._rows[keys[i]] = start + offset
+        self._size += len(new_rows)
+        if self.quantizer is not None and self._size and self._size >= 2 * self._codes_fit_size:
+            self._train_quantizer()
+        return valid
+
+    def remove(self, key: Hashable) -> bool:
+        """
+        벡터 삭제 (마지막 행을 빈 자리로 이동)
+
+        Returns:
+            삭제 여부
+        """
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+
+        last = self._size - 1
+        if row != last:
+            moved_key = self._keys[last]
+            self._matrix[row] = self._matrix[last]
+            if self._codes is not None:
+                self._codes[row] = self._codes[last]
+            self._keys[row] = moved_key
+            self._rows[moved_key] = row
+        self._keys.pop()
+        self._size -= 1
+        return True
+
+    def clear(self) -> None:
+        """모든 벡터 삭제"""
+        self._matrix = None
+        self._codes = None
+        self._codes_fit_size = 0
+        self._size = 0
+        self._keys = []
+        self._rows = {}
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        k: int,
+        rows: Optional[Sequence[int]] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        코사인 유사도 상위 k개 검색
+
+        Args:
+            query_embedding: 쿼리 벡터 (정규화 불필요)
+            k: 반환할 개수
+            rows: 검색 대상 행 번호 (None이면 전체)
+
+        Returns:
+            (키, 유사도) 튜플 리스트 (유사도 내림차순)
+        """
+        if self._size == 0:
+            return []
+
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vec)
+        if not np.isfinite(query_norm) or query_norm == 0:
+            return []
+        query_vec = query_vec / query_norm
+
+        if self._use_quantized(k, rows):
+            [(hit_rows, scores)] = quantized_search(
+                self.quantizer, self._quantized_codes(), self._matrix, query_vec[None, :], k, self.oversample,
+                rows=None if rows is None else np.asarray(rows, dtype=np.int64)
+            )
+            return [(self._keys[row], float(score)) for row, score in zip(hit_rows, scores)]
+
+        if rows is None:
+            scores = self.vectors @ query_vec
+            order = top_k_indices(scores, k)
+            return [(self._keys[i], float(scores[i])) for i in order]
+
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return []
+        scores = self._matrix[rows] @ query_vec
+        order = top_k_indices(scores, k)
+        return [(self._keys[rows[i]], float(scores[i])) for i in order]
+
+    def search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        k: int,
+        rows: Optional[Sequence[int]] = None
+    ) -> List[List[Tuple[Hashable, float]]]:
+        """
+        여러 쿼리를 한 번의 행렬 곱(GEMM)으로 검색
+
+        Args:
+            query_embeddings: (쿼리 수, d) 쿼리 행렬
+            k: 쿼리별 반환 개수
+            rows: 검색 대상 행 번호 (None이면 전체)
+
+        Returns:
+            쿼리별 (키, 유사도) 리스트 (영벡터 쿼리는 빈 리스트)
+        """
+        queries, valid = normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        if self._size == 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        if rows is None:
+            row_ids = np.arange(self._size)
+            candidates = self.vectors
+        else:
+            row_ids = np.asarray(rows, dtype=np.int64)
+            candidates = self._matrix[row_ids]
+        if row_ids.size == 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        if self._use_quantized(k, rows):
+            hits = quantized_search(
+                self.quantizer, self._quantized_codes(), self._matrix, queries, k, self.oversample,
+                rows=None if rows is None else row_ids
+            )
+            return [
+                [(self._keys[row], float(score)) for row, score in zip(*hits[q])] if valid[q] else []
+                for q in range(queries.shape[0])
+            ]
+
+        scores = queries @ candidates.T
+        top = top_k_rows(scores, k)
+        results = []
+        for q in range(queries.shape[0]):
+            if not valid[q]:
+                results.append([])
+                continue
+            results.append([(self._keys[row_ids[i]], float(scores[q, i])) for i in top[q]])
+        return results
+
+    def _use_quantized(self, k: int, rows: Optional[Sequence[int]]) -> bool:
+        """후보가 재점수 계산 대상 수보다 많을 때만 양자화 스캔"""
+        if self._codes is None:
+            return False
+        n_candidates = self._size if rows is None else len(rows)
+        return n_candidates > k * self.oversample
+
+    def _quantized_codes(self) -> np.ndarray:
+        """현재 행의 양자화 코드"""
+        return self._codes[:self._size]
+
+    def _train_quantizer(self) -> None:
+        """
+        양자화기 학습 후 전체 행 인코딩
+
+        add_batch에서 행 수가 마지막 학습 시점의 두 배 이상이 되면 호출
+        (재학습 비용이 삽입 전체에 분할 상환되고, 검색은 학습된 코드만 사용)
+        """
+        self.quantizer.fit(self.vectors)
+        self._codes = np.empty(
+            (self._matrix.shape[0], self.quantizer.code_size(self.dimension)), dtype=np.uint8
+        )
+        self._codes[:self._size] = self.quantizer.encode(self.vectors)
+        self._codes_fit_size = self._size
+
+    def _reserve(self, capacity: int) -> None:
+        """필요 시 행렬 용량을 두 배씩 확장"""
+        if self._matrix is not None and self._matrix.shape[0] >= capacity:
+            return
+
+        new_capacity = max(self._initial_capacity, capacity)
+        if self._matrix is not None:
+            new_capacity = max(new_capacity, self._matrix.shape[0] * 2)
+
+        grown = np.empty((new_capacity, self.dimension), dtype=np.float32)
+        if self._matrix is not None:
+            grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+        if self._codes is not None:
+            grown_codes = np.empty((new_capacity, self._codes.shape[1]), dtype=np.uint8)
+            grown_codes[:self._size] = self._codes[:self._size]
+            self._codes = grown_codes
@@ -0,0 +1,90 @@
+"""
+메타데이터 역색인
+필드별 값 → 청크 키 집합을 유지하여 filter_metadata를 집합 교집합으로 평가
+"""
+
+import logging
+from typing import Any, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def _is_hashable(value: Any) -> bool:
+    """역색인 키로 사용할 수 있는 값인지 확인"""
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+
+class MetadataIndex:
+    """
+    필드별 메타데이터 역색인
+
+    - add/remove로 문서 쓰기와 동기화
+    - 리스트/딕셔너리처럼 해시 불가능한 값은 색인하지 않음
+      (그런 값으로 필터링하면 candidates가 None을 반환하여 호출 측이 전체 평가로 대체)
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Hashable, Set[Hashable]]] = {}
+
+    def add(self, key: Hashable, metadata: Dict) -> None:
+        """청크 메타데이터 색인"""
+        for field, value in (metadata or {}).items():
+            if not _is_hashable(value):
+                continue
+            self._postings.setdefault(field, {}).setdefault(value, set()).add(key)
+
+    def remove(self, key: Hashable, metadata: Dict) -> None:
+        """청크 메타데이터 색인 제거"""
+        for field, value in (metadata or {}).items():
+            if not _is_hashable(value):
+                continue
+            values = self._postings.get(field)
+            if values is None:
+                continue
+            keys = values.get(value)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del values[value]
+                if not values:
+                    del self._postings[field]
+
+    def candidates(self, filter_metadata: Dict) -> Optional[Set[Hashable]]:
+        """
+        모든 필터 조건을 만족하는 청크 키 집합
+
+        Args:
+            filter_metadata: 필드 → 값 동등 조건
+
+        Returns:
+            키 집합 (색인으로 평가할 수 없는 필터면 None)
+        """
+        postings = []
+        for field, value in filter_metadata.items():
+            if not _is_hashable(value):
+                return None
+            keys = self._postings.get(field, {}).get(value)
+            if not keys:
+                return set()
+            postings.append(keys)
+
+        if not postings:
+            return None
+
+        # 가장 작은 집합부터 교집합
+        postings.sort(key=len)
+        result = set(postings[0])
+        for keys in postings[1:]:
+            result &= keys
+            if not result:
+                break
+        return result
+
+    def clear(self) -> None:
+        """색인 초기화"""
+        self._postings = {}
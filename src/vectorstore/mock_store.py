@@ -5,8 +5,11 @@ Mock 벡터 스토어 구현
 
 import logging
 import numpy as np
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
 from .base import VectorStore, VectorDocument
+from .matrix_index import MatrixIndex
+from .metadata_index import MetadataIndex
+from .quantization import create_quantizer
 
 logger = logging.getLogger(__name__)
 
@@ -14,17 +17,42 @@ logger = logging.getLogger(__name__)
 class MockVectorStore(VectorStore):
     """인메모리 Mock 벡터 스토어 (로컬 개발용)"""
     
-    def __init__(self):
-        """Mock 스토어 초기화"""
-        self.documents: Dict[str, VectorDocument] = {}
+    def __init__(self, quantization: Optional[str] = None, oversample: int = 4, pq_subvectors: Optional[int] = None):
+        """
+        Mock 스토어 초기화
+        
+        Args:
+            quantization: 양자화 방식 (None/"none", "int8", "binary", "pq")
+            oversample: 양자화 스캔 후 float32로 재점수 계산할 후보 배수 (k * oversample)
+            pq_subvectors: pq 코드 바이트 수 (임베딩 차원의 약수, None이면 첫 삽입 시 차원에서 결정)
+        """
+        # (document_id, chunk_id) 튜플 키 - 문자열 결합 키는 ID 접두사가 겹치면 충돌함
+        self.documents: Dict[Tuple[str, str], VectorDocument] = {}
+        # document_id → 청크 ID (삽입 순서 유지), 조회/삭제가 문서의 청크 수에만 비례
+        self._doc_chunks: Dict[str, Dict[str, None]] = {}
+        # 임베딩은 정규화된 float32 행렬로 별도 보관 (쿼리 = 행렬-벡터 곱 1회)
+        self._index = MatrixIndex(quantizer=create_quantizer(quantization, pq_subvectors), oversample=oversample)
+        # 메타데이터 필드별 역색인 (필터 검색 시 점수 계산 대상 행을 먼저 좁힘)
+        self._metadata_index = MetadataIndex()
+        self._writes = 0
         logger.info("MockVectorStore initialized (in-memory)")
     
     def add_documents(self, documents: List[VectorDocument]) -> bool:
         """문서 추가"""
         try:
-            for doc in documents:
-                key = f"{doc.document_id}_{doc.chunk_id}"
+            self._writes += 1
+            keys = [(doc.document_id, doc.chunk_id) for doc in documents]
+            indexed = self._index.add_batch(keys, [doc.embedding for doc in documents])
+            
+            for key, doc, ok in zip(keys, documents, indexed):
+                previous = self.documents.get(key)
+                if previous is not None:
+                    self._metadata_index.remove(key, previous.metadata)
                 self.documents[key] = doc
+                self._doc_chunks.setdefault(doc.document_id, {})[doc.chunk_id] = None
+                self._metadata_index.add(key, doc.metadata)
+                if not ok:
+                    logger.warning(f"Document {doc.document_id}_{doc.chunk_id} has zero or invalid embedding, not indexed")
             
             logger.info(f"Added {len(documents)} documents to MockVectorStore")
             return True
@@ -39,12 +67,21 @@ class MockVectorStore(VectorStore):
         filter_metadata: Optional[Dict] = None
     ) -> List[VectorDocument]:
         """유사도 검색"""
+        return [doc for doc, _ in self.similarity_search_with_scores(query_embedding, k, filter_metadata)]
+    
+    def similarity_search_with_scores(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[Tuple[VectorDocument, float]]:
+        """유사도 검색 (코사인 유사도 포함, 샤드 결과 병합 등에 사용)"""
         try:
             if not self.documents:
                 logger.warning("Vector store is empty")
                 return []
             
-            query_vec = np.array(query_embedding)
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
             
             # 쿼리 벡터 정규화 확인
             query_norm = np.linalg.norm(query_vec)
@@ -52,47 +89,109 @@ class MockVectorStore(VectorStore):
                 logger.warning("Query embedding is zero vector")
                 return []
             
-            similarities = []
+            # 메타데이터 필터링: 역색인 교집합으로 통과한 행만 점수 계산
+            rows = self._filter_rows(filter_metadata)
             
-            for key, doc in self.documents.items():
-                # 메타데이터 필터링
-                if filter_metadata:
-                    if not self._matches_filter(doc.metadata, filter_metadata):
-                        continue
-                
-                # 코사인 유사도 계산
-                doc_vec = np.array(doc.embedding)
-                doc_norm = np.linalg.norm(doc_vec)
-                
-                if doc_norm == 0:
-                    logger.warning(f"Document {key} has zero embedding, skipping")
-                    continue
-                
-                similarity = np.dot(query_vec, doc_vec) / (query_norm * doc_norm)
-                
-                # NaN 체크
-                if np.isnan(similarity) or np.isinf(similarity):
-                    logger.warning(f"Invalid similarity for document {key}: {similarity}")
-                    continue
-                
-                similarities.append((similarity, doc))
-            
-            if not similarities:
+            num_candidates = len(self._index) if rows is None else len(rows)
+            if num_candidates == 0:
                 logger.warning("No documents matched the search criteria")
                 return []
             
-            # 유사도 순으로 정렬
-            similarities.sort(key=lambda x: x[0], reverse=True)
+            # 정규화 행렬 x 쿼리 벡터 → argpartition 상위 k개
+            hits = self._index.search(query_vec, k, rows=rows)
+            results = [(self.documents[key], score) for key, score in hits]
             
-            # 상위 k개 반환
-            results = [doc for _, doc in similarities[:k]]
-            
-            logger.info(f"Found {len(results)} similar documents (from {len(similarities)} candidates)")
+            logger.info(f"Found {len(results)} similar documents (from {num_candidates} candidates)")
             return results
         except Exception as e:
             logger.error(f"Similarity search failed: {e}", exc_info=True)
             return []
     
+    def similarity_search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[List[VectorDocument]]:
+        """여러 쿼리 유사도 검색 (쿼리 행렬 x 임베딩 행렬 GEMM 1회 + 행별 top-k)"""
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.similarity_search_batch_with_scores(query_embeddings, k, filter_metadata)
+        ]
+    
+    def similarity_search_batch_with_scores(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[List[Tuple[VectorDocument, float]]]:
+        """여러 쿼리 유사도 검색 (코사인 유사도 포함)"""
+        try:
+            if len(query_embeddings) == 0:
+                return []
+            rows = self._filter_rows(filter_metadata)
+            hits = self._index.search_batch(query_embeddings, k, rows=rows)
+            results = [[(self.documents[key], score) for key, score in query_hits] for query_hits in hits]
+            
+            logger.info(f"Batch search: {len(results)} queries")
+            return results
+        except Exception as e:
+            logger.error(f"Batch similarity search failed: {e}", exc_info=True)
+            return [[] for _ in range(len(query_embeddings))]
+    
+    def similarity_search_candidates(
+        self,
+        query_embedding: List[float],
+        candidate_ids: Sequence[Tuple[str, str]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[VectorDocument]:
+        """후보 청크 행만 점수 계산"""
+        return [
+            doc for doc, _ in self.similarity_search_candidates_with_scores(query_embedding, candidate_ids, k, filter_metadata)
+        ]
+    
+    def similarity_search_candidates_with_scores(
+        self,
+        query_embedding: List[float],
+        candidate_ids: Sequence[Tuple[str, str]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[Tuple[VectorDocument, float]]:
+        """후보 청크 행만 점수 계산 (코사인 유사도 포함, 샤드 결과 병합 등에 사용)"""
+        try:
+            rows = []
+            for key in dict.fromkeys(tuple(key) for key in candidate_ids):
+                row = self._index.row_of(key)
+                if row is None:
+                    continue
+                if filter_metadata and not self._matches_filter(self.documents[key].metadata, filter_metadata):
+                    continue
+                rows.append(row)
+            if not rows:
+                return []
+            
+            hits = self._index.search(query_embedding, k, rows=rows)
+            logger.info(f"Found {len(hits)} similar documents (from {len(rows)} candidates)")
+            return [(self.documents[key], score) for key, score in hits]
+        except Exception as e:
+            logger.error(f"Candidate search failed: {e}", exc_info=True)
+            return []
+    
+    def _filter_rows(self, filter_metadata: Optional[Dict]) -> Optional[List[int]]:
+        """필터를 통과한 행 번호 (필터가 없으면 None = 전체)"""
+        if not filter_metadata:
+            return None
+        
+        candidate_keys = self._metadata_index.candidates(filter_metadata)
+        if candidate_keys is None:
+            # 색인할 수 없는 값(리스트 등)으로 필터링하는 경우 전체 평가
+            candidate_keys = [
+                key for key, doc in self.documents.items()
+                if self._matches_filter(doc.metadata, filter_metadata)
+            ]
+        return [self._index.row_of(key) for key in candidate_keys if key in self._index]
+    
     def _matches_filter(self, metadata: Dict, filter_metadata: Dict) -> bool:
         """메타데이터 필터 매칭 확인"""
         for key, value in filter_metadata.items():
@@ -103,15 +202,16 @@ class MockVectorStore(VectorStore):
     def delete_document(self, document_id: str) -> bool:
         """문서 삭제"""
         try:
-            keys_to_delete = [
-                key for key in self.documents.keys()
-                if key.startswith(f"{document_id}_")
-            ]
+            self._writes += 1
+            chunk_ids = list(self._doc_chunks.pop(document_id, {}))
             
-            for key in keys_to_delete:
-                del self.documents[key]
+            for chunk_id in chunk_ids:
+                key = (document_id, chunk_id)
+                doc = self.documents.pop(key)
+                self._index.remove(key)
+                self._metadata_index.remove(key, doc.metadata)
             
-            logger.info(f"Deleted document: {document_id} ({len(keys_to_delete)} chunks)")
+            logger.info(f"Deleted document: {document_id} ({len(chunk_ids)} chunks)")
             return True
         except Exception as e:
             logger.error(f"Failed to delete document: {e}")
@@ -120,9 +220,8 @@ class MockVectorStore(VectorStore):
     def get_document(self, document_id: str) -> Optional[VectorDocument]:
         """문서 조회"""
         # 첫 번째 청크만 반환
-        for key, doc in self.documents.items():
-            if doc.document_id == document_id:
-                return doc
+        for chunk_id in self._doc_chunks.get(document_id, {}):
+            return self.documents[(document_id, chunk_id)]
         return None
     
     def get_all_documents(self) -> List[VectorDocument]:
@@ -0,0 +1,351 @@
+"""
+벡터 양자화
+int8 스칼라 양자화(차원별 scale/offset), 1비트 부호 양자화(해밍 거리),
+곱 양자화(PQ, 부분 공간별 코드북 + ADC 룩업 테이블)로 1차 후보를 고르고,
+상위 k * oversample개만 float32로 재점수 계산 (matrix_index.quantized_search)
+"""
+
+import logging
+import numpy as np
+from typing import Optional
+
+from .kmeans import assign_clusters, kmeans
+from .matrix_index import normalize_rows, quantized_search, top_k_rows
+
+logger = logging.getLogger(__name__)
+
+# 바이트별 1비트 개수 (해밍 거리 popcount 테이블)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+# 블록 단위로 점수 계산하여 임시 float32 복사본 크기를 제한
+_SCORE_BLOCK_ROWS = 8192
+
+# pq_subvectors를 지정하지 않으면 이 값 이하의 차원 약수 중 가장 큰 값 사용
+# (384/768/1536차원 → 48, 1024차원 → 32)
+DEFAULT_PQ_SUBVECTORS = 48
+
+
+def default_pq_subvectors(dimension: int, max_subvectors: int = DEFAULT_PQ_SUBVECTORS) -> int:
+    """차원의 약수 중 max_subvectors 이하인 가장 큰 부분 벡터 수"""
+    return max(n for n in range(1, min(dimension, max_subvectors) + 1) if dimension % n == 0)
+
+
+class ScalarQuantizer:
+    """
+    int8 스칼라 양자화 (float32 대비 4배 축소)
+
+    차원별 [min, max] 범위를 256단계로 나누어 uint8 코드로 저장하고,
+    쿼리는 float32 그대로 코드와 내적(비대칭 거리)
+    """
+
+    kind = "int8"
+
+    def __init__(self):
+        self.scale: Optional[np.ndarray] = None
+        self.offset: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.scale is not None
+
+    def bind_dimension(self, dimension: int) -> None:
+        """차원 확정 (차원 제약 없음)"""
+
+    def code_size(self, dimension: int) -> int:
+        """벡터당 코드 바이트 수"""
+        return dimension
+
+    def fit(self, vectors: np.ndarray) -> "ScalarQuantizer":
+        """차원별 범위 학습"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        low = vectors.min(axis=0)
+        high = vectors.max(axis=0)
+        self.offset = low
+        self.scale = np.where(high > low, (high - low) / 255.0, 1.0).astype(np.float32)
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, d) float32 → (n, d) uint8 (학습 범위를 벗어난 값은 잘림)"""
+        codes = np.rint((np.asarray(vectors, dtype=np.float32) - self.offset) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """uint8 코드 → 근사 float32 벡터"""
+        return codes.astype(np.float32) * self.scale + self.offset
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """
+        근사 내적 점수
+
+        q · x ≈ codes @ (q * scale) + q · offset
+
+        Returns:
+            (쿼리 수, 코드 수) 점수 행렬
+        """
+        queries = np.atleast_2d(queries)
+        scaled = (queries * self.scale).T
+        bias = queries @ self.offset
+        scores = np.empty((queries.shape[0], codes.shape[0]), dtype=np.float32)
+        for start in range(0, codes.shape[0], _SCORE_BLOCK_ROWS):
+            block = codes[start:start + _SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + block.shape[0]] = (block @ scaled).T
+        return scores + bias[:, None]
+
+
+class BinaryQuantizer:
+    """
+    1비트 부호 양자화 (float32 대비 32배 축소)
+
+    각 차원의 부호만 비트로 묶어 저장하고, 해밍 거리로 점수 계산
+    (정규화 벡터에서 d - 2 * hamming은 각도 유사도의 근사)
+    """
+
+    kind = "binary"
+
+    @property
+    def is_trained(self) -> bool:
+        return True
+
+    def bind_dimension(self, dimension: int) -> None:
+        """차원 확정 (차원 제약 없음)"""
+
+    def code_size(self, dimension: int) -> int:
+        """벡터당 코드 바이트 수"""
+        return (dimension + 7) // 8
+
+    def fit(self, vectors: np.ndarray) -> "BinaryQuantizer":
+        """학습 불필요 (인터페이스 호환용)"""
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, d) float32 → (n, ceil(d/8)) uint8 비트 패킹"""
+        return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """
+        해밍 거리 기반 점수 (높을수록 유사)
+
+        Returns:
+            (쿼리 수, 코드 수) 점수 행렬
+        """
+        query_codes = self.encode(np.atleast_2d(queries))
+        n_bits = codes.shape[1] * 8
+        scores = np.empty((query_codes.shape[0], codes.shape[0]), dtype=np.float32)
+        for q, query_code in enumerate(query_codes):
+            hamming = _POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1)
+            scores[q] = n_bits - 2.0 * hamming
+        return scores
+
+
+class ProductQuantizer:
+    """
+    곱 양자화 (PQ)
+
+    d차원 벡터를 n_subvectors개의 부분 벡터로 나누고, 부분 공간마다 k-means로 학습한
+    최대 256개 centroid 코드북의 번호(1바이트)만 저장
+    (384차원 float32 1,536바이트 → n_subvectors=48이면 48바이트,
+    n_subvectors를 지정하지 않으면 첫 학습/삽입 시 차원에 맞춰 default_pq_subvectors로 결정)
+
+    검색은 쿼리 부분 벡터와 각 코드북 centroid의 내적 룩업 테이블을 먼저 만들고,
+    코드별로 테이블 값을 더하는 비대칭 거리 계산(ADC)
+    """
+
+    kind = "pq"
+
+    def __init__(
+        self,
+        n_subvectors: Optional[int] = None,
+        n_centroids: int = 256,
+        n_iter: int = 20,
+        max_train_size: int = 20000,
+        seed: Optional[int] = 0
+    ):
+        """
+        Args:
+            n_subvectors: 부분 벡터 수 = 코드 바이트 수 (차원의 약수여야 함, None이면 차원에서 결정)
+            n_centroids: 부분 공간별 centroid 수 (최대 256)
+            n_iter: k-means 반복 횟수
+            max_train_size: 학습에 사용할 최대 벡터 수 (초과 시 무작위 샘플)
+            seed: 샘플링/k-means 난수 시드
+        """
+        if not 1 <= n_centroids <= 256:
+            raise ValueError("n_centroids must be between 1 and 256")
+        self.n_subvectors = n_subvectors
+        self.n_centroids = n_centroids
+        self.n_iter = n_iter
+        self.max_train_size = max_train_size
+        self.seed = seed
+        # (n_subvectors, 부분 공간 centroid 수, 부분 차원)
+        self.codebooks: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_codebooks(cls, codebooks: np.ndarray) -> "ProductQuantizer":
+        """저장된 코드북으로 학습된 양자화기 복원"""
+        codebooks = np.asarray(codebooks, dtype=np.float32)
+        quantizer = cls(n_subvectors=codebooks.shape[0], n_centroids=codebooks.shape[1])
+        quantizer.codebooks = codebooks
+        return quantizer
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """학습된 벡터 차원"""
+        if self.codebooks is None:
+            return None
+        return self.codebooks.shape[0] * self.codebooks.shape[2]
+
+    def bind_dimension(self, dimension: int) -> None:
+        """
+        차원 확정 (n_subvectors가 없으면 차원에서 결정)
+
+        Raises:
+            ValueError: 차원이 n_subvectors로 나누어떨어지지 않는 경우
+        """
+        if self.n_subvectors is None:
+            self.n_subvectors = default_pq_subvectors(dimension)
+        elif dimension % self.n_subvectors != 0:
+            raise ValueError(
+                f"Embedding dimension {dimension} is not divisible by pq_subvectors={self.n_subvectors} "
+                f"(e.g. use {default_pq_subvectors(dimension, self.n_subvectors)} or leave pq_subvectors unset)"
+            )
+
+    def code_size(self, dimension: int) -> int:
+        """벡터당 코드 바이트 수"""
+        self.bind_dimension(dimension)
+        return self.n_subvectors
+
+    def fit(self, vectors: np.ndarray) -> "ProductQuantizer":
+        """
+        부분 공간별 코드북 학습
+
+        Raises:
+            ValueError: 차원이 n_subvectors로 나누어떨어지지 않는 경우
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n, dimension = vectors.shape
+        self.bind_dimension(dimension)
+        if n > self.max_train_size:
+            rng = np.random.default_rng(self.seed)
+            vectors = vectors[np.sort(rng.choice(n, size=self.max_train_size, replace=False))]
+
+        sub_dimension = dimension // self.n_subvectors
+        subvectors = vectors.reshape(vectors.shape[0], self.n_subvectors, sub_dimension)
+        self.codebooks = np.stack([
+            kmeans(subvectors[:, j], self.n_centroids, n_iter=self.n_iter, seed=self.seed)
+            for j in range(self.n_subvectors)
+        ])
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, d) float32 → (n, n_subvectors) uint8 (부분 공간별 최근접 centroid 번호)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        subvectors = vectors.reshape(vectors.shape[0], self.n_subvectors, -1)
+        codes = np.empty((vectors.shape[0], self.n_subvectors), dtype=np.uint8)
+        for j in range(self.n_subvectors):
+            codes[:, j] = assign_clusters(subvectors[:, j], self.codebooks[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """코드 → 근사 float32 벡터 (centroid 연결)"""
+        codes = np.atleast_2d(codes)
+        return np.concatenate(
+            [self.codebooks[j][codes[:, j]] for j in range(self.n_subvectors)], axis=1
+        )
+
+    def lookup_tables(self, queries: np.ndarray) -> np.ndarray:
+        """
+        ADC 룩업 테이블
+
+        Returns:
+            (쿼리 수, n_subvectors, centroid 수) 부분 내적 테이블
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        subqueries = queries.reshape(queries.shape[0], self.n_subvectors, -1)
+        return np.einsum("qjd,jcd->qjc", subqueries, self.codebooks)
+
+    def score(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """
+        ADC 근사 내적 점수 (코드당 테이블 조회 n_subvectors회)
+
+        Returns:
+            (쿼리 수, 코드 수) 점수 행렬
+        """
+        tables = self.lookup_tables(queries)
+        scores = np.zeros((tables.shape[0], codes.shape[0]), dtype=np.float32)
+        for j in range(self.n_subvectors):
+            scores += tables[:, j, codes[:, j]]
+        return scores
+
+
+def create_quantizer(kind: Optional[str], pq_subvectors: Optional[int] = None):
+    """
+    설정 문자열로 양자화기 생성
+
+    Args:
+        kind: None/"none", "int8", "binary", "pq"
+        pq_subvectors: pq 코드 바이트 수 (차원의 약수, None이면 첫 삽입 시 차원에서 결정)
+
+    Returns:
+        양자화기 또는 None
+
+    Raises:
+        ValueError: 알 수 없는 종류인 경우
+    """
+    if kind is None or kind == "none":
+        return None
+    if kind == "int8":
+        return ScalarQuantizer()
+    if kind == "binary":
+        return BinaryQuantizer()
+    if kind == "pq":
+        return ProductQuantizer(n_subvectors=pq_subvectors)
+    raise ValueError(f"Unknown quantization: {kind}")
+
+
+def encode_in_blocks(quantizer, vectors: np.ndarray) -> np.ndarray:
+    """
+    큰 행렬(메모리 매핑 포함)을 블록 단위로 인코딩하여 float32 임시 복사본 크기를 제한
+
+    Returns:
+        (n, code_size) uint8 코드 행렬
+    """
+    n, dimension = vectors.shape
+    codes = np.empty((n, quantizer.code_size(dimension)), dtype=np.uint8)
+    for start in range(0, n, _SCORE_BLOCK_ROWS):
+        codes[start:start + _SCORE_BLOCK_ROWS] = quantizer.encode(vectors[start:start + _SCORE_BLOCK_ROWS])
+    return codes
+
+
+def measure_recall(
+    quantizer,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    oversample: int = 1
+) -> float:
+    """
+    정확(float32) 검색 대비 양자화 검색의 recall@k
+
+    Args:
+        quantizer: 양자화기 (학습 전이면 vectors로 학습)
+        vectors: (n, d) 저장 벡터
+        queries: (쿼리 수, d) 쿼리
+        k: 비교할 상위 개수
+        oversample: 재점수 계산 후보 배수 (1이면 양자화 점수만으로 순위 결정)
+
+    Returns:
+        정확 검색 top-k 중 양자화 검색이 찾은 비율 (0~1)
+    """
+    vectors, _ = normalize_rows(vectors)
+    queries, _ = normalize_rows(np.atleast_2d(queries))
+    if not quantizer.is_trained:
+        quantizer.fit(vectors)
+    codes = encode_in_blocks(quantizer, vectors)
+
+    exact = top_k_rows(queries @ vectors.T, k)
+    approx = quantized_search(quantizer, codes, vectors, queries, k, oversample)
+    found = sum(len(set(exact[q]) & set(rows.tolist())) for q, (rows, _) in enumerate(approx))
+    return found / exact.size if exact.size else 1.0
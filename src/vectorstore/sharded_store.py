@@ -0,0 +1,327 @@
+"""
+샤드 분산 벡터 스토어
+document_id 해시로 청크를 N개의 워커 프로세스에 분할하고, 쿼리는 모든 샤드에 동시에 보낸 뒤
+샤드별 top-k를 병합(scatter-gather)
+"""
+
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .base import VectorStore, VectorDocument
+from .mock_store import MockVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+def _shard_worker(conn, store_kwargs: Dict[str, Any]) -> None:
+    """
+    샤드 워커 프로세스 루프 (각 샤드는 자체 MockVectorStore 행렬을 보유)
+
+    요청: (요청 ID, 명령, 인자 튜플) / 응답: (요청 ID, "ok", 결과) 또는 (요청 ID, "error", 메시지)
+    """
+    store = MockVectorStore(**store_kwargs)
+    commands = {
+        "add": store.add_documents,
+        "search": store.similarity_search_with_scores,
+        "search_batch": store.similarity_search_batch_with_scores,
+        "search_candidates": store.similarity_search_candidates_with_scores,
+        "delete": store.delete_document,
+        "get": store.get_document,
+        "all": store.get_all_documents,
+        "len": lambda: len(store.documents),
+    }
+    while True:
+        try:
+            request_id, command, args = conn.recv()
+        except EOFError:
+            break
+        if command == "close":
+            conn.send((request_id, "ok", None))
+            break
+        try:
+            conn.send((request_id, "ok", commands[command](*args)))
+        except Exception as e:
+            conn.send((request_id, "error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+class ShardedVectorStore(VectorStore):
+    """
+    프로세스 샤드 벡터 스토어
+
+    - 같은 문서의 청크는 항상 같은 샤드 (crc32(document_id) % n_shards) → 조회/삭제는 샤드 1곳
+    - 검색은 모든 샤드에 요청을 먼저 보낸 뒤 응답을 모으므로 샤드들이 병렬로 점수 계산
+    - 요청마다 ID를 붙이고 샤드별 수신 스레드가 응답을 ID로 돌려주므로,
+      여러 스레드의 쿼리가 scatter/gather 전체를 직렬화하지 않고 겹쳐서 진행
+    - 샤드별 (문서, 유사도) top-k를 힙으로 병합
+    """
+
+    def __init__(
+        self,
+        n_shards: Optional[int] = None,
+        mp_context: Optional[str] = None,
+        quantization: Optional[str] = None,
+        oversample: int = 4,
+        pq_subvectors: Optional[int] = None
+    ):
+        """
+        Args:
+            n_shards: 샤드(워커 프로세스) 수 (기본값: CPU 코어 수)
+            mp_context: multiprocessing 시작 방식 (fork, spawn, forkserver / None이면 플랫폼 기본값)
+            quantization: 샤드 행렬 양자화 방식 (None/"none", "int8", "binary", "pq")
+            oversample: 양자화 스캔 후 재점수 계산할 후보 배수
+            pq_subvectors: pq 코드 바이트 수 (None이면 첫 삽입 시 차원에서 결정)
+        """
+        self.n_shards = n_shards or os.cpu_count() or 1
+        if self.n_shards < 1:
+            raise ValueError("n_shards must be at least 1")
+
+        store_kwargs = {"quantization": quantization, "oversample": oversample, "pq_subvectors": pq_subvectors}
+        context = multiprocessing.get_context(mp_context)
+        self._lock = threading.Lock()
+        # 파이프 송신은 샤드별 잠금으로만 보호 (응답은 수신 스레드가 요청 ID로 전달)
+        self._send_locks = [threading.Lock() for _ in range(self.n_shards)]
+        self._pending: Dict[Tuple[int, int], Future] = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._conns = []
+        self._processes = []
+        self._readers = []
+        for shard in range(self.n_shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker, args=(child_conn, store_kwargs), name=f"vector-shard-{shard}", daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+        for shard in range(self.n_shards):
+            reader = threading.Thread(
+                target=self._read_responses, args=(shard,), name=f"vector-shard-{shard}-reader", daemon=True
+            )
+            reader.start()
+            self._readers.append(reader)
+        self._closed = False
+        self._writes = 0
+        logger.info(f"ShardedVectorStore initialized: {self.n_shards} shards")
+
+    def __enter__(self) -> "ShardedVectorStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return sum(self._scatter({shard: ("len", ()) for shard in range(self.n_shards)}).values())
+
+    def shard_of(self, document_id: str) -> int:
+        """문서가 배치되는 샤드 번호"""
+        return zlib.crc32(document_id.encode("utf-8")) % self.n_shards
+
+    def shard_sizes(self) -> List[int]:
+        """샤드별 청크 수"""
+        results = self._scatter({shard: ("len", ()) for shard in range(self.n_shards)})
+        return [results[shard] for shard in range(self.n_shards)]
+
+    def add_documents(self, documents: List[VectorDocument]) -> bool:
+        """문서 추가 (샤드별로 묶어 병렬 전송)"""
+        try:
+            self._writes += 1
+            groups: Dict[int, List[VectorDocument]] = {}
+            for doc in documents:
+                groups.setdefault(self.shard_of(doc.document_id), []).append(doc)
+
+            results = self._scatter({shard: ("add", (docs,)) for shard, docs in groups.items()})
+            logger.info(f"Added {len(documents)} documents to {len(groups)} shards")
+            return all(results.values())
+        except Exception as e:
+            logger.error(f"Failed to add documents: {e}")
+            return False
+
+    def similarity_search(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[VectorDocument]:
+        """유사도 검색 (모든 샤드 scatter → top-k gather)"""
+        try:
+            request = ("search", (list(query_embedding), k, filter_metadata))
+            results = self._scatter({shard: request for shard in range(self.n_shards)})
+            merged = self._merge([results[shard] for shard in range(self.n_shards)], k)
+            logger.info(f"Found {len(merged)} similar documents across {self.n_shards} shards")
+            return merged
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}")
+            return []
+
+    def similarity_search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[List[VectorDocument]]:
+        """여러 쿼리 유사도 검색 (샤드마다 GEMM 1회)"""
+        try:
+            if len(query_embeddings) == 0:
+                return []
+            queries = [list(query) for query in query_embeddings]
+            request = ("search_batch", (queries, k, filter_metadata))
+            results = self._scatter({shard: request for shard in range(self.n_shards)})
+            return [
+                self._merge([results[shard][q] for shard in range(self.n_shards)], k)
+                for q in range(len(queries))
+            ]
+        except Exception as e:
+            logger.error(f"Batch similarity search failed: {e}")
+            return [[] for _ in range(len(query_embeddings))]
+
+    def similarity_search_candidates(
+        self,
+        query_embedding: List[float],
+        candidate_ids: Sequence[Tuple[str, str]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[VectorDocument]:
+        """후보 청크만 점수 계산 (후보를 배치된 샤드별로 나누어 해당 샤드에만 요청)"""
+        try:
+            groups: Dict[int, List[Tuple[str, str]]] = {}
+            for document_id, chunk_id in candidate_ids:
+                groups.setdefault(self.shard_of(document_id), []).append((document_id, chunk_id))
+            if not groups:
+                return []
+            
+            query = list(query_embedding)
+            results = self._scatter({
+                shard: ("search_candidates", (query, keys, k, filter_metadata)) for shard, keys in groups.items()
+            })
+            merged = self._merge([results[shard] for shard in sorted(results)], k)
+            logger.info(f"Found {len(merged)} similar documents from {len(candidate_ids)} candidates on {len(groups)} shards")
+            return merged
+        except Exception as e:
+            logger.error(f"Candidate search failed: {e}")
+            return []
+
+    @staticmethod
+    def _merge(shard_hits: List[List[Tuple[VectorDocument, float]]], k: int) -> List[VectorDocument]:
+        """샤드별 (문서, 유사도) 리스트를 유사도 순으로 병합"""
+        ranked = heapq.nlargest(
+            k,
+            ((score, shard, rank, doc) for shard, hits in enumerate(shard_hits) for rank, (doc, score) in enumerate(hits)),
+            key=lambda entry: (entry[0], -entry[1], -entry[2])
+        )
+        return [doc for _, _, _, doc in ranked]
+
+    def delete_document(self, document_id: str) -> bool:
+        """문서 삭제 (문서가 배치된 샤드에만 요청)"""
+        try:
+            self._writes += 1
+            shard = self.shard_of(document_id)
+            return self._scatter({shard: ("delete", (document_id,))})[shard]
+        except Exception as e:
+            logger.error(f"Failed to delete document: {e}")
+            return False
+
+    def get_document(self, document_id: str) -> Optional[VectorDocument]:
+        """문서 조회"""
+        try:
+            shard = self.shard_of(document_id)
+            return self._scatter({shard: ("get", (document_id,))})[shard]
+        except Exception as e:
+            logger.error(f"Failed to get document: {e}")
+            return None
+
+    def get_all_documents(self) -> List[VectorDocument]:
+        """모든 문서 반환"""
+        results = self._scatter({shard: ("all", ()) for shard in range(self.n_shards)})
+        return [doc for shard in range(self.n_shards) for doc in results[shard]]
+
+    def close(self) -> None:
+        """워커 프로세스 종료 (진행 중인 요청의 응답을 받은 뒤 워커가 종료 명령을 처리)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._send_all({shard: ("close", ()) for shard in range(self.n_shards)})
+        except (EOFError, OSError, RuntimeError):
+            pass
+        for reader in self._readers:
+            reader.join(timeout=5)
+        for conn in self._conns:
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        logger.info("ShardedVectorStore closed")
+
+    def _scatter(self, requests: Dict[int, Tuple[str, Tuple]]) -> Dict[int, Any]:
+        """
+        샤드별 요청을 모두 보낸 뒤 응답 수집
+
+        Raises:
+            RuntimeError: 스토어가 닫혔거나 워커가 오류를 반환한 경우
+        """
+        if self._closed:
+            raise RuntimeError("ShardedVectorStore is closed")
+        return self._send_all(requests)
+
+    def _send_all(self, requests: Dict[int, Tuple[str, Tuple]]) -> Dict[int, Any]:
+        """요청 ID를 붙여 샤드별로 전송하고, 수신 스레드가 채워 주는 응답을 기다림"""
+        futures: Dict[int, Future] = {}
+        for shard, (command, args) in requests.items():
+            request_id = next(self._request_ids)
+            future = Future()
+            with self._pending_lock:
+                self._pending[(shard, request_id)] = future
+            futures[shard] = future
+            try:
+                with self._send_locks[shard]:
+                    self._conns[shard].send((request_id, command, args))
+            except (EOFError, OSError) as e:
+                with self._pending_lock:
+                    self._pending.pop((shard, request_id), None)
+                future.set_exception(RuntimeError(f"shard {shard} is not available: {e}"))
+
+        results = {}
+        errors = []
+        for shard, future in futures.items():
+            try:
+                status, value = future.result()
+            except RuntimeError as e:
+                errors.append(str(e))
+                continue
+            if status == "ok":
+                results[shard] = value
+            else:
+                errors.append(f"shard {shard}: {value}")
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return results
+
+    def _read_responses(self, shard: int) -> None:
+        """샤드 수신 스레드: 응답을 요청 ID의 Future로 전달 (워커가 종료되면 남은 요청을 실패 처리)"""
+        conn = self._conns[shard]
+        while True:
+            try:
+                request_id, status, value = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._pending_lock:
+                future = self._pending.pop((shard, request_id), None)
+            if future is not None:
+                future.set_result((status, value))
+
+        with self._pending_lock:
+            orphaned = [key for key in self._pending if key[0] == shard]
+            futures = [self._pending.pop(key) for key in orphaned]
+        for future in futures:
+            future.set_exception(RuntimeError(f"shard {shard} worker exited"))
@@ -0,0 +1,449 @@
+"""
+벡터 인덱스 스냅샷
+수집(ingestion) 후 S3에 압축된 인덱스 스냅샷을 게시하고,
+쿼리 Lambda는 /tmp에 한 번 내려받아 메모리 매핑(mmap)으로 검색
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from .base import VectorStore, VectorDocument
+from .index_file import read_index_file, write_index_file
+from .matrix_index import normalize_rows, top_k_indices, top_k_rows
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 2
+VECTORS_FILE = "vectors.idx"
+MANIFEST_FILE = "manifest.json"
+# format_version 1: vectors.npy + 매니페스트에 ids/norms/offsets (읽기만 지원, 다음 압축/게시 때 2로 전환)
+LEGACY_FORMAT_VERSION = 1
+LEGACY_VECTORS_FILE = "vectors.npy"
+
+# 게시가 겹쳐 매니페스트와 벡터 파일의 세대가 다를 때 refresh 재시도 횟수
+REFRESH_MAX_ATTEMPTS = 3
+
+
+def write_snapshot(documents: List[VectorDocument], directory: str) -> Dict:
+    """
+    문서 리스트를 스냅샷 파일로 기록
+
+    - vectors.idx: 인덱스 파일 (L2 정규화된 float32 행렬 + 원본 노름 + 행별 ID/문서별 행 범위 offsets,
+      document_id 순으로 정렬, index_file 참고)
+    - manifest.json: 행별 텍스트/메타데이터
+
+    Args:
+        documents: 스냅샷에 포함할 문서
+        directory: 출력 디렉토리
+
+    Returns:
+        매니페스트 딕셔너리 (ids/norms/offsets 포함)
+    """
+    documents = sorted(documents, key=lambda d: (d.document_id, d.chunk_id))
+    if documents:
+        raw = np.asarray([doc.embedding for doc in documents], dtype=np.float32)
+        matrix, valid = normalize_rows(raw)
+        norms = np.linalg.norm(raw, axis=1)
+        documents = [doc for doc, ok in zip(documents, valid) if ok]
+        matrix = matrix[valid]
+        norms = norms[valid]
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+        norms = np.empty(0, dtype=np.float32)
+
+    return write_snapshot_arrays(
+        directory,
+        matrix,
+        norms,
+        [(doc.document_id, doc.chunk_id) for doc in documents],
+        [doc.text for doc in documents],
+        [doc.metadata for doc in documents]
+    )
+
+
+def write_snapshot_arrays(
+    directory: str,
+    vectors: np.ndarray,
+    norms: np.ndarray,
+    ids: List[Tuple[str, str]],
+    texts: List[str],
+    metadata: List[Dict]
+) -> Dict:
+    """
+    정규화된 벡터 행렬과 행별 정보를 스냅샷 파일로 기록 (VectorDocument/리스트 변환 없음)
+
+    Args:
+        directory: 출력 디렉토리
+        vectors: (행 수, 차원) L2 정규화된 행렬 (영벡터 행 없음)
+        norms: 행별 원본 노름
+        ids: 행별 (document_id, chunk_id) - (document_id, chunk_id) 순으로 정렬되어 있어야 함
+        texts: 행별 텍스트
+        metadata: 행별 메타데이터
+
+    Returns:
+        매니페스트 딕셔너리 (ids/norms/offsets 포함)
+    """
+    # 같은 문서의 청크는 연속된 행 → [시작, 끝) 범위로 조회
+    offsets: Dict[str, List[int]] = {}
+    for row, (document_id, _) in enumerate(ids):
+        start, _ = offsets.get(document_id, [row, row])
+        offsets[document_id] = [start, row + 1]
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "count": len(ids),
+        "dimension": int(vectors.shape[1]) if len(ids) else 0,
+        "texts": texts,
+        "metadata": metadata,
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    write_index_file(os.path.join(directory, VECTORS_FILE), vectors, ids, norms=norms, offsets=offsets)
+    with open(os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return dict(manifest, ids=ids, norms=norms, offsets=offsets)
+
+
+def load_snapshot(directory: str, dimension: Optional[int] = None) -> Tuple[Dict, np.ndarray]:
+    """
+    write_snapshot으로 기록한 디렉토리 열기
+
+    Args:
+        directory: 스냅샷 디렉토리
+        dimension: 기대하는 임베딩 차원 (None이면 확인하지 않음)
+
+    Returns:
+        (ids/norms/offsets를 채운 매니페스트, 메모리 매핑된 정규화 벡터 행렬)
+
+    Raises:
+        ValueError: 지원하지 않는 형식, 손상된 인덱스 파일, 차원 불일치, 행 수가 매니페스트와 다른 경우
+    """
+    with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") == LEGACY_FORMAT_VERSION:
+        return _load_legacy_snapshot(directory, manifest, dimension)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format_version')}")
+
+    index = read_index_file(os.path.join(directory, VECTORS_FILE), dimension=dimension)
+    if len(index) != manifest["count"]:
+        raise ValueError(f"Snapshot row count mismatch: manifest={manifest['count']}, vectors={len(index)}")
+    manifest.update(ids=index.ids, norms=index.norms, offsets=index.offsets)
+    return manifest, index.vectors
+
+
+def _load_legacy_snapshot(directory: str, manifest: Dict, dimension: Optional[int]) -> Tuple[Dict, np.ndarray]:
+    """format_version 1 스냅샷 열기 (vectors.npy, 체크섬 없음)"""
+    if manifest["count"] == 0:
+        # 빈 배열은 mmap할 수 없음
+        return manifest, np.empty((0, 0), dtype=np.float32)
+
+    vectors = np.load(os.path.join(directory, LEGACY_VECTORS_FILE), mmap_mode="r")
+    if vectors.shape[0] != manifest["count"]:
+        raise ValueError(
+            f"Snapshot row count mismatch: manifest={manifest['count']}, vectors={vectors.shape[0]}"
+        )
+    if dimension is not None and vectors.shape[1] != dimension:
+        raise ValueError(f"Snapshot dimension mismatch: expected={dimension}, file={vectors.shape[1]}")
+    return manifest, vectors
+
+
+class SnapshotPublisher:
+    """수집 경로에서 S3 문서 버킷으로 인덱스 스냅샷을 게시"""
+
+    def __init__(self, s3_handler, prefix: str = "index/"):
+        """
+        Args:
+            s3_handler: S3DocumentHandler 인스턴스
+            prefix: 스냅샷 객체 키 접두사
+        """
+        self.s3_handler = s3_handler
+        self.prefix = prefix
+
+    def publish(self, documents: List[VectorDocument]) -> Dict:
+        """
+        스냅샷 생성 후 업로드 (벡터 파일 → 매니페스트 순서, 매니페스트가 커밋 지점)
+
+        Returns:
+            업로드 결과 (count, vectors_etag, manifest_etag)
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            write_snapshot(documents, tmp)
+
+            with open(os.path.join(tmp, VECTORS_FILE), "rb") as f:
+                vectors_etag = self.s3_handler.upload_bytes(self.prefix + VECTORS_FILE, f.read())
+
+            # 매니페스트에 벡터 파일 ETag를 기록해 두 객체가 같은 세대인지 확인 가능하게 함
+            manifest_path = os.path.join(tmp, MANIFEST_FILE)
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            manifest["vectors_etag"] = vectors_etag
+            manifest_etag = self.s3_handler.upload_bytes(
+                self.prefix + MANIFEST_FILE,
+                json.dumps(manifest, ensure_ascii=False).encode("utf-8"),
+                content_type="application/json"
+            )
+
+        logger.info(f"Published index snapshot: {manifest['count']} vectors to {self.prefix}")
+        return {
+            "count": manifest["count"],
+            "vectors_etag": vectors_etag,
+            "manifest_etag": manifest_etag,
+        }
+
+    def publish_from_store(self, vector_store: VectorStore) -> Dict:
+        """벡터 스토어의 전체 문서로 스냅샷 게시 (get_all_documents 지원 스토어)"""
+        return self.publish(vector_store.get_all_documents())
+
+
+class SnapshotVectorStore(VectorStore):
+    """
+    S3 스냅샷 기반 읽기 전용 벡터 스토어
+
+    - 콜드 스타트 시 /tmp에 한 번 내려받고, 이후에는 ETag가 바뀐 경우에만 다시 받음
+    - 벡터 행렬은 np.memmap으로 열어 필요한 페이지만 메모리에 올라감 (체크섬/차원 확인 후)
+    - DynamoDB 스캔이 전혀 필요 없음
+    """
+
+    def __init__(
+        self,
+        s3_handler,
+        prefix: str = "index/",
+        local_dir: str = "/tmp/rag_index",
+        refresh_interval: Optional[float] = None,
+        dimension: Optional[int] = None
+    ):
+        """
+        Args:
+            s3_handler: S3DocumentHandler 인스턴스
+            prefix: 스냅샷 객체 키 접두사
+            local_dir: 로컬 캐시 디렉토리
+            refresh_interval: ETag 재확인 주기(초), None이면 생성 시 한 번만 확인
+            dimension: 기대하는 임베딩 차원 (다른 차원의 스냅샷은 거부)
+        """
+        self.s3_handler = s3_handler
+        self.prefix = prefix
+        self.local_dir = local_dir
+        self.refresh_interval = refresh_interval
+        self.dimension = dimension
+        self._manifest_etag: Optional[str] = None
+        self._last_refresh = 0.0
+
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._ids: List[Tuple[str, str]] = []
+        self._texts: List[str] = []
+        self._metadata: List[Dict] = []
+        self._norms = np.empty(0, dtype=np.float32)
+        self._offsets: Dict[str, List[int]] = {}
+
+        os.makedirs(local_dir, exist_ok=True)
+        self.refresh()
+        logger.info(f"SnapshotVectorStore initialized: {len(self._ids)} vectors from {prefix}")
+
+    def refresh(self) -> bool:
+        """
+        원격 매니페스트 ETag를 확인하고 바뀐 경우에만 스냅샷 재다운로드
+
+        Returns:
+            스냅샷을 새로 적재했는지 여부
+        """
+        self._last_refresh = time.monotonic()
+        manifest_key = self.prefix + MANIFEST_FILE
+        manifest_path = os.path.join(self.local_dir, MANIFEST_FILE)
+        vectors_path = os.path.join(self.local_dir, VECTORS_FILE)
+        etag_path = os.path.join(self.local_dir, "manifest.etag")
+
+        for attempt in range(1, REFRESH_MAX_ATTEMPTS + 1):
+            remote_etag = self.s3_handler.get_etag(manifest_key)
+            if remote_etag is None:
+                logger.warning(f"No index snapshot found at {manifest_key}")
+                return False
+            if remote_etag == self._manifest_etag:
+                return False
+
+            # 같은 실행 환경의 이전 호출이 이미 받아 둔 파일은 재사용
+            local_etag = None
+            if os.path.exists(etag_path) and os.path.exists(vectors_path):
+                with open(etag_path, "r", encoding="utf-8") as f:
+                    local_etag = f.read().strip()
+            if local_etag == remote_etag or self._download(manifest_key, remote_etag, manifest_path, etag_path):
+                break
+            logger.warning(f"Index snapshot changed during download, retrying ({attempt}/{REFRESH_MAX_ATTEMPTS})")
+        else:
+            logger.warning(f"Index snapshot kept changing at {manifest_key}; keeping the loaded snapshot")
+            return False
+
+        try:
+            manifest, vectors = load_snapshot(self.local_dir, dimension=self.dimension)
+        except ValueError:
+            # 손상된 로컬 파일을 재사용하지 않도록 ETag 기록 삭제 (다음 refresh에서 다시 받음)
+            os.remove(etag_path)
+            raise
+        self._vectors = vectors
+        self._ids = [tuple(key) for key in manifest["ids"]]
+        self._texts = manifest["texts"]
+        self._metadata = manifest["metadata"]
+        self._norms = np.asarray(manifest["norms"], dtype=np.float32)
+        self._offsets = manifest["offsets"]
+        self._manifest_etag = remote_etag
+        return True
+
+    def _download(self, manifest_key: str, manifest_etag: str, manifest_path: str, etag_path: str) -> bool:
+        """
+        매니페스트와 그 매니페스트가 가리키는 벡터 파일을 조건부 다운로드
+
+        매니페스트는 확인한 ETag일 때만, 벡터 파일은 매니페스트에 기록된 vectors_etag일 때만 받으므로
+        게시가 겹쳐도 서로 다른 세대의 벡터와 텍스트/메타데이터가 섞이지 않음
+
+        Returns:
+            두 객체를 모두 받았는지 여부 (False면 도중에 새 스냅샷이 게시된 것)
+        """
+        # 받는 도중 실패해도 이전 ETag 기록으로 섞인 파일을 재사용하지 않도록 먼저 삭제
+        if os.path.exists(etag_path):
+            os.remove(etag_path)
+        if not self.s3_handler.download_file(manifest_key, manifest_path, if_match=manifest_etag):
+            return False
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        # 이전 형식으로 게시된 스냅샷은 새 스냅샷이 게시될 때까지 vectors.npy를 받음 (vectors_etag 없음)
+        legacy = manifest.get("format_version") == LEGACY_FORMAT_VERSION
+        vectors_file = LEGACY_VECTORS_FILE if legacy else VECTORS_FILE
+        if not self.s3_handler.download_file(
+            self.prefix + vectors_file, os.path.join(self.local_dir, vectors_file),
+            if_match=manifest.get("vectors_etag")
+        ):
+            return False
+
+        with open(etag_path, "w", encoding="utf-8") as f:
+            f.write(manifest_etag)
+        return True
+
+    def write_version(self) -> Optional[str]:
+        """쓰기 버전 (현재 적재한 스냅샷 매니페스트의 ETag, refresh_interval이 지났으면 먼저 재확인)"""
+        self._maybe_refresh()
+        return self._manifest_etag
+
+    def _maybe_refresh(self) -> None:
+        """refresh_interval이 지났으면 ETag 재확인"""
+        if self.refresh_interval is None:
+            return
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self.refresh()
+
+    def _document_at(self, row: int) -> VectorDocument:
+        """행 번호로 VectorDocument 생성"""
+        document_id, chunk_id = self._ids[row]
+        return VectorDocument(
+            document_id=document_id,
+            chunk_id=chunk_id,
+            text=self._texts[row],
+            embedding=(np.asarray(self._vectors[row]) * self._norms[row]).tolist(),
+            metadata=self._metadata[row]
+        )
+
+    def add_documents(self, documents: List[VectorDocument]) -> bool:
+        """읽기 전용 스토어 - 스냅샷은 SnapshotPublisher로 게시"""
+        logger.error("SnapshotVectorStore is read-only; publish a new snapshot instead")
+        return False
+
+    def similarity_search(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[VectorDocument]:
+        """유사도 검색"""
+        try:
+            self._maybe_refresh()
+            if not self._ids:
+                logger.warning("Vector store is empty")
+                return []
+
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vec)
+            if query_norm == 0:
+                logger.warning("Query embedding is zero vector")
+                return []
+            query_vec = query_vec / query_norm
+
+            rows = self._filter_rows(filter_metadata)
+            if rows is not None:
+                if rows.size == 0:
+                    return []
+                scores = self._vectors[rows] @ query_vec
+                order = rows[top_k_indices(scores, k)]
+            else:
+                scores = self._vectors @ query_vec
+                order = top_k_indices(scores, k)
+
+            results = [self._document_at(int(row)) for row in order]
+            logger.info(f"Found {len(results)} similar documents")
+            return results
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}", exc_info=True)
+            return []
+
+    def similarity_search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 5,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[List[VectorDocument]]:
+        """여러 쿼리 유사도 검색 (메모리 매핑 행렬에 대한 GEMM 1회)"""
+        try:
+            self._maybe_refresh()
+            if len(query_embeddings) == 0:
+                return []
+            queries, valid = normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+            rows = self._filter_rows(filter_metadata)
+            if not self._ids or (rows is not None and rows.size == 0):
+                return [[] for _ in range(queries.shape[0])]
+
+            candidates = self._vectors if rows is None else self._vectors[rows]
+            top = top_k_rows(queries @ candidates.T, k)
+            if rows is not None:
+                top = rows[top]
+            return [
+                [self._document_at(int(row)) for row in top[q]] if valid[q] else []
+                for q in range(queries.shape[0])
+            ]
+        except Exception as e:
+            logger.error(f"Batch similarity search failed: {e}", exc_info=True)
+            return [[] for _ in range(len(query_embeddings))]
+
+    def _filter_rows(self, filter_metadata: Optional[Dict]) -> Optional[np.ndarray]:
+        """필터를 통과한 행 번호 (필터가 없으면 None = 전체)"""
+        if not filter_metadata:
+            return None
+        return np.asarray([
+            row for row, metadata in enumerate(self._metadata)
+            if self._matches_filter(metadata, filter_metadata)
+        ], dtype=np.int64)
+
+    def _matches_filter(self, metadata: Dict, filter_metadata: Dict) -> bool:
+        """메타데이터 필터 매칭 확인"""
+        for key, value in filter_metadata.items():
+            if key not in metadata or metadata[key] != value:
+                return False
+        return True
+
+    def delete_document(self, document_id: str) -> bool:
+        """읽기 전용 스토어 - 스냅샷은 SnapshotPublisher로 게시"""
+        logger.error("SnapshotVectorStore is read-only; publish a new snapshot instead")
+        return False
+
+    def get_document(self, document_id: str) -> Optional[VectorDocument]:
+        """문서 조회 (offsets로 첫 번째 청크 행을 바로 찾음)"""
+        offset = self._offsets.get(document_id)
+        if offset is None:
+            return None
+        return self._document_at(offset[0])
+
+    def get_all_documents(self) -> List[VectorDocument]:
+        """모든 문서 반환"""
+        return [self._document_at(row) for row in range(len(self._ids))]
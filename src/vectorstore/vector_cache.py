@@ -0,0 +1,128 @@
+"""
+웜 컨테이너 벡터 캐시
+디코딩된 임베딩 행렬과 행 키를 프로세스 메모리에 보관하고, 저장소 버전(epoch)이 바뀌면 무효화
+"""
+
+import logging
+import numpy as np
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+from .matrix_index import MatrixIndex
+
+logger = logging.getLogger(__name__)
+
+
+class VectorCache:
+    """
+    버전 기반 임베딩 캐시
+
+    - version: 캐시를 만들 때 읽은 저장소 버전 (쓰기마다 증가하는 epoch)
+    - index: 정규화된 임베딩 행렬 (MatrixIndex)
+    - payloads: 행 키별 부가 정보 (원본 노름, 메타데이터 등)
+    - codes / code_keys: PQ 코드 캐시 (load_codes로 적재한 경우 float32 행렬 대신 사용)
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.index = MatrixIndex()
+        self.payloads: Dict[Hashable, Dict[str, Any]] = {}
+        self.codes: Optional[np.ndarray] = None
+        self.code_keys: List[Hashable] = []
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def lookup(self, version: int) -> bool:
+        """
+        현재 저장소 버전으로 캐시를 사용할 수 있는지 확인하고 hit/miss 집계
+
+        Args:
+            version: 저장소의 현재 버전
+
+        Returns:
+            캐시 유효 여부
+        """
+        if self.version is not None and self.version == version:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def load(
+        self,
+        version: int,
+        keys: Sequence[Hashable],
+        embeddings: Iterable[Sequence[float]],
+        payloads: Sequence[Dict[str, Any]]
+    ) -> None:
+        """
+        새 스냅샷으로 캐시 교체 (새 인덱스를 다 만든 뒤 참조만 교체)
+
+        Args:
+            version: 스냅샷을 읽기 전에 조회한 저장소 버전
+            keys: 행 키
+            embeddings: 임베딩 벡터
+            payloads: 행별 부가 정보
+        """
+        index = MatrixIndex()
+        payload_map: Dict[Hashable, Dict[str, Any]] = {}
+        if keys:
+            indexed = index.add_batch(keys, embeddings)
+            payload_map = {key: payload for key, payload, ok in zip(keys, payloads, indexed) if ok}
+
+        self.index = index
+        self.payloads = payload_map
+        self.codes = None
+        self.code_keys = []
+        self.version = version
+        self.loads += 1
+        logger.info(f"Vector cache loaded: version={version}, rows={len(index)}")
+
+    def load_codes(
+        self,
+        version: int,
+        keys: Sequence[Hashable],
+        codes: np.ndarray,
+        payloads: Sequence[Dict[str, Any]]
+    ) -> None:
+        """
+        PQ 코드 행렬로 캐시 교체 (float32 행렬 대비 차원 x 4 / 코드 바이트 수만큼 작음)
+
+        Args:
+            version: 스냅샷을 읽기 전에 조회한 저장소 버전
+            keys: 행 키
+            codes: (행 수, 코드 바이트 수) uint8 코드 행렬
+            payloads: 행별 부가 정보
+        """
+        self.index = MatrixIndex()
+        self.payloads = dict(zip(keys, payloads))
+        self.codes = codes
+        self.code_keys = list(keys)
+        self.version = version
+        self.loads += 1
+        logger.info(f"Vector cache loaded: version={version}, rows={len(keys)} (PQ codes)")
+
+    def invalidate(self) -> None:
+        """캐시 무효화"""
+        self.version = None
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        k: int,
+        rows: Optional[Sequence[int]] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """캐시된 행렬에서 top-k 검색"""
+        return self.index.search(query_embedding, k, rows=rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 hit/miss 및 메모리 사용량 통계"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "loads": self.loads,
+            "version": self.version,
+            "rows": len(self.index) + len(self.code_keys),
+            "matrix_bytes": int(self.index.vectors.nbytes) + (int(self.codes.nbytes) if self.codes is not None else 0),
+        }
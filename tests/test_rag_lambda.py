@@ -0,0 +1,326 @@
+"""
+Lambda 앱 테스트
+aws_lambda/rag_lambda/app.py의 DynamoVectorStore 스트리밍 top-k 검색과 점수 계산 검증 (Fake 테이블 사용)
+"""
+
+import importlib.util
+import json
+import os
+import pytest
+import numpy as np
+from decimal import Decimal
+from unittest.mock import patch
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+
+APP_PATH = os.path.join(os.path.dirname(__file__), "..", "aws_lambda", "rag_lambda", "app.py")
+
+
+@pytest.fixture(scope="module")
+def app():
+    """테이블 이름 환경 변수를 채우고 Lambda 앱 모듈 적재"""
+    with patch.dict(os.environ, {"VECTORSTORE_TABLE_NAME": "test-table"}), patch("boto3.resource"):
+        spec = importlib.util.spec_from_file_location("rag_lambda_app", APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+class FakePagedTable:
+    """page_size개씩 LastEvaluatedKey로 이어지는 스캔과 버전 아이템을 흉내내는 Fake 테이블"""
+
+    def __init__(self, items, page_size=3):
+        self.items = list(items)
+        self.page_size = page_size
+        self.scan_calls = 0
+        self.epoch = 0
+
+    @staticmethod
+    def _key(item):
+        return {"document_id": item["document_id"], "chunk_id": item["chunk_id"]}
+
+    @staticmethod
+    def _project(item, names):
+        return {name: item[name] for name in names if name in item}
+
+    def scan(self, ExclusiveStartKey=None, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        self.scan_calls += 1
+        start = 0
+        if ExclusiveStartKey is not None:
+            start = next(i for i, item in enumerate(self.items) if self._key(item) == ExclusiveStartKey) + 1
+        page = self.items[start:start + self.page_size]
+        if ProjectionExpression:
+            names = [
+                (ExpressionAttributeNames or {}).get(name, name) for name in ProjectionExpression.split(", ")
+            ]
+            page = [self._project(item, names) for item in page]
+        response = {"Items": page}
+        if start + self.page_size < len(self.items):
+            response["LastEvaluatedKey"] = self._key(self.items[start + self.page_size - 1])
+        return response
+
+    def get_item(self, Key, ConsistentRead=False):
+        return {"Item": {"epoch": self.epoch}}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, ConditionExpression=None):
+        if Key.get("document_id") == "__meta__":
+            self.epoch += 1
+            return
+        # 임베딩 마이그레이션: SET embedding = :embedding [IF attribute_type(embedding, :string_type)]
+        item = next(item for item in self.items if self._key(item) == Key)
+        if ConditionExpression and not isinstance(item.get("embedding"), str):
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        item["embedding"] = Binary(ExpressionAttributeValues[":embedding"])
+
+
+class FakeResource:
+    """FakePagedTable을 돌려주고 BatchGetItem에 응답하는 Fake 리소스"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def Table(self, name):
+        return self.table
+
+    def batch_get_item(self, RequestItems):
+        [(name, request)] = RequestItems.items()
+        wanted = [(key["document_id"], key["chunk_id"]) for key in request["Keys"]]
+        responses = [
+            FakePagedTable._project(item, request["ExpressionAttributeNames"].values())
+            for item in self.table.items
+            if (item["document_id"], item["chunk_id"]) in wanted
+        ]
+        return {"Responses": {name: responses}}
+
+
+def make_store(app, items, page_size=3, enable_cache=False):
+    """Fake 테이블을 사용하는 DynamoVectorStore 생성"""
+    table = FakePagedTable(items, page_size=page_size)
+    with patch.object(app.boto3, "resource", return_value=FakeResource(table)):
+        store = app.DynamoVectorStore("test-table", None, enable_cache=enable_cache)
+    return store, table
+
+
+def make_item(app, index, embedding, store_norm=True):
+    """Binary 임베딩(+노름) 아이템"""
+    vector = np.asarray(embedding, dtype=np.float32)
+    item = {
+        "document_id": f"doc{index}",
+        "chunk_id": "chunk_0",
+        "text": f"text {index}",
+        "embedding": Binary(app.encode_embedding(vector)),
+    }
+    if store_norm:
+        item["embedding_norm"] = Decimal(str(float(np.linalg.norm(vector))))
+    return item
+
+
+def exact_top_k(query, vectors, k):
+    """전체 행을 점수 계산 후 안정 정렬한 정확 top-k (동점은 스캔 순서)"""
+    query = np.asarray(query, dtype=np.float64)
+    scores = [
+        float(np.dot(query, vec) / (np.linalg.norm(query) * np.linalg.norm(vec)))
+        for vec in np.asarray(vectors, dtype=np.float64)
+    ]
+    order = sorted(range(len(scores)), key=lambda i: -scores[i])
+    return [f"doc{i}" for i in order[:k]]
+
+
+class TestStreamingTopK:
+    """스캔 페이지 스트리밍 top-k 검색 테스트 클래스"""
+
+    @pytest.mark.parametrize("page_size", [1, 3, 7, 100])
+    @pytest.mark.parametrize("k", [1, 5, 12])
+    def test_matches_exact_across_pages(self, app, page_size, k):
+        """페이지 크기와 관계없이 정확 검색과 같은 순서의 top-k 반환"""
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(40, 16)).astype(np.float32)
+        store, table = make_store(app, [make_item(app, i, v) for i, v in enumerate(vectors)], page_size=page_size)
+
+        for query in rng.normal(size=(5, 16)):
+            results = store.similarity_search(query.tolist(), top_k=k)
+            assert [item["document_id"] for item in results] == exact_top_k(query, vectors, k)
+            assert all(item["text"] == f"text {item['document_id'][3:]}" for item in results)
+        assert table.scan_calls == 5 * -(-40 // page_size)
+
+    def test_ties_keep_scan_order(self, app):
+        """동점 행이 페이지 경계에 걸쳐 있어도 먼저 스캔된 행부터 반환 (정확 검색의 안정 정렬과 동일)"""
+        base = np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32)
+        vectors = [base * (i + 1) for i in range(6)]  # 크기만 다른 같은 방향 → 모두 점수 1.0
+        vectors.insert(3, np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float32))
+        vectors.append(np.array([1.0, 1.0, 0.0, 0.0], dtype=np.float32))
+        store, _ = make_store(app, [make_item(app, i, v) for i, v in enumerate(vectors)], page_size=2)
+
+        for k in (1, 3, 6, 8):
+            results = store.similarity_search(base.tolist(), top_k=k)
+            assert [item["document_id"] for item in results] == exact_top_k(base, vectors, k)
+        assert [item["document_id"] for item in store.similarity_search(base.tolist(), top_k=3)] == [
+            "doc0", "doc1", "doc2"
+        ]
+
+    def test_k_larger_than_item_count(self, app):
+        """k가 아이템 수보다 크면 점수 계산 가능한 행 전체를 순서대로 반환"""
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(5, 8)).astype(np.float32)
+        store, _ = make_store(app, [make_item(app, i, v) for i, v in enumerate(vectors)], page_size=2)
+
+        query = rng.normal(size=8)
+        results = store.similarity_search(query.tolist(), top_k=50)
+        assert [item["document_id"] for item in results] == exact_top_k(query, vectors, 5)
+        assert store.similarity_search(query.tolist(), top_k=0) == []
+        assert store.similarity_search([0.0] * 8, top_k=3) == []
+
+    def test_cached_search_matches_streaming(self, app):
+        """웜 캐시 검색도 스트리밍 검색과 같은 결과"""
+        rng = np.random.default_rng(2)
+        vectors = rng.normal(size=(30, 16)).astype(np.float32)
+        items = [make_item(app, i, v) for i, v in enumerate(vectors)]
+        streaming, _ = make_store(app, items, page_size=4)
+        cached, table = make_store(app, items, page_size=4, enable_cache=True)
+
+        for query in rng.normal(size=(3, 16)):
+            expected = [item["document_id"] for item in streaming.similarity_search(query.tolist(), top_k=5)]
+            assert [item["document_id"] for item in cached.similarity_search(query.tolist(), top_k=5)] == expected
+        # 첫 쿼리만 스캔 (이후는 버전 확인 후 캐시 행렬 사용)
+        assert table.scan_calls == -(-30 // 4)
+        assert json.loads(json.dumps(cached.cache_stats()))["hits"] == 2
+
+
+class TestScoring:
+    """저장 노름 기반 점수 계산과 제외 행 집계 테스트 클래스"""
+
+    def test_stored_norm_matches_recomputed(self, app):
+        """저장된 노름으로 계산한 점수와 노름이 없는 기존 레코드의 재계산 점수가 같음"""
+        rng = np.random.default_rng(3)
+        vectors = rng.normal(size=(10, 16)).astype(np.float32)
+        store, _ = make_store(app, [])
+        query = rng.normal(size=16).astype(np.float32)
+        query /= np.linalg.norm(query)
+
+        with_norm = store._score_page(query, [make_item(app, i, v) for i, v in enumerate(vectors)])
+        without_norm = store._score_page(query, [make_item(app, i, v, store_norm=False) for i, v in enumerate(vectors)])
+        expected = vectors @ query / np.linalg.norm(vectors, axis=1)
+        np.testing.assert_allclose([score for score, _ in with_norm], expected, rtol=1e-5)
+        np.testing.assert_allclose([score for score, _ in without_norm], expected, rtol=1e-5)
+
+    @pytest.mark.parametrize("enable_cache", [True, False])
+    def test_skipped_rows_counted_and_not_returned(self, app, enable_cache):
+        """영벡터/디코딩 불가/차원 불일치 행은 반환하지 않고 메트릭으로 집계"""
+        rng = np.random.default_rng(4)
+        items = [make_item(app, i, v) for i, v in enumerate(rng.normal(size=(4, 8)))]
+        items.append(make_item(app, 4, np.zeros(8)))
+        items.append(make_item(app, 5, np.zeros(8), store_norm=False))
+        items.append(dict(make_item(app, 6, np.ones(8)), embedding=Binary(b"\x00\x01\x02")))
+        items.append(dict(make_item(app, 7, np.ones(8)), embedding="[1.0, oops"))
+        items.append(make_item(app, 8, np.ones(4)))
+        store, _ = make_store(app, items, page_size=2, enable_cache=enable_cache)
+
+        results = store.similarity_search(rng.normal(size=8).tolist(), top_k=20)
+        assert sorted(item["document_id"] for item in results) == ["doc0", "doc1", "doc2", "doc3"]
+        assert store.scoring_metrics() == {
+            "EmbeddingDecodeFailures": 2,
+            "EmbeddingDimensionMismatches": 1,
+            "EmbeddingZeroNorms": 2,
+        }
+        assert store.scoring_metrics()["EmbeddingZeroNorms"] == 0
+
+    def test_mixed_json_and_binary_rows(self, app):
+        """마이그레이션 전 JSON 문자열 행과 바이너리 행을 함께 점수 계산"""
+        rng = np.random.default_rng(5)
+        vectors = rng.normal(size=(12, 8)).astype(np.float32)
+        items = []
+        for i, vector in enumerate(vectors):
+            item = make_item(app, i, vector, store_norm=i % 3 != 0)
+            if i % 2:
+                item["embedding"] = json.dumps(vector.tolist())
+            items.append(item)
+        store, _ = make_store(app, items, page_size=5)
+
+        query = rng.normal(size=8)
+        results = store.similarity_search(query.tolist(), top_k=12)
+        assert [item["document_id"] for item in results] == exact_top_k(query, vectors, 12)
+        assert store.scoring_metrics() == {
+            "EmbeddingDecodeFailures": 0,
+            "EmbeddingDimensionMismatches": 0,
+            "EmbeddingZeroNorms": 0,
+        }
+
+
+class TestQueryHandler:
+    """/query 핸들러 테스트 클래스"""
+
+    def test_cache_stats_logged_at_debug(self, app, capsys, caplog):
+        """캐시 통계는 쿼리마다 stdout에 출력하지 않고 모듈 로거의 debug 레벨로만 기록"""
+        store, _ = make_store(app, [make_item(app, 0, [1.0, 0.0])], enable_cache=True)
+        event = {"body": json.dumps({"question": "q", "top_k": 1})}
+        with patch.object(app, "vector_store", store), \
+                patch.object(app, "embed_text", return_value=[1.0, 0.0]), \
+                patch.object(app, "generate_answer", return_value="answer"):
+            response = app.handle_query(event)
+            assert json.loads(response["body"])["source_documents"][0]["document_id"] == "doc0"
+            assert "[CACHE]" not in capsys.readouterr().out
+
+            with caplog.at_level("DEBUG", logger=app.logger.name):
+                app.handle_query(event)
+        assert any("[CACHE]" in record.getMessage() and '"hits": 1' in record.getMessage() for record in caplog.records)
+
+
+class TestBulkUpload:
+    """/upload 일괄 업로드와 임베딩 마이그레이션 테스트 클래스"""
+
+    def test_texts_embedded_in_batches(self, app):
+        """texts 업로드는 청크마다가 아니라 96개 단위 embed 요청으로 임베딩"""
+        texts = [f"chunk text {i}" for i in range(200)]
+        calls = []
+
+        def post(url, headers, json, timeout):
+            calls.append(list(json["texts"]))
+            response = type("Response", (), {})()
+            response.json = lambda: {"embeddings": [[float(text.split()[-1]), 1.0] for text in json["texts"]]}
+            return response
+
+        store, table = make_store(app, [])
+        writes = []
+        store.add_documents = lambda chunks: writes.extend(chunks) or {"BulkWriteItemsPerSecond": 1.0}
+        event = {"body": json.dumps({"document_id": "guide.md", "texts": texts})}
+        with patch.object(app, "vector_store", store), patch.object(app, "COHERE_API_KEY", "key"), \
+                patch.object(app.requests, "post", side_effect=post):
+            response = app.handle_upload(event)
+
+        assert response["statusCode"] == 200
+        assert [len(batch) for batch in calls] == [96, 96, 8]
+        assert [chunk["text"] for chunk in writes] == texts
+        assert all(chunk["embedding"] == [float(i), 1.0] for i, chunk in enumerate(writes))
+        assert json.loads(response["body"])["num_chunks"] == 200
+
+    def test_embed_count_mismatch_fails_upload(self, app):
+        """응답 임베딩 수가 요청 텍스트 수와 다르면 청크를 잘못 짝짓지 않고 실패"""
+        response = type("Response", (), {"json": lambda self: {"embeddings": [[1.0, 0.0]]}})()
+        event = {"body": json.dumps({"document_id": "doc", "texts": ["a", "b"]})}
+        with patch.object(app, "COHERE_API_KEY", "key"), patch.object(app.requests, "post", return_value=response):
+            result = app.handle_upload(event)
+        assert result["statusCode"] == 500
+
+    def test_migrate_embeddings_skips_concurrently_converted(self, app):
+        """JSON 임베딩만 변환하고, 스캔 후 다른 쓰기가 이미 바이너리로 바꾼 아이템은 덮어쓰지 않음"""
+        vectors = np.arange(12, dtype=np.float32).reshape(4, 3) + 1
+        items = [make_item(app, i, v) for i, v in enumerate(vectors)]
+        for item in items[:3]:
+            item["embedding"] = json.dumps(np.asarray(app.decode_embedding(item["embedding"])).tolist())
+        store, table = make_store(app, items, page_size=10)
+
+        original_scan = table.scan
+        converted = Binary(app.encode_embedding([9.0, 9.0, 9.0]))
+
+        def scan(**kwargs):
+            response = original_scan(**kwargs)
+            # 스캔 직후 다른 쓰기가 doc1을 새 임베딩으로 교체
+            table.items[1] = dict(table.items[1], embedding=converted)
+            return response
+
+        table.scan = scan
+        assert store.migrate_embeddings() == 2
+        assert app.decode_embedding(table.items[0]["embedding"]).tolist() == vectors[0].tolist()
+        assert table.items[1]["embedding"] is converted
+        assert app.decode_embedding(table.items[2]["embedding"]).tolist() == vectors[2].tolist()
+        assert isinstance(table.items[3]["embedding"], Binary)
@@ -287,3 +287,193 @@ class TestRAGPipeline:
         assert "answer" in result
         assert isinstance(result["answer"], str)
 
+
+
+class TestLexicalPrefilter:
+    """BM25 어휘 색인 및 lexical_prefilter 검색 모드 테스트 클래스"""
+    
+    def test_bm25_ranking_and_removal(self):
+        """BM25 순위 및 문서 제거 테스트"""
+        from src.rag.lexical_index import BM25Index
+        
+        index = BM25Index()
+        index.add("guide", "chunk_0", "Lambda cold start latency and provisioned concurrency")
+        index.add("guide", "chunk_1", "DynamoDB scan pagination")
+        index.add("faq", "chunk_0", "cold cold storage tiers in S3")
+        
+        hits = index.search("lambda cold start", top_n=10)
+        assert hits[0][0] == ("guide", "chunk_0")
+        assert {key for key, _ in hits} == {("guide", "chunk_0"), ("faq", "chunk_0")}
+        assert index.search("unrelated words") == []
+        
+        assert index.remove_document("guide") == 2
+        assert len(index) == 1
+        assert [key for key, _ in index.search("lambda cold")] == [("faq", "chunk_0")]
+    
+    def test_retriever_scores_only_lexical_candidates(self):
+        """lexical_prefilter 모드는 어휘 후보만 벡터 점수 계산하는지 테스트"""
+        from src.rag.lexical_index import BM25Index
+        
+        store = MockVectorStore()
+        index = BM25Index()
+        texts = {
+            "doc0": "serverless vector search on lambda",
+            "doc1": "python packaging guide",
+            "doc2": "vector search with numpy matrices",
+        }
+        # doc1 임베딩이 쿼리와 가장 가깝지만 쿼리 용어를 포함하지 않음
+        embeddings = {"doc0": [0.5, 0.5], "doc1": [1.0, 0.0], "doc2": [0.2, 0.8]}
+        for doc_id, text in texts.items():
+            store.add_documents([VectorDocument(doc_id, "chunk_0", text, embeddings[doc_id], {})])
+            index.add(doc_id, "chunk_0", text)
+        
+        embedder = Mock()
+        embedder.embed_text.return_value = [1.0, 0.0]
+        retriever = RAGRetriever(store, embedder, k=3, retrieval_mode="lexical_prefilter", lexical_index=index)
+        
+        results = retriever.get_relevant_documents("vector search")
+        assert [d.metadata["document_id"] for d in results] == ["doc0", "doc2"]
+        
+        # ANN 후보를 합치면 벡터로만 가까운 문서도 포함
+        retriever.ann_candidates = 1
+        results = retriever.get_relevant_documents("vector search")
+        assert [d.metadata["document_id"] for d in results] == ["doc1", "doc0", "doc2"]
+        
+        # 일치하는 용어가 없으면 전체 벡터 검색으로 대체
+        retriever.ann_candidates = 0
+        assert len(retriever.get_relevant_documents("kubernetes")) == 3
+        
+        with pytest.raises(ValueError):
+            RAGRetriever(store, embedder, retrieval_mode="lexical_prefilter")
+
+
+class TestCoarseRetrieval:
+    """저차원 coarse 인덱스 및 coarse 검색 모드 테스트 클래스"""
+    
+    def _corpus(self, n=200, dim=32):
+        import numpy as np
+        
+        rng = np.random.default_rng(0)
+        # 앞쪽 차원에 분산이 몰린 임베딩 (Matryoshka 학습 모델과 유사)
+        scales = np.linspace(2.0, 0.1, dim)
+        return [
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", (rng.normal(size=dim) * scales).tolist(), {})
+            for i in range(n)
+        ]
+    
+    @pytest.mark.parametrize("projection", ["prefix", "pca"])
+    def test_coarse_mode_matches_exact_top_k(self, projection):
+        """coarse 후보 재점수 계산 결과가 전체 벡터 검색과 거의 같은지 테스트"""
+        import numpy as np
+        from src.vectorstore.coarse_index import CoarseIndex
+        
+        docs = self._corpus()
+        store = MockVectorStore()
+        store.add_documents(docs)
+        coarse = CoarseIndex.from_documents(docs, dimension=8, projection=projection)
+        assert len(coarse) == 200
+        
+        embedder = Mock()
+        retriever = RAGRetriever(store, embedder, k=3, retrieval_mode="coarse", coarse_index=coarse, coarse_top_n=40)
+        rng = np.random.default_rng(1)
+        found = 0
+        for i in range(0, 200, 20):
+            query = (np.asarray(docs[i].embedding) + 0.1 * rng.normal(size=32)).tolist()
+            embedder.embed_text.return_value = query
+            results = [d.metadata["document_id"] for d in retriever.get_relevant_documents("q")]
+            expected = [d.document_id for d in store.similarity_search(query, k=3)]
+            assert results[0] == expected[0] == f"doc{i}"
+            found += len(set(results) & set(expected))
+        assert found / 30 >= 0.8
+    
+    def test_index_maintenance_and_validation(self):
+        """문서 교체/삭제, 빈 인덱스 대체, 설정 검증 테스트"""
+        from src.vectorstore.coarse_index import CoarseIndex
+        
+        docs = self._corpus(n=10)
+        coarse = CoarseIndex(dimension=4)
+        coarse.add_documents(docs)
+        coarse.add_documents(docs[:1])
+        assert len(coarse) == 10
+        assert coarse.remove_document("doc0") == 1
+        assert ("doc0", "chunk_0") not in {key for key, _ in coarse.search(docs[0].embedding, top_n=10)}
+        
+        store = MockVectorStore()
+        store.add_documents(docs)
+        embedder = Mock()
+        embedder.embed_text.return_value = docs[5].embedding
+        retriever = RAGRetriever(store, embedder, k=2, retrieval_mode="coarse", coarse_index=CoarseIndex(dimension=4))
+        assert retriever.get_relevant_documents("q")[0].metadata["document_id"] == "doc5"
+        
+        with pytest.raises(ValueError):
+            RAGRetriever(store, embedder, retrieval_mode="coarse")
+        with pytest.raises(ValueError):
+            CoarseIndex(projection="random")
+        with pytest.raises(ValueError):
+            CoarseIndex.from_documents(docs, dimension=4).fit([d.embedding for d in docs])
+
+
+class TestQueryResultCache:
+    """쿼리 결과 캐시 테스트 클래스"""
+    
+    def test_keys_lru_ttl_and_versions(self, monkeypatch):
+        """키 계산, LRU 제거, TTL 만료, 쓰기 버전 무효화 테스트"""
+        from src.rag import query_cache
+        from src.rag.query_cache import QueryResultCache
+        
+        cache = QueryResultCache(max_entries=2, ttl_seconds=10)
+        key = cache.make_key([0.3, -0.4, 0.0], k=3)
+        # 크기만 다르거나 반올림 자릿수 이하의 차이는 같은 키
+        assert cache.make_key([3.0, -4.0, -0.0], k=3) == key
+        assert cache.make_key([0.3 + 1e-7, -0.4, 0.0], k=3) == key
+        assert cache.make_key([0.3, -0.4, 0.0], k=4) != key
+        assert cache.make_key([0.3, -0.4, 0.0], k=3, filter_metadata={"src": "a"}) != key
+        assert cache.make_key([0.0, 0.0, 0.0], k=3) is None
+        
+        now = [100.0]
+        monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+        cache.put("a", 1, ["A"])
+        cache.put("b", 1, ["B"])
+        assert cache.get("a", 1) == ["A"]
+        cache.put("c", 1, ["C"])  # 가장 오래 사용하지 않은 b 제거
+        assert cache.get("b", 1) is None
+        assert cache.get("a", 2) is None  # 쓰기 버전이 바뀜
+        now[0] += 11
+        assert cache.get("c", 1) is None  # TTL 만료
+        
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 3)
+        assert stats["hit_ratio"] == pytest.approx(0.25)
+        assert (stats["evictions"], stats["invalidations"], stats["expirations"]) == (1, 1, 1)
+        assert stats["entries"] == 0
+    
+    def test_retriever_cache(self, tmp_path):
+        """같은 질문은 검색을 생략하고, 스토어 쓰기 후에는 다시 검색하는지 테스트"""
+        from src.rag.query_cache import QueryResultCache
+        from src.vectorstore.local_store import LocalVectorStore
+        
+        for store in (MockVectorStore(), LocalVectorStore(str(tmp_path), compact_threshold=2)):
+            store.add_documents([VectorDocument("doc1", "chunk_0", "first", [1.0, 0.0], {})])
+            embedder = Mock()
+            embedder.embed_text.return_value = [1.0, 0.1]
+            cache = QueryResultCache()
+            retriever = RAGRetriever(store, embedder, k=1, result_cache=cache)
+            
+            with patch.object(store, "similarity_search", wraps=store.similarity_search) as search:
+                assert retriever.get_relevant_documents("q")[0].page_content == "first"
+                assert retriever.get_relevant_documents("q again")[0].page_content == "first"
+                assert search.call_count == 1
+                
+                store.add_documents([VectorDocument("doc2", "chunk_0", "second", [1.0, 0.1], {})])
+                assert retriever.get_relevant_documents("q")[0].page_content == "second"
+                assert search.call_count == 2
+            assert cache.stats()["invalidations"] == 1
+        
+        # 쓰기 버전을 알 수 없는 스토어는 캐시하지 않음
+        store = Mock()
+        store.write_version.return_value = None
+        store.similarity_search.return_value = []
+        retriever = RAGRetriever(store, Mock(embed_text=Mock(return_value=[1.0, 0.0])), result_cache=cache)
+        retriever.get_relevant_documents("q")
+        retriever.get_relevant_documents("q")
+        assert store.similarity_search.call_count == 2
@@ -3,8 +3,12 @@
 Mock VectorStore 기반 테스트
 """
 
+import json
+import os
+import threading
 import pytest
 import numpy as np
+from boto3.dynamodb.types import Binary
 from src.vectorstore.mock_store import MockVectorStore
 from src.vectorstore.base import VectorDocument
 from src.utils.errors import VectorStoreError
@@ -232,6 +236,23 @@ class TestMockVectorStore:
         results = store.similarity_search(query_embedding, k=10)
         assert all(result.document_id != "doc1" for result in results)
     
+    def test_delete_does_not_touch_prefixed_ids(self):
+        """ID 접두사가 겹치는 문서는 삭제되지 않는지 테스트"""
+        store = MockVectorStore()
+        
+        store.add_documents([
+            VectorDocument("doc", "1_a", "doc chunk", [1.0, 0.0], {}),
+            VectorDocument("doc_1", "a", "other document", [0.0, 1.0], {}),
+            VectorDocument("doc", "2", "doc chunk 2", [1.0, 1.0], {}),
+        ])
+        assert len(store.documents) == 3
+        assert store.get_document("doc").chunk_id == "1_a"
+        
+        store.delete_document("doc")
+        assert store.get_document("doc") is None
+        assert store.get_document("doc_1").text == "other document"
+        assert [r.document_id for r in store.similarity_search([1.0, 0.0], k=5)] == ["doc_1"]
+    
     def test_delete_nonexistent_document(self):
         """존재하지 않는 문서 삭제 테스트"""
         store = MockVectorStore()
@@ -323,3 +344,1965 @@ class TestMockVectorStore:
                 for j in range(i + 1, len(results))
             )
 
+
+
+class TestMatrixIndex:
+    """MatrixIndex (행렬 기반 정확 검색 엔진) 테스트 클래스"""
+    
+    def test_matches_brute_force(self):
+        """행렬 검색 결과가 brute-force 코사인 순위와 일치하는지 테스트"""
+        from src.vectorstore.matrix_index import MatrixIndex
+        
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(500, 32))
+        index = MatrixIndex()
+        index.add_batch(list(range(500)), vectors)
+        
+        query = rng.normal(size=32)
+        expected = np.argsort(
+            -(vectors @ query) / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+        )[:10]
+        
+        hits = index.search(query, k=10)
+        assert [key for key, _ in hits] == expected.tolist()
+        assert all(hits[i][1] >= hits[i + 1][1] for i in range(len(hits) - 1))
+    
+    def test_remove_keeps_matrix_contiguous(self):
+        """삭제 후에도 남은 키와 행이 일관적인지 테스트"""
+        from src.vectorstore.matrix_index import MatrixIndex
+        
+        index = MatrixIndex(initial_capacity=2)
+        for i in range(5):
+            vec = np.zeros(8)
+            vec[i] = 1.0
+            index.add(f"k{i}", vec)
+        
+        assert index.remove("k1")
+        assert not index.remove("k1")
+        assert len(index) == 4
+        assert index.vectors.shape == (4, 8)
+        
+        query = np.zeros(8)
+        query[4] = 1.0
+        assert index.search(query, k=1)[0][0] == "k4"
+    
+    def test_zero_vector_not_indexed(self):
+        """영벡터는 인덱싱되지 않는지 테스트"""
+        from src.vectorstore.matrix_index import MatrixIndex
+        
+        index = MatrixIndex()
+        assert not index.add("zero", [0.0] * 4)
+        assert "zero" not in index
+    
+    def test_dimension_mismatch(self):
+        """차원이 다른 벡터 추가 시 예외 발생 테스트"""
+        from src.vectorstore.matrix_index import MatrixIndex
+        
+        index = MatrixIndex(dimension=4)
+        with pytest.raises(ValueError):
+            index.add("bad", [1.0] * 3)
+    
+    def test_store_overwrite_same_chunk(self):
+        """같은 청크를 다시 추가하면 임베딩이 교체되는지 테스트"""
+        store = MockVectorStore()
+        
+        old = VectorDocument("doc1", "chunk_1", "old", [1.0, 0.0], {})
+        new = VectorDocument("doc1", "chunk_1", "new", [0.0, 1.0], {})
+        other = VectorDocument("doc2", "chunk_1", "other", [0.7, 0.7], {})
+        store.add_documents([old, other])
+        store.add_documents([new])
+        
+        results = store.similarity_search([0.0, 1.0], k=2)
+        assert [r.text for r in results] == ["new", "other"]
+
+
+class TestHNSWVectorStore:
+    """HNSWVectorStore 테스트 클래스"""
+    
+    def _random_docs(self, n, dim=32, seed=0):
+        rng = np.random.default_rng(seed)
+        vectors = rng.normal(size=(n, dim))
+        docs = [
+            VectorDocument(
+                document_id=f"doc{i // 4}",
+                chunk_id=f"chunk_{i % 4}",
+                text=f"Document {i}",
+                embedding=vectors[i].tolist(),
+                metadata={"group": "even" if i % 2 == 0 else "odd"}
+            )
+            for i in range(n)
+        ]
+        return docs, vectors
+    
+    def test_recall_against_exact_search(self):
+        """근사 검색 recall이 정확 검색 대비 충분히 높은지 테스트"""
+        from src.vectorstore.hnsw_store import HNSWVectorStore
+        
+        docs, vectors = self._random_docs(600)
+        store = HNSWVectorStore(M=8, ef_construction=64, ef_search=64, seed=1)
+        assert store.add_documents(docs)
+        
+        rng = np.random.default_rng(42)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        hits = 0
+        for _ in range(20):
+            query = rng.normal(size=32)
+            exact = set(np.argsort(-(normalized @ query))[:10].tolist())
+            results = store.similarity_search(query.tolist(), k=10)
+            found = {int(r.text.split()[1]) for r in results}
+            hits += len(exact & found)
+        
+        assert hits / 200 >= 0.9
+    
+    def test_delete_is_tombstoned(self):
+        """삭제된 문서가 검색 결과에서 제외되는지 테스트"""
+        from src.vectorstore.hnsw_store import HNSWVectorStore
+        
+        docs, vectors = self._random_docs(40)
+        store = HNSWVectorStore(M=4, ef_construction=32, seed=0)
+        store.add_documents(docs)
+        
+        assert store.delete_document("doc0")
+        assert store.get_document("doc0") is None
+        assert len(store) == 36
+        
+        results = store.similarity_search(vectors[0].tolist(), k=40)
+        assert len(results) == 36
+        assert all(r.document_id != "doc0" for r in results)
+    
+    def test_filter_and_reinsert(self):
+        """필터 검색 및 동일 청크 재삽입 테스트"""
+        from src.vectorstore.hnsw_store import HNSWVectorStore
+        
+        docs, vectors = self._random_docs(40)
+        store = HNSWVectorStore(M=4, ef_construction=32, seed=0)
+        store.add_documents(docs)
+        
+        results = store.similarity_search(vectors[1].tolist(), k=5, filter_metadata={"group": "odd"})
+        assert len(results) == 5
+        assert all(r.metadata["group"] == "odd" for r in results)
+        
+        replaced = VectorDocument("doc0", "chunk_0", "replaced", vectors[39].tolist(), {})
+        store.add_documents([replaced])
+        assert len(store) == 40
+        
+        store.rebuild()
+        assert len(store) == 40
+        assert store.similarity_search(vectors[39].tolist(), k=2)[0].text in ("replaced", "Document 39")
+
+
+class TestIVFVectorStore:
+    """IVFVectorStore 테스트 클래스"""
+    
+    def _clustered_docs(self, n_clusters=8, per_cluster=50, dim=16, seed=0):
+        rng = np.random.default_rng(seed)
+        centers = rng.normal(size=(n_clusters, dim)) * 5
+        vectors = np.concatenate([
+            center + rng.normal(size=(per_cluster, dim)) for center in centers
+        ])
+        docs = [
+            VectorDocument(
+                document_id=f"doc{i}",
+                chunk_id="chunk_1",
+                text=f"Document {i}",
+                embedding=vectors[i].tolist(),
+                metadata={"parity": i % 2}
+            )
+            for i in range(len(vectors))
+        ]
+        return docs, vectors
+    
+    def test_untrained_store_is_exact(self):
+        """학습 전에는 정확 검색으로 동작하는지 테스트"""
+        from src.vectorstore.ivf_store import IVFVectorStore
+        
+        docs, vectors = self._clustered_docs(per_cluster=5)
+        store = IVFVectorStore(n_lists=4, auto_train=False)
+        store.add_documents(docs)
+        
+        assert not store.is_trained
+        results = store.similarity_search(vectors[3].tolist(), k=1)
+        assert results[0].document_id == "doc3"
+    
+    def test_auto_train_and_nprobe(self):
+        """자동 학습 후 nprobe 설정에 따른 검색 테스트"""
+        from src.vectorstore.ivf_store import IVFVectorStore
+        
+        docs, vectors = self._clustered_docs()
+        store = IVFVectorStore(n_lists=8, nprobe=1, min_train_size=100, seed=0)
+        store.add_documents(docs)
+        
+        assert store.is_trained
+        assert sum(store.list_sizes()) == len(docs)
+        
+        # 전체 리스트를 탐색하면 정확 검색과 동일
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        query = vectors[123]
+        exact = np.argsort(-(normalized @ query))[:10]
+        results = store.similarity_search(query.tolist(), k=10, nprobe=8)
+        assert [r.document_id for r in results] == [f"doc{i}" for i in exact]
+        
+        # nprobe=1에서도 가장 가까운 문서는 찾아야 함
+        assert store.similarity_search(query.tolist(), k=1)[0].document_id == "doc123"
+    
+    def test_retrain_filter_and_delete(self):
+        """재학습, 필터 검색 및 삭제 테스트"""
+        from src.vectorstore.ivf_store import IVFVectorStore
+        
+        docs, vectors = self._clustered_docs()
+        store = IVFVectorStore(n_lists=4, auto_train=False, seed=0)
+        store.add_documents(docs)
+        store.train()
+        store.train(n_lists=8)
+        assert len(store.list_sizes()) == 8
+        
+        results = store.similarity_search(vectors[0].tolist(), k=5, filter_metadata={"parity": 1}, nprobe=8)
+        assert len(results) == 5
+        assert all(r.metadata["parity"] == 1 for r in results)
+        
+        assert store.delete_document("doc0")
+        assert store.get_document("doc0") is None
+        assert len(store) == len(docs) - 1
+        assert store.similarity_search(vectors[0].tolist(), k=1, nprobe=8)[0].document_id != "doc0"
+
+
+class FakeDynamoTable:
+    """테스트용 인메모리 DynamoDB Table (boto3 resource Table의 일부 API만 흉내)"""
+    
+    def __init__(self, page_size=100):
+        self.items = {}
+        self.page_size = page_size
+        self.scan_calls = 0
+        self.requests = []
+    
+    @classmethod
+    def _evaluate(cls, condition, item):
+        """boto3 conditions 객체 평가 (=, AND만 지원)"""
+        expression = condition.get_expression()
+        operator = expression["operator"]
+        values = expression["values"]
+        if operator == "AND":
+            return cls._evaluate(values[0], item) and cls._evaluate(values[1], item)
+        if operator == "=":
+            return values[0].name in item and item[values[0].name] == values[1]
+        raise NotImplementedError(operator)
+    
+    def _key(self, item):
+        return (item["document_id"], item["chunk_id"])
+    
+    @staticmethod
+    def _project(item, kwargs):
+        """ProjectionExpression 적용 (치환된 속성 이름 지원)"""
+        item = dict(item)
+        expression = kwargs.get("ProjectionExpression")
+        if expression is None:
+            return item
+        names = kwargs.get("ExpressionAttributeNames", {})
+        attributes = [names.get(token.strip(), token.strip()) for token in expression.split(",")]
+        return {name: item[name] for name in attributes if name in item}
+    
+    def put_item(self, Item):
+        # 실제 테이블처럼 바이너리 속성은 Binary로 반환
+        stored = {name: Binary(value) if isinstance(value, bytes) else value for name, value in Item.items()}
+        self.items[self._key(stored)] = stored
+    
+    def delete_item(self, Key):
+        self.items.pop(self._key(Key), None)
+    
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, **kwargs):
+        if UpdateExpression.startswith("ADD epoch"):
+            item = self.items.setdefault(self._key(Key), dict(Key))
+            item["epoch"] = item.get("epoch", 0) + ExpressionAttributeValues[":one"]
+            return
+        # "SET <속성> = :<값> [REMOVE <속성>]" 형식과 conditions 객체 조건만 지원
+        names = kwargs.get("ExpressionAttributeNames", {})
+        condition = kwargs.get("ConditionExpression")
+        item = self.items.get(self._key(Key))
+        if condition is not None and not isinstance(condition, str) and (
+            item is None or not self._evaluate(condition, item)
+        ):
+            from botocore.exceptions import ClientError
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        set_clause, _, remove_clause = UpdateExpression[len("SET "):].partition(" REMOVE ")
+        name, placeholder = [part.strip() for part in set_clause.split("=")]
+        value = ExpressionAttributeValues[placeholder]
+        item[names.get(name, name)] = Binary(value) if isinstance(value, bytes) else value
+        if remove_clause:
+            item.pop(names.get(remove_clause.strip(), remove_clause.strip()), None)
+    
+    def get_item(self, Key, **kwargs):
+        item = self.items.get(self._key(Key))
+        return {"Item": dict(item)} if item is not None else {}
+    
+    def batch_writer(self):
+        table = self
+        
+        class _Writer:
+            def __enter__(self):
+                return table
+            
+            def __exit__(self, *args):
+                return False
+        
+        return _Writer()
+    
+    def scan(self, ExclusiveStartKey=None, Segment=0, TotalSegments=1, FilterExpression=None, **kwargs):
+        self.scan_calls += 1
+        self.requests.append(("scan", FilterExpression, kwargs))
+        keys = [k for i, k in enumerate(sorted(self.items)) if i % TotalSegments == Segment]
+        start = 0
+        if ExclusiveStartKey is not None:
+            start = keys.index(self._key(ExclusiveStartKey)) + 1
+        page = keys[start:start + self.page_size]
+        response = {"Items": [
+            self._project(self.items[k], kwargs) for k in page
+            if FilterExpression is None or self._evaluate(FilterExpression, self.items[k])
+        ]}
+        if start + self.page_size < len(keys):
+            last = page[-1]
+            response["LastEvaluatedKey"] = {"document_id": last[0], "chunk_id": last[1]}
+        return response
+    
+    def query(self, KeyConditionExpression, ExpressionAttributeValues=None, Limit=None,
+              IndexName=None, FilterExpression=None, ExclusiveStartKey=None, **kwargs):
+        self.requests.append(("query", IndexName, kwargs))
+        if not isinstance(KeyConditionExpression, str):
+            keys = [k for k, v in sorted(self.items.items()) if self._evaluate(KeyConditionExpression, v)]
+            if ExclusiveStartKey is not None:
+                # 페이지 사이에 삭제된 키가 있어도 키 순서로 이어서 읽음
+                keys = [k for k in keys if k > self._key(ExclusiveStartKey)]
+            page = keys[:self.page_size]
+            response = {"Items": [
+                self._project(self.items[k], kwargs) for k in page
+                if FilterExpression is None or self._evaluate(FilterExpression, self.items[k])
+            ]}
+            if len(keys) > self.page_size:
+                response["LastEvaluatedKey"] = {"document_id": page[-1][0], "chunk_id": page[-1][1]}
+            return response
+        document_id = ExpressionAttributeValues[":doc_id"]
+        items = [dict(v) for k, v in sorted(self.items.items()) if k[0] == document_id]
+        return {"Items": items[:Limit] if Limit else items}
+
+
+class FakeDynamoResource:
+    """테스트용 DynamoDB 서비스 리소스 (Table, batch_get_item)"""
+    
+    def __init__(self, table, unprocessed_rounds=0, unprocessed_write_rounds=0):
+        self.table = table
+        self.unprocessed_rounds = unprocessed_rounds
+        self.unprocessed_write_rounds = unprocessed_write_rounds
+        self.batch_get_calls = []
+        self.batch_write_calls = []
+    
+    def Table(self, name):
+        return self.table
+    
+    def batch_get_item(self, RequestItems):
+        self.batch_get_calls.append(RequestItems)
+        responses = {}
+        unprocessed = {}
+        for table_name, request in RequestItems.items():
+            keys = request["Keys"]
+            if self.unprocessed_rounds > 0:
+                # 절반만 처리하고 나머지는 UnprocessedKeys로 반환
+                self.unprocessed_rounds -= 1
+                keys, rest = keys[:len(keys) // 2], keys[len(keys) // 2:]
+                if rest:
+                    unprocessed[table_name] = {**request, "Keys": rest}
+            responses[table_name] = [
+                self.table._project(self.table.items[self.table._key(key)], request)
+                for key in keys if self.table._key(key) in self.table.items
+            ]
+        return {"Responses": responses, "UnprocessedKeys": unprocessed}
+    
+    def batch_write_item(self, RequestItems):
+        self.batch_write_calls.append(RequestItems)
+        unprocessed = {}
+        for table_name, requests in RequestItems.items():
+            if self.unprocessed_write_rounds > 0:
+                # 절반만 처리하고 나머지는 UnprocessedItems로 반환
+                self.unprocessed_write_rounds -= 1
+                requests, rest = requests[:len(requests) // 2], requests[len(requests) // 2:]
+                if rest:
+                    unprocessed[table_name] = rest
+            for request in requests:
+                if "PutRequest" in request:
+                    self.table.put_item(Item=request["PutRequest"]["Item"])
+                else:
+                    self.table.delete_item(Key=request["DeleteRequest"]["Key"])
+        return {"UnprocessedItems": unprocessed}
+
+
+def make_dynamodb_store(table, resource=None, **kwargs):
+    """FakeDynamoTable을 사용하는 DynamoDBVectorStore 생성"""
+    from unittest.mock import patch
+    from src.vectorstore.dynamodb_store import DynamoDBVectorStore
+    
+    resource = resource or FakeDynamoResource(table)
+    with patch("src.vectorstore.dynamodb_store.boto3") as mock_boto3:
+        mock_boto3.resource.return_value = resource
+        store = DynamoDBVectorStore(table_name="test-table", **kwargs)
+    # 세그먼트/쓰기 스레드도 같은 Fake 테이블 사용
+    store._segment_table = lambda: table
+    store._thread_resource = lambda: resource
+    return store
+
+
+class TestEmbeddingCodec:
+    """임베딩 바이너리 인코딩 테스트 클래스"""
+    
+    def test_roundtrip(self):
+        """float32 바이너리 인코딩/디코딩 왕복 테스트"""
+        from src.vectorstore.embedding_codec import encode_embedding, decode_embedding
+        
+        embedding = [0.25, -1.5, 3.0]
+        blob = encode_embedding(embedding)
+        assert len(blob) == 12
+        assert decode_embedding(Binary(blob)).tolist() == embedding
+    
+    def test_reads_legacy_json(self):
+        """기존 JSON 문자열 형식 읽기 테스트"""
+        from src.vectorstore.embedding_codec import decode_embedding, is_legacy_embedding
+        
+        legacy = json.dumps([0.5, 0.25])
+        assert is_legacy_embedding(legacy)
+        assert decode_embedding(legacy).tolist() == [0.5, 0.25]
+        assert decode_embedding(None).size == 0
+
+
+class TestDynamoDBVectorStore:
+    """DynamoDBVectorStore 테스트 클래스 (FakeDynamoTable 사용)"""
+    
+    def test_binary_storage_and_search(self):
+        """바이너리로 저장한 임베딩 검색 테스트"""
+        table = FakeDynamoTable()
+        store = make_dynamodb_store(table)
+        
+        docs = [
+            VectorDocument("doc1", "chunk_1", "first", [1.0, 0.0], {"lang": "ko"}),
+            VectorDocument("doc2", "chunk_1", "second", [0.0, 1.0], {"lang": "en"}),
+        ]
+        assert store.add_documents(docs)
+        assert isinstance(table.items[("doc1", "chunk_1")]["embedding"], Binary)
+        
+        results = store.similarity_search([0.9, 0.1], k=1)
+        assert results[0].document_id == "doc1"
+        assert results[0].embedding == [1.0, 0.0]
+    
+    def test_migrate_legacy_embeddings(self):
+        """JSON 임베딩 마이그레이션 테스트"""
+        table = FakeDynamoTable()
+        store = make_dynamodb_store(table)
+        table.items[("old", "chunk_1")] = {
+            "document_id": "old",
+            "chunk_id": "chunk_1",
+            "text": "legacy",
+            "embedding": json.dumps([0.0, 1.0]),
+            "metadata": "{}",
+        }
+        store.add_documents([VectorDocument("new", "chunk_1", "new", [1.0, 0.0], {})])
+        
+        # 마이그레이션 전에도 두 형식 모두 검색 가능
+        assert store.similarity_search([0.0, 1.0], k=1)[0].document_id == "old"
+        
+        assert store.migrate_embeddings() == 1
+        assert isinstance(table.items[("old", "chunk_1")]["embedding"], Binary)
+        assert store.migrate_embeddings() == 0
+        assert store.get_document("old").embedding == [0.0, 1.0]
+    
+    @pytest.mark.parametrize("enable_cache", [True, False])
+    def test_parallel_segmented_scan(self, enable_cache):
+        """여러 페이지/세그먼트에 걸친 병렬 스캔 결과가 정확 검색과 같은지 테스트"""
+        table = FakeDynamoTable(page_size=16)
+        store = make_dynamodb_store(table, scan_segments=4, enable_cache=enable_cache)
+        
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(250, 8))
+        store.add_documents([
+            VectorDocument(f"doc{i:03d}", "chunk_1", f"Document {i}", vectors[i].tolist(), {"parity": i % 2})
+            for i in range(250)
+        ])
+        
+        query = rng.normal(size=8)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = [f"doc{i:03d}" for i in np.argsort(-(normalized @ query))[:10]]
+        
+        results = store.similarity_search(query.tolist(), k=10)
+        assert [r.document_id for r in results] == expected
+        # 첫 페이지만 읽지 않고 모든 세그먼트를 끝까지 읽어야 함
+        assert table.scan_calls > 4
+        
+        filtered = store.similarity_search(query.tolist(), k=5, filter_metadata={"parity": 0})
+        assert len(filtered) == 5
+        assert all(r.metadata["parity"] == 0 for r in filtered)
+    
+    @pytest.mark.parametrize("enable_cache", [True, False])
+    def test_two_phase_fetch(self, enable_cache):
+        """점수 계산 스캔은 키/임베딩만 읽고, 상위 k개 텍스트는 BatchGetItem 1회로 조회하는지 테스트"""
+        table = FakeDynamoTable(page_size=16)
+        resource = FakeDynamoResource(table, unprocessed_rounds=1)
+        store = make_dynamodb_store(table, resource=resource, scan_segments=2, enable_cache=enable_cache)
+        
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(60, 8))
+        store.add_documents([
+            VectorDocument(f"doc{i:02d}", "chunk_1", "long text " * 100, vectors[i].tolist(), {"parity": i % 2})
+            for i in range(60)
+        ])
+        
+        results = store.similarity_search(vectors[7].tolist(), k=4)
+        assert results[0].document_id == "doc07"
+        assert results[0].text == "long text " * 100
+        assert results[0].metadata == {"parity": 1}
+        assert results[0].embedding == pytest.approx(vectors[7].tolist(), rel=1e-5)
+        
+        # 스캔에는 text가 포함되지 않음
+        for op, _, kwargs in table.requests:
+            if op == "scan":
+                assert "text" not in kwargs["ExpressionAttributeNames"].values()
+        # 처리되지 않은 키는 재시도 (요청 1건 + 재시도 1건)
+        assert len(resource.batch_get_calls) == 2
+        assert sum(len(call["test-table"]["Keys"]) for call in resource.batch_get_calls) == 4 + 2
+        
+        # 클라이언트 측 필터가 있으면 metadata만 추가로 프로젝션
+        filtered = store.similarity_search(vectors[7].tolist(), k=3, filter_metadata={"parity": 0})
+        assert all(r.metadata["parity"] == 0 for r in filtered)
+        if not enable_cache:
+            assert "metadata" in table.requests[-1][2]["ExpressionAttributeNames"].values()
+    
+    def test_invalid_segment_count(self):
+        """잘못된 세그먼트 수 설정 테스트"""
+        with pytest.raises(ValueError):
+            make_dynamodb_store(FakeDynamoTable(), scan_segments=0)
+
+    def test_scan_executor_reused_across_searches(self):
+        """검색마다 스레드 풀을 새로 만들지 않고 같은 스캔 스레드를 재사용하는지 테스트"""
+        table = FakeDynamoTable()
+        store = make_dynamodb_store(table, scan_segments=2, enable_cache=False)
+        threads = set()
+
+        def segment_table():
+            threads.add(threading.get_ident())
+            return table
+
+        store._segment_table = segment_table
+        store.add_documents([VectorDocument("doc1", "chunk_1", "first", [1.0, 0.0], {})])
+        for _ in range(5):
+            assert store.similarity_search([1.0, 0.0], k=1)[0].document_id == "doc1"
+        assert 1 <= len(threads) <= 2
+
+        with store:
+            pass
+        assert store.similarity_search([1.0, 0.0], k=1) == []
+
+    def test_warm_cache_and_invalidation(self):
+        """웜 캐시 hit 시 재스캔하지 않고, 쓰기 후에는 다시 적재하는지 테스트"""
+        table = FakeDynamoTable()
+        store = make_dynamodb_store(table, scan_segments=2)
+        store.add_documents([VectorDocument("doc1", "chunk_1", "first", [1.0, 0.0], {})])
+        
+        assert store.similarity_search([1.0, 0.0], k=1)[0].document_id == "doc1"
+        scans_after_load = table.scan_calls
+        
+        # 버전이 같으면 스캔 없이 캐시에서 응답
+        result = store.similarity_search([1.0, 0.0], k=1)[0]
+        assert result.text == "first"
+        assert result.embedding == pytest.approx([1.0, 0.0])
+        assert table.scan_calls == scans_after_load
+        
+        # 다른 인스턴스(다른 컨테이너)의 쓰기도 버전 아이템으로 감지
+        writer = make_dynamodb_store(table)
+        writer.add_documents([VectorDocument("doc2", "chunk_1", "second", [0.0, 3.0], {})])
+        result = store.similarity_search([0.0, 1.0], k=1)[0]
+        assert result.document_id == "doc2"
+        assert result.embedding == pytest.approx([0.0, 3.0])
+        assert table.scan_calls > scans_after_load
+        
+        stats = store.cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["rows"] == 2
+    
+    def test_large_document_delete_and_chunks(self):
+        """여러 쿼리 페이지에 걸친 문서의 병렬 삭제와 chunk_index 순서 조회 테스트"""
+        table = FakeDynamoTable(page_size=40)
+        resource = FakeDynamoResource(table, unprocessed_rounds=1)
+        store = make_dynamodb_store(table, resource=resource, write_workers=3)
+        
+        store.add_documents([
+            VectorDocument("manual", f"manual_chunk_{i}", f"part {i}", [1.0, float(i)], {"chunk_index": i})
+            for i in range(130)
+        ] + [VectorDocument("other", "other_chunk_0", "other", [0.0, 1.0], {"chunk_index": 0})])
+        
+        chunks = list(store.get_document_chunks("manual"))
+        assert [c.text for c in chunks] == [f"part {i}" for i in range(130)]
+        assert chunks[12].embedding == pytest.approx([1.0, 12.0])
+        # 정렬용 조회는 키 + 메타데이터만 프로젝션
+        query_attributes = [set(kwargs["ExpressionAttributeNames"].values()) for op, _, kwargs in table.requests if op == "query"]
+        assert query_attributes[0] == {"document_id", "chunk_id", "metadata"}
+        
+        resource.batch_write_calls.clear()
+        resource.unprocessed_write_rounds = 3
+        assert store.delete_document("manual")
+        assert not any(key[0] == "manual" for key in table.items)
+        assert ("other", "other_chunk_0") in table.items
+        # 130개 → 25개 단위 6건 + UnprocessedItems 재시도 3건
+        assert len(resource.batch_write_calls) == 6 + 3
+        assert store.last_write_stats["items"] == 130
+        assert all(len(call["test-table"]) <= 25 for call in resource.batch_write_calls)
+        assert list(store.get_document_chunks("manual")) == []
+        
+        with pytest.raises(ValueError):
+            make_dynamodb_store(FakeDynamoTable(), write_workers=0)
+    
+    def test_document_chunks_error_propagates(self, monkeypatch):
+        """청크 조회 실패 시 잘린 결과 대신 예외를 전파하는지 테스트"""
+        from src.vectorstore import dynamodb_store
+        
+        monkeypatch.setattr(dynamodb_store.time, "sleep", lambda seconds: None)
+        table = FakeDynamoTable(page_size=40)
+        resource = FakeDynamoResource(table)
+        store = make_dynamodb_store(table, resource=resource)
+        store.add_documents([
+            VectorDocument("manual", f"manual_chunk_{i}", f"part {i}", [1.0, float(i)], {"chunk_index": i})
+            for i in range(130)
+        ])
+        
+        # 첫 배치(100개)는 성공, 두 번째 배치는 재시도 후에도 UnprocessedKeys가 남음
+        chunks = store.get_document_chunks("manual")
+        assert [next(chunks).text for _ in range(100)][-1] == "part 99"
+        resource.unprocessed_rounds = 1000
+        with pytest.raises(RuntimeError):
+            next(chunks)
+
+
+class FakeS3Handler:
+    """테스트용 인메모리 S3DocumentHandler"""
+    
+    def __init__(self):
+        self.objects = {}
+        self.downloads = 0
+    
+    def upload_bytes(self, s3_key, data, content_type="application/octet-stream"):
+        import hashlib
+        self.objects[s3_key] = bytes(data)
+        return hashlib.md5(data).hexdigest()
+    
+    def download_file(self, s3_key, local_path, if_match=None):
+        if if_match and self.get_etag(s3_key) != if_match:
+            return False
+        self.downloads += 1
+        with open(local_path, "wb") as f:
+            f.write(self.objects[s3_key])
+        return True
+    
+    def get_etag(self, s3_key):
+        import hashlib
+        if s3_key not in self.objects:
+            return None
+        return hashlib.md5(self.objects[s3_key]).hexdigest()
+
+
+
+class FakeS3Client:
+    """테스트용 boto3 S3 클라이언트 (put_object/head_object/get_object/download_file만 지원)"""
+    
+    def __init__(self):
+        self.objects = {}
+    
+    @staticmethod
+    def _etag(data):
+        import hashlib
+        return '"' + hashlib.md5(data).hexdigest() + '"'
+    
+    @staticmethod
+    def _error(code, operation):
+        from botocore.exceptions import ClientError
+        return ClientError({"Error": {"Code": code}}, operation)
+    
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.objects[Key] = bytes(Body)
+        return {"ETag": self._etag(self.objects[Key])}
+    
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self._error("404", "HeadObject")
+        return {"ETag": self._etag(self.objects[Key])}
+    
+    def get_object(self, Bucket, Key, IfMatch=None):
+        import io
+        if Key not in self.objects:
+            raise self._error("NoSuchKey", "GetObject")
+        if IfMatch is not None and self._etag(self.objects[Key]).strip('"') != IfMatch.strip('"'):
+            raise self._error("PreconditionFailed", "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key])}
+    
+    def download_file(self, Bucket, Key, Filename, ExtraArgs=None, Callback=None, Config=None):
+        from boto3.s3.transfer import S3Transfer
+        # 실제 관리형 전송과 같이 허용되지 않은 ExtraArgs 키는 거부
+        for name in ExtraArgs or {}:
+            if name not in S3Transfer.ALLOWED_DOWNLOAD_ARGS:
+                raise ValueError(f"Invalid extra_args key '{name}'")
+        with open(Filename, "wb") as f:
+            f.write(self.get_object(Bucket, Key)["Body"].read())
+    
+    class exceptions:
+        from botocore.exceptions import ClientError
+
+
+def make_s3_handler(client):
+    """FakeS3Client를 사용하는 S3DocumentHandler 생성"""
+    from unittest.mock import patch
+    from src.ingestion.s3_handler import S3DocumentHandler
+    
+    with patch("src.ingestion.s3_handler.boto3") as mock_boto3:
+        mock_boto3.client.return_value = client
+        return S3DocumentHandler("test-bucket")
+
+
+class TestSnapshotVectorStore:
+    """S3 인덱스 스냅샷 테스트 클래스"""
+    
+    def _docs(self):
+        return [
+            VectorDocument("b_doc", "chunk_0", "b0", [0.0, 2.0, 0.0], {"src": "b"}),
+            VectorDocument("a_doc", "chunk_0", "a0", [1.0, 0.0, 0.0], {"src": "a"}),
+            VectorDocument("a_doc", "chunk_1", "a1", [0.0, 0.0, 1.0], {"src": "a"}),
+        ]
+    
+    def test_publish_and_search(self, tmp_path):
+        """스냅샷 게시 후 mmap 로드 및 검색 테스트"""
+        from src.vectorstore.snapshot import SnapshotPublisher, SnapshotVectorStore
+        
+        s3 = FakeS3Handler()
+        SnapshotPublisher(s3).publish(self._docs())
+        store = SnapshotVectorStore(s3, local_dir=str(tmp_path))
+        
+        assert isinstance(store._vectors, np.memmap)
+        results = store.similarity_search([0.0, 1.0, 0.1], k=2)
+        assert [r.text for r in results] == ["b0", "a1"]
+        assert results[0].embedding == pytest.approx([0.0, 2.0, 0.0])
+        
+        filtered = store.similarity_search([0.0, 1.0, 0.1], k=2, filter_metadata={"src": "a"})
+        assert [r.text for r in filtered] == ["a1", "a0"]
+        assert store.get_document("a_doc").chunk_id == "chunk_0"
+        assert not store.add_documents(self._docs())
+    
+    def test_etag_refresh(self, tmp_path):
+        """ETag가 같으면 재다운로드하지 않고, 바뀌면 다시 받는지 테스트"""
+        from src.vectorstore.snapshot import SnapshotPublisher, SnapshotVectorStore
+        
+        s3 = FakeS3Handler()
+        publisher = SnapshotPublisher(s3)
+        publisher.publish(self._docs())
+        
+        store = SnapshotVectorStore(s3, local_dir=str(tmp_path))
+        assert s3.downloads == 2
+        
+        # 같은 /tmp를 쓰는 새 인스턴스는 로컬 파일 재사용
+        SnapshotVectorStore(s3, local_dir=str(tmp_path))
+        assert s3.downloads == 2
+        assert not store.refresh()
+        
+        store_source = MockVectorStore()
+        store_source.add_documents(self._docs()[:1])
+        publisher.publish_from_store(store_source)
+        assert store.refresh()
+        assert s3.downloads == 4
+        assert len(store.get_all_documents()) == 1
+    
+    def test_overlapping_publish_not_mixed(self, tmp_path):
+        """매니페스트와 벡터 파일이 서로 다른 게시에서 온 경우 섞어서 적재하지 않는지 테스트"""
+        import json
+        from src.vectorstore.snapshot import SnapshotPublisher, SnapshotVectorStore
+        
+        s3 = FakeS3Handler()
+        publisher = SnapshotPublisher(s3)
+        publisher.publish(self._docs())
+        store = SnapshotVectorStore(s3, local_dir=str(tmp_path))
+        old_manifest = json.loads(s3.objects["index/manifest.json"])
+        
+        # 두 번째 게시의 벡터 파일만 올라간 상태에서 (다른 ETag의) 이전 매니페스트를 보게 됨
+        publisher.publish(self._docs()[:1])
+        s3.objects["index/manifest.json"] = json.dumps(old_manifest, indent=1).encode("utf-8")
+        assert not store.refresh()
+        assert len(store.get_all_documents()) == 3
+        
+        publisher.publish(self._docs()[:1])
+        assert store.refresh()
+        assert [d.text for d in store.get_all_documents()] == ["b0"]
+    
+    def test_s3_handler_conditional_download(self, tmp_path):
+        """실제 S3DocumentHandler로 게시/조건부 다운로드/ETag 불일치 재시도가 동작하는지 테스트"""
+        import json
+        from src.vectorstore.snapshot import SnapshotPublisher, SnapshotVectorStore
+        
+        client = FakeS3Client()
+        handler = make_s3_handler(client)
+        publisher = SnapshotPublisher(handler)
+        publisher.publish(self._docs())
+        store = SnapshotVectorStore(handler, local_dir=str(tmp_path))
+        assert len(store.get_all_documents()) == 3
+        
+        assert not handler.download_file("index/vectors.idx", str(tmp_path / "x"), if_match="stale")
+        assert not (tmp_path / "x").exists()
+        
+        old_manifest = json.loads(client.objects["index/manifest.json"])
+        publisher.publish(self._docs()[:1])
+        client.objects["index/manifest.json"] = json.dumps(old_manifest, indent=1).encode("utf-8")
+        assert not store.refresh()
+        assert len(store.get_all_documents()) == 3
+        
+        publisher.publish(self._docs()[:1])
+        assert store.refresh()
+        assert [d.text for d in store.get_all_documents()] == ["b0"]
+    
+    def test_legacy_snapshot(self, tmp_path):
+        """format_version 1 스냅샷(vectors.npy)도 읽을 수 있는지 테스트"""
+        import json
+        from src.vectorstore.snapshot import load_snapshot
+        
+        np.save(tmp_path / "vectors.npy", np.eye(2, dtype=np.float32))
+        (tmp_path / "manifest.json").write_text(json.dumps({
+            "format_version": 1, "count": 2, "dimension": 2,
+            "ids": [["a", "0"], ["b", "0"]], "texts": ["a", "b"], "metadata": [{}, {}],
+            "norms": [1.0, 2.0], "offsets": {"a": [0, 1], "b": [1, 2]},
+        }))
+        manifest, vectors = load_snapshot(str(tmp_path))
+        assert vectors.shape == (2, 2) and manifest["norms"] == [1.0, 2.0]
+        with pytest.raises(ValueError):
+            load_snapshot(str(tmp_path), dimension=3)
+
+
+class TestIndexFile:
+    """체크섬 인덱스 파일 형식 테스트 클래스"""
+    
+    def _write(self, path, rows=5, dimension=8, **kwargs):
+        from src.vectorstore.index_file import write_index_file
+        
+        vectors = np.random.default_rng(0).normal(size=(rows, dimension)).astype(np.float32)
+        ids = [(f"doc{i // 2}", f"chunk_{i % 2}") for i in range(rows)]
+        write_index_file(str(path), vectors, ids, norms=np.arange(rows, dtype=np.float32),
+                         offsets={"doc0": [0, 2]}, **kwargs)
+        return vectors, ids
+    
+    def test_round_trip(self, tmp_path):
+        """memmap 로드, 블록 정렬, ID/오프셋 테이블 왕복 테스트"""
+        from src.vectorstore.index_file import BLOCK_ALIGNMENT, read_index_file
+        
+        path = tmp_path / "vectors.idx"
+        vectors, ids = self._write(path)
+        index = read_index_file(str(path), dimension=8)
+        
+        assert isinstance(index.vectors, np.memmap) and not index.vectors.flags.writeable
+        assert index.vectors.offset % BLOCK_ALIGNMENT == 0
+        np.testing.assert_array_equal(index.vectors, vectors)
+        np.testing.assert_array_equal(index.norms, np.arange(5))
+        assert index.ids == ids and index.offsets == {"doc0": [0, 2]}
+        
+        self._write(path, dtype="float16")
+        half = read_index_file(str(path))
+        assert half.vectors.dtype == np.float16
+        np.testing.assert_allclose(half.vectors, vectors, atol=1e-2)
+        
+        self._write(path, rows=0)
+        assert len(read_index_file(str(path), dimension=384)) == 0
+    
+    def test_rejects_bad_files(self, tmp_path):
+        """손상/잘림/차원 불일치/다른 형식 파일 거부 테스트"""
+        from src.vectorstore.index_file import HEADER_SIZE, read_index_file
+        
+        path = tmp_path / "vectors.idx"
+        self._write(path)
+        data = path.read_bytes()
+        
+        with pytest.raises(ValueError, match="dimension"):
+            read_index_file(str(path), dimension=384)
+        
+        corrupted = bytearray(data)
+        corrupted[HEADER_SIZE + 3] ^= 0xFF
+        path.write_bytes(bytes(corrupted))
+        with pytest.raises(ValueError, match="payload checksum"):
+            read_index_file(str(path))
+        # 검증을 끄면 열림 (호출자가 책임지는 경우)
+        assert len(read_index_file(str(path), verify=False)) == 5
+        
+        corrupted = bytearray(data)
+        corrupted[12] ^= 0x01  # 헤더의 dimension 필드
+        path.write_bytes(bytes(corrupted))
+        with pytest.raises(ValueError, match="header checksum"):
+            read_index_file(str(path))
+        
+        path.write_bytes(data[:-10])
+        with pytest.raises(ValueError, match="size mismatch"):
+            read_index_file(str(path))
+        
+        np.save(tmp_path / "vectors.npy", np.zeros((4, 4), dtype=np.float32))
+        with pytest.raises(ValueError, match="Not a vector index"):
+            read_index_file(str(tmp_path / "vectors.npy"))
+
+
+class TestMetadataIndex:
+    """메타데이터 역색인 테스트 클래스"""
+    
+    def test_candidates_intersection(self):
+        """필드별 색인 교집합 테스트"""
+        from src.vectorstore.metadata_index import MetadataIndex
+        
+        index = MetadataIndex()
+        index.add("a", {"tenant": "t1", "source": "wiki"})
+        index.add("b", {"tenant": "t1", "source": "pdf"})
+        index.add("c", {"tenant": "t2", "source": "wiki", "tags": ["x"]})
+        
+        assert index.candidates({"tenant": "t1"}) == {"a", "b"}
+        assert index.candidates({"tenant": "t1", "source": "wiki"}) == {"a"}
+        assert index.candidates({"tenant": "t3"}) == set()
+        # 해시 불가능한 필터 값은 색인으로 평가하지 않음
+        assert index.candidates({"tags": ["x"]}) is None
+        
+        index.remove("a", {"tenant": "t1", "source": "wiki"})
+        assert index.candidates({"source": "wiki"}) == {"c"}
+    
+    def test_store_filter_uses_index_after_updates(self):
+        """문서 교체/삭제 후에도 필터 검색 결과가 정확한지 테스트"""
+        store = MockVectorStore()
+        docs = [
+            VectorDocument(f"doc{i}", "chunk_1", f"Document {i}", [1.0, float(i)], {"tenant": f"t{i % 3}"})
+            for i in range(30)
+        ]
+        store.add_documents(docs)
+        
+        results = store.similarity_search([1.0, 0.0], k=30, filter_metadata={"tenant": "t1"})
+        assert len(results) == 10
+        assert all(r.metadata["tenant"] == "t1" for r in results)
+        
+        # 메타데이터가 바뀐 재수집 및 삭제 반영
+        store.add_documents([VectorDocument("doc1", "chunk_1", "moved", [1.0, 1.0], {"tenant": "t2"})])
+        store.delete_document("doc4")
+        results = store.similarity_search([1.0, 0.0], k=30, filter_metadata={"tenant": "t1"})
+        assert len(results) == 8
+        assert all(r.document_id not in ("doc1", "doc4") for r in results)
+        
+        # 리스트 값 필터는 전체 평가로 대체
+        store.add_documents([VectorDocument("tagged", "chunk_1", "tagged", [1.0, 0.0], {"tags": ["a", "b"]})])
+        results = store.similarity_search([1.0, 0.0], k=5, filter_metadata={"tags": ["a", "b"]})
+        assert [r.document_id for r in results] == ["tagged"]
+    
+    def _tenant_docs(self):
+        return [
+            VectorDocument(
+                f"doc{i:02d}", "chunk_1", f"Document {i}", [1.0, i / 10.0],
+                {"tenant": f"t{i % 3}", "source": "wiki" if i % 2 else "pdf", "score": 0.5}
+            )
+            for i in range(30)
+        ]
+    
+    def test_metadata_promotion(self):
+        """승격된 메타데이터 키가 최상위 속성으로 저장되는지 테스트"""
+        table = FakeDynamoTable()
+        store = make_dynamodb_store(table, indexed_metadata_keys=["tenant", "score"])
+        store.add_documents(self._tenant_docs()[:1])
+        
+        item = table.items[("doc00", "chunk_1")]
+        assert item["meta_tenant"] == "t0"
+        assert str(item["meta_score"]) == "0.5"
+        assert "meta_source" not in item
+    
+    def test_filter_pushdown_scan(self):
+        """승격 키 필터가 Scan FilterExpression으로 전달되는지 테스트"""
+        table = FakeDynamoTable(page_size=8)
+        store = make_dynamodb_store(table, enable_cache=False, indexed_metadata_keys=["tenant"])
+        store.add_documents(self._tenant_docs())
+        
+        results = store.similarity_search([0.0, 1.0], k=3, filter_metadata={"tenant": "t1", "source": "wiki"})
+        assert [r.document_id for r in results] == ["doc25", "doc19", "doc13"]
+        assert all(op != "scan" or expr is not None for op, expr, _ in table.requests)
+    
+    def test_equal_scores_across_segments(self):
+        """세그먼트마다 같은 (유사도, 순번) 항목이 있어도 병합이 실패하지 않는지 테스트"""
+        table = FakeDynamoTable(page_size=8)
+        store = make_dynamodb_store(table, scan_segments=2, enable_cache=False, indexed_metadata_keys=["tenant"])
+        store.add_documents([
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", [1.0, 0.0, 0.0, 0.0], {"tenant": "t0"})
+            for i in range(4)
+        ])
+        
+        assert len(store.similarity_search([1.0, 0.0, 0.0, 0.0], k=3)) == 3
+        assert len(store.similarity_search([1.0, 0.0, 0.0, 0.0], k=3, filter_metadata={"tenant": "t0"})) == 3
+        
+        store.train_pq_codec(n_subvectors=2, n_centroids=2)
+        assert len(store.similarity_search([1.0, 0.0, 0.0, 0.0], k=3)) == 3
+    
+    def test_filter_pushdown_gsi_query(self):
+        """GSI가 있는 키 필터는 Scan 없이 Query로 처리되는지 테스트"""
+        table = FakeDynamoTable()
+        store = make_dynamodb_store(table, metadata_gsi={"tenant": "tenant-index"})
+        store.add_documents(self._tenant_docs())
+        
+        results = store.similarity_search([0.0, 1.0], k=2, filter_metadata={"tenant": "t2"})
+        assert [r.document_id for r in results] == ["doc29", "doc26"]
+        assert table.scan_calls == 0
+        assert [(op, name) for op, name, _ in table.requests] == [("query", "tenant-index")]
+        
+        # 캐시가 적재된 뒤에는 메모리에서 필터링
+        store.similarity_search([0.0, 1.0], k=1)
+        results = store.similarity_search([0.0, 1.0], k=2, filter_metadata={"tenant": "t2"})
+        assert [r.document_id for r in results] == ["doc29", "doc26"]
+        assert store.cache_stats()["hits"] == 1
+
+
+class TestBatchSimilaritySearch:
+    """여러 쿼리 배치 검색 테스트 클래스"""
+    
+    def _docs(self, n=120, dim=8, seed=0):
+        rng = np.random.default_rng(seed)
+        vectors = rng.normal(size=(n, dim))
+        return [
+            VectorDocument(f"doc{i:03d}", "chunk_1", f"Document {i}", vectors[i].tolist(), {"parity": i % 2})
+            for i in range(n)
+        ]
+    
+    def _queries(self, dim=8, seed=1):
+        queries = np.random.default_rng(seed).normal(size=(6, dim)).tolist()
+        queries.append([0.0] * dim)  # 영벡터 쿼리는 빈 결과
+        return queries
+    
+    def _assert_matches_single(self, store, filter_metadata=None, **kwargs):
+        queries = self._queries()
+        batch = store.similarity_search_batch(queries, k=5, filter_metadata=filter_metadata, **kwargs)
+        assert len(batch) == len(queries)
+        assert batch[-1] == []
+        for query, results in zip(queries[:-1], batch[:-1]):
+            single = store.similarity_search(query, k=5, filter_metadata=filter_metadata, **kwargs)
+            assert [r.document_id for r in results] == [r.document_id for r in single]
+            assert len(results) == 5
+    
+    def test_matrix_index_search_batch(self):
+        """MatrixIndex 배치 검색이 단일 검색과 같은지 테스트"""
+        from src.vectorstore.matrix_index import MatrixIndex
+        
+        rng = np.random.default_rng(0)
+        index = MatrixIndex()
+        index.add_batch(list(range(200)), rng.normal(size=(200, 16)))
+        queries = rng.normal(size=(4, 16))
+        
+        for query, hits in zip(queries, index.search_batch(queries, k=7, rows=list(range(50, 150)))):
+            single = index.search(query, k=7, rows=list(range(50, 150)))
+            assert [key for key, _ in hits] == [key for key, _ in single]
+            assert [score for _, score in hits] == pytest.approx([score for _, score in single], abs=1e-5)
+    
+    def test_mock_store(self):
+        """MockVectorStore 배치 검색 (필터 포함) 테스트"""
+        store = MockVectorStore()
+        store.add_documents(self._docs())
+        self._assert_matches_single(store)
+        self._assert_matches_single(store, filter_metadata={"parity": 1})
+    
+    def test_ivf_store(self):
+        """IVFVectorStore 배치 검색이 nprobe별 단일 검색과 같은지 테스트"""
+        from src.vectorstore.ivf_store import IVFVectorStore
+        
+        store = IVFVectorStore(n_lists=8, nprobe=2, min_train_size=64, seed=0)
+        store.add_documents(self._docs())
+        assert store.is_trained
+        self._assert_matches_single(store)
+        self._assert_matches_single(store, filter_metadata={"parity": 0}, nprobe=3)
+    
+    def test_hnsw_store_default(self):
+        """기본 구현(단일 검색 반복)을 쓰는 스토어 테스트"""
+        from src.vectorstore.hnsw_store import HNSWVectorStore
+        
+        store = HNSWVectorStore(seed=0)
+        store.add_documents(self._docs())
+        self._assert_matches_single(store)
+    
+    @pytest.mark.parametrize("enable_cache", [True, False])
+    def test_dynamodb_store_single_pass(self, enable_cache):
+        """DynamoDB 배치 검색이 테이블을 한 번만 스캔하는지 테스트"""
+        table = FakeDynamoTable(page_size=16)
+        store = make_dynamodb_store(table, scan_segments=2, enable_cache=enable_cache)
+        store.add_documents(self._docs())
+        
+        scans_before = table.scan_calls
+        batch = store.similarity_search_batch(self._queries(), k=5)
+        scans_per_pass = table.scan_calls - scans_before
+        assert scans_per_pass > 0
+        
+        single = [store.similarity_search(q, k=5) for q in self._queries()[:-1]]
+        assert [[r.document_id for r in results] for results in batch[:-1]] == \
+            [[r.document_id for r in results] for results in single]
+        assert batch[-1] == []
+        if not enable_cache:
+            # 단일 검색은 쿼리마다 전체 스캔
+            assert table.scan_calls - scans_before == scans_per_pass * 7
+        self._assert_matches_single(store, filter_metadata={"parity": 1})
+    
+    def test_snapshot_store(self, tmp_path):
+        """SnapshotVectorStore 배치 검색 테스트"""
+        from src.vectorstore.snapshot import SnapshotPublisher, SnapshotVectorStore
+        
+        s3 = FakeS3Handler()
+        SnapshotPublisher(s3).publish(self._docs())
+        store = SnapshotVectorStore(s3, local_dir=str(tmp_path))
+        self._assert_matches_single(store)
+        self._assert_matches_single(store, filter_metadata={"parity": 0})
+
+
+class TestLocalVectorStore:
+    """LocalVectorStore (WAL + 메모리 매핑 세그먼트) 테스트 클래스"""
+    
+    def _docs(self):
+        return [
+            VectorDocument("doc1", "chunk_0", "one", [1.0, 0.0, 0.0], {"src": "a"}),
+            VectorDocument("doc1", "chunk_1", "one-b", [0.9, 0.1, 0.0], {"src": "a"}),
+            VectorDocument("doc2", "chunk_0", "two", [0.0, 1.0, 0.0], {"src": "b"}),
+        ]
+    
+    def test_reopen_replays_wal(self, tmp_path):
+        """재시작 시 WAL 재적용으로 추가/삭제가 복원되는지 테스트"""
+        from src.vectorstore.local_store import LocalVectorStore
+        
+        store = LocalVectorStore(str(tmp_path), compact_threshold=0)
+        store.add_documents(self._docs())
+        store.delete_document("doc2")
+        
+        reopened = LocalVectorStore(str(tmp_path))
+        assert reopened.wal_records == 4
+        assert len(reopened) == 2
+        assert reopened.get_document("doc2") is None
+        results = reopened.similarity_search([1.0, 0.0, 0.0], k=5)
+        assert [r.text for r in results] == ["one", "one-b"]
+    
+    def test_compaction_and_overrides(self, tmp_path):
+        """압축 후 mmap 세그먼트 로드 및 세그먼트 위 교체/삭제 테스트"""
+        from src.vectorstore.local_store import LocalVectorStore
+        
+        store = LocalVectorStore(str(tmp_path), compact_threshold=3)
+        store.add_documents(self._docs())
+        
+        # 임계값 도달 → 자동 압축, 이전 세대 파일 정리
+        assert store.wal_records == 0
+        assert sorted(os.listdir(tmp_path)) == ["CURRENT", "segment-1", "wal-1.log"]
+        
+        reopened = LocalVectorStore(str(tmp_path), compact_threshold=0)
+        assert isinstance(reopened._segment_vectors, np.memmap)
+        assert reopened.get_document("doc2").embedding == pytest.approx([0.0, 1.0, 0.0])
+        
+        # 세그먼트에 있는 청크 교체와 삭제는 WAL 델타로 가려짐
+        reopened.add_documents([VectorDocument("doc2", "chunk_0", "two-new", [0.0, 0.0, 2.0], {"src": "b"})])
+        reopened.delete_document("doc1")
+        assert [r.text for r in reopened.similarity_search([0.0, 0.0, 1.0], k=5)] == ["two-new"]
+        assert reopened.similarity_search([1.0, 0.0, 0.0], k=5, filter_metadata={"src": "a"}) == []
+        
+        reopened.compact()
+        final = LocalVectorStore(str(tmp_path))
+        assert [d.text for d in final.get_all_documents()] == ["two-new"]
+    
+    def test_compaction_writes_arrays(self, tmp_path, monkeypatch):
+        """압축이 VectorDocument 변환 없이 세그먼트/델타 행렬을 정렬해 기록하는지 테스트"""
+        from src.vectorstore.local_store import LocalVectorStore
+        
+        store = LocalVectorStore(str(tmp_path), compact_threshold=0)
+        store.add_documents(self._docs())
+        store.compact()
+        store.add_documents([
+            VectorDocument("doc0", "chunk_0", "zero", [0.0, 3.0, 4.0], {"src": "c"}),
+            VectorDocument("doc1", "chunk_1", "one-c", [0.0, 0.0, 2.0], {"src": "a"}),
+        ])
+        monkeypatch.setattr(store, "_segment_document", lambda row: pytest.fail("row converted to document"))
+        monkeypatch.setattr(store, "get_all_documents", lambda: pytest.fail("documents materialized"))
+        store.compact()
+        monkeypatch.undo()
+        
+        assert store._segment_ids == [("doc0", "chunk_0"), ("doc1", "chunk_0"), ("doc1", "chunk_1"), ("doc2", "chunk_0")]
+        assert store._segment_texts == ["zero", "one", "one-c", "two"]
+        assert store.get_document("doc0").embedding == pytest.approx([0.0, 3.0, 4.0])
+        assert [r.text for r in store.similarity_search([0.0, 0.0, 1.0], k=2)] == ["one-c", "zero"]
+    
+    def test_torn_wal_tail_is_ignored(self, tmp_path):
+        """기록 도중 잘린 마지막 WAL 레코드는 무시하는지 테스트"""
+        from src.vectorstore.local_store import LocalVectorStore
+        
+        store = LocalVectorStore(str(tmp_path), compact_threshold=0)
+        store.add_documents(self._docs()[:1])
+        with open(tmp_path / "wal-0.log", "a", encoding="utf-8") as f:
+            f.write('{"op": "add", "document_id": "do')
+        
+        reopened = LocalVectorStore(str(tmp_path))
+        assert len(reopened) == 1
+        assert reopened.get_document("doc1").text == "one"
+        
+        # 잘린 꼬리는 잘라내므로 이후 추가한 레코드가 재시작 후에도 남음
+        reopened.add_documents(self._docs()[2:])
+        final = LocalVectorStore(str(tmp_path))
+        assert final.wal_records == 2
+        assert final.get_document("doc2").text == "two"
+    
+    def test_corrupted_wal_record_in_middle_is_quarantined(self, tmp_path):
+        """마지막이 아닌 WAL 레코드가 깨진 경우 격리 파일로 옮기고 나머지는 적용하는지 테스트"""
+        from src.vectorstore.local_store import LocalVectorStore
+        
+        store = LocalVectorStore(str(tmp_path), compact_threshold=0)
+        store.add_documents(self._docs()[:1])
+        with open(tmp_path / "wal-0.log", "a", encoding="utf-8") as f:
+            f.write('{"op": "add", "document_id": "do\n')
+        store.add_documents(self._docs()[2:])
+        
+        reopened = LocalVectorStore(str(tmp_path))
+        assert reopened.wal_records == 2
+        assert reopened.get_document("doc2").text == "two"
+        assert (tmp_path / "wal-0.quarantine").read_text(encoding="utf-8") == '{"op": "add", "document_id": "do\n'
+        
+        # 격리된 레코드는 WAL에서 제거되어 다시 열어도 한 번만 격리됨
+        LocalVectorStore(str(tmp_path))
+        assert len((tmp_path / "wal-0.quarantine").read_text(encoding="utf-8").splitlines()) == 1
+    
+    def test_invalid_embedding_not_written_to_wal(self, tmp_path):
+        """차원이 다르거나 유한하지 않은 임베딩은 WAL에 남지 않고, 적용할 수 없는 레코드는 재적용 시 건너뛰는지 테스트"""
+        from src.vectorstore.local_store import LocalVectorStore
+        
+        store = LocalVectorStore(str(tmp_path), compact_threshold=0)
+        store.add_documents(self._docs()[:1])
+        assert store.add_documents([VectorDocument("bad", "chunk_0", "x", [1.0, 0.0], {})]) is False
+        assert store.add_documents([VectorDocument("bad", "chunk_0", "x", [1.0, float("nan"), 0.0], {})]) is False
+        assert store.wal_records == 1
+        assert store.get_document("bad") is None
+        
+        # 이전 버전이 남긴 차원 불일치 레코드도 시작을 막지 않음
+        store._append_wal([store._add_record(VectorDocument("bad", "chunk_0", "x", [1.0, 0.0], {}))])
+        store._append_wal([store._add_record(self._docs()[2])])
+        reopened = LocalVectorStore(str(tmp_path))
+        assert reopened.get_document("bad") is None
+        assert [r.text for r in reopened.similarity_search([0.0, 1.0, 0.0], k=5)] == ["two", "one"]
+    
+    def test_factory(self, tmp_path, monkeypatch):
+        """설정 기반 스토어 생성 테스트"""
+        from src.vectorstore.factory import create_vector_store
+        from src.vectorstore.local_store import LocalVectorStore
+        
+        config = {"type": "local", "local_path": str(tmp_path)}
+        store = create_vector_store(config)
+        assert isinstance(store, LocalVectorStore)
+        assert create_vector_store(config) is store
+        
+        monkeypatch.setenv("VECTORSTORE_TYPE", "mock")
+        assert isinstance(create_vector_store(config), MockVectorStore)
+        monkeypatch.delenv("VECTORSTORE_TYPE")
+        with pytest.raises(ValueError):
+            create_vector_store({"type": "unknown"})
+
+
+class TestShardedVectorStore:
+    """ShardedVectorStore (프로세스 샤드 scatter-gather) 테스트 클래스"""
+    
+    def test_matches_single_store(self):
+        """샤드 병합 결과가 단일 스토어 검색과 같은지 테스트"""
+        from src.vectorstore.sharded_store import ShardedVectorStore
+        
+        rng = np.random.default_rng(0)
+        docs = [
+            VectorDocument(f"doc{i // 3}", f"chunk_{i % 3}", f"text {i}", rng.normal(size=8).tolist(), {"parity": i % 2})
+            for i in range(90)
+        ]
+        reference = MockVectorStore()
+        reference.add_documents(docs)
+        queries = rng.normal(size=(3, 8)).tolist()
+        
+        with ShardedVectorStore(n_shards=3) as store:
+            assert store.add_documents(docs)
+            assert len(store) == 90
+            assert all(size > 0 for size in store.shard_sizes())
+            
+            for query in queries:
+                for filter_metadata in (None, {"parity": 1}):
+                    expected = reference.similarity_search(query, k=7, filter_metadata=filter_metadata)
+                    results = store.similarity_search(query, k=7, filter_metadata=filter_metadata)
+                    assert [(r.document_id, r.chunk_id) for r in results] == \
+                        [(r.document_id, r.chunk_id) for r in expected]
+            
+            batch = store.similarity_search_batch(queries, k=7)
+            assert [[r.text for r in results] for results in batch] == \
+                [[r.text for r in reference.similarity_search(q, k=7)] for q in queries]
+            
+            # 같은 문서의 청크는 한 샤드에 있으므로 삭제는 샤드 1곳에서 완료
+            assert store.get_document("doc4").chunk_id == "chunk_0"
+            assert store.delete_document("doc4")
+            assert store.get_document("doc4") is None
+            assert len(store.get_all_documents()) == 87
+        
+        assert store.similarity_search(queries[0]) == []
+    
+    def test_concurrent_queries_and_candidates(self):
+        """여러 스레드의 쿼리가 요청 ID로 각자의 응답을 받고, 후보 검색은 후보가 있는 샤드에만 요청"""
+        from concurrent.futures import ThreadPoolExecutor
+        from src.vectorstore.sharded_store import ShardedVectorStore
+        
+        rng = np.random.default_rng(1)
+        docs = [
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", rng.normal(size=8).tolist(), {"parity": i % 2})
+            for i in range(120)
+        ]
+        reference = MockVectorStore()
+        reference.add_documents(docs)
+        queries = rng.normal(size=(40, 8)).tolist()
+        expected = [[d.text for d in reference.similarity_search(q, k=5)] for q in queries]
+        
+        with ShardedVectorStore(n_shards=3) as store:
+            assert store.add_documents(docs)
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(lambda q: [d.text for d in store.similarity_search(q, k=5)], queries * 3))
+            assert results == expected * 3
+            
+            candidates = [("doc3", "chunk_0"), ("doc50", "chunk_0"), ("doc77", "chunk_0"), ("missing", "chunk_0")]
+            query = docs[50].embedding
+            sent = []
+            original = store._send_all
+            store._send_all = lambda requests: sent.append(set(requests)) or original(requests)
+            hits = store.similarity_search_candidates(query, candidates, k=2)
+            assert [d.document_id for d in hits] == \
+                [d.document_id for d in reference.similarity_search_candidates(query, candidates, k=2)]
+            assert hits[0].document_id == "doc50"
+            assert sent == [{store.shard_of(document_id) for document_id, _ in candidates}]
+            filtered = store.similarity_search_candidates(query, candidates, k=5, filter_metadata={"parity": 1})
+            assert {d.document_id for d in filtered} == {"doc3", "doc77"}
+            assert store.similarity_search_candidates(query, [], k=5) == []
+        
+        assert store.similarity_search_candidates(query, candidates, k=2) == []
+
+
+class TestQuantization:
+    """int8/binary 양자화 스캔 + float32 재점수 계산 테스트 클래스"""
+    
+    def _docs(self, n=400, dim=32, seed=0):
+        rng = np.random.default_rng(seed)
+        return [
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", rng.normal(size=dim).tolist(), {"parity": i % 2})
+            for i in range(n)
+        ]
+    
+    def test_codecs(self):
+        """코드 크기와 int8 복원 오차 테스트"""
+        from src.vectorstore.quantization import BinaryQuantizer, ScalarQuantizer, create_quantizer
+        
+        vectors = np.random.default_rng(1).normal(size=(50, 64)).astype(np.float32)
+        scalar = ScalarQuantizer().fit(vectors)
+        codes = scalar.encode(vectors)
+        assert codes.dtype == np.uint8 and codes.shape == (50, 64)
+        assert np.abs(scalar.decode(codes) - vectors).max() <= scalar.scale.max()
+        
+        binary = BinaryQuantizer()
+        assert binary.encode(vectors).shape == (50, 8)
+        # 자기 자신과의 해밍 거리 0 → 최대 점수
+        scores = binary.score(binary.encode(vectors), vectors[:1])[0]
+        assert scores[0] == 64 and scores.argmax() == 0
+        
+        assert create_quantizer("none") is None
+        with pytest.raises(ValueError):
+            create_quantizer("opq")
+    
+    @pytest.mark.parametrize("quantization,min_recall", [("int8", 0.95), ("binary", 0.75)])
+    def test_recall_against_exact(self, quantization, min_recall):
+        """재점수 계산 후 정확 검색 대비 recall@5 테스트"""
+        docs = self._docs(dim=64)
+        exact = MockVectorStore()
+        exact.add_documents(docs)
+        store = MockVectorStore(quantization=quantization, oversample=10)
+        store.add_documents(docs)
+        
+        # 저장된 벡터 근처의 쿼리 (실제 검색과 비슷하게 가까운 이웃이 존재)
+        rng = np.random.default_rng(2)
+        queries = [(np.asarray(docs[i].embedding) + rng.normal(scale=0.5, size=64)).tolist() for i in range(0, 100, 10)]
+        hits = 0
+        for query in queries:
+            expected = exact.similarity_search_with_scores(query, k=5)
+            results = store.similarity_search_with_scores(query, k=5)
+            # 반환되는 유사도는 float32 재점수 계산 값
+            for doc, score in results:
+                cosine = np.dot(query, doc.embedding) / (np.linalg.norm(query) * np.linalg.norm(doc.embedding))
+                assert score == pytest.approx(float(cosine), abs=1e-5)
+            assert results[0][0].document_id == expected[0][0].document_id
+            hits += len({d.document_id for d, _ in expected} & {d.document_id for d, _ in results})
+        assert hits / 50 >= min_recall
+        
+        batch = store.similarity_search_batch(queries, k=5)
+        assert [[d.text for d in r] for r in batch] == [[d.text for d in store.similarity_search(q, k=5)] for q in queries]
+        
+        # 필터 + 삭제 후에도 코드 행이 행렬과 같이 이동
+        store.delete_document("doc3")
+        results = store.similarity_search(queries[0], k=5, filter_metadata={"parity": 1})
+        assert results and all(d.metadata["parity"] == 1 and d.document_id != "doc3" for d in results)
+    
+    def test_local_store_segment_codes(self, tmp_path):
+        """LocalVectorStore 세그먼트는 코드로 스캔하고 mmap 행렬은 재점수 계산에만 사용"""
+        from src.vectorstore.local_store import LocalVectorStore
+        
+        docs = self._docs(n=200)
+        store = LocalVectorStore(str(tmp_path), compact_threshold=0, quantization="int8", oversample=10)
+        store.add_documents(docs)
+        store.compact()
+        assert store._segment_codes.shape == (200, 32)
+        
+        exact = MockVectorStore()
+        exact.add_documents(docs)
+        query = docs[7].embedding
+        assert store.similarity_search(query, k=1)[0].document_id == "doc7"
+        expected = {d.document_id for d in exact.similarity_search(query, k=5)}
+        assert len(expected & {d.document_id for d in store.similarity_search(query, k=5)}) >= 4
+
+
+class TestProductQuantization:
+    """PQ 코덱(부분 공간 코드북 + ADC)과 스토어 연동 테스트 클래스"""
+    
+    def _clustered(self, n=600, dim=64, seed=0):
+        rng = np.random.default_rng(seed)
+        centers = rng.normal(size=(20, dim))
+        return (centers[rng.integers(0, 20, n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+    
+    def test_codec_and_recall(self):
+        """코드 크기, ADC = 복원 벡터 내적, 재점수 계산 recall 테스트"""
+        from src.vectorstore.quantization import ProductQuantizer, measure_recall
+        
+        vectors = self._clustered()
+        pq = ProductQuantizer(n_subvectors=16, n_iter=10).fit(vectors)
+        codes = pq.encode(vectors)
+        assert codes.shape == (600, 16) and codes.dtype == np.uint8
+        
+        queries = vectors[:5]
+        np.testing.assert_allclose(pq.score(codes, queries), queries @ pq.decode(codes).T, rtol=1e-4, atol=1e-3)
+        
+        restored = ProductQuantizer.from_codebooks(pq.codebooks)
+        assert np.array_equal(restored.encode(vectors), codes)
+        
+        queries = vectors[:50] + 0.05 * np.random.default_rng(1).normal(size=(50, 64))
+        assert measure_recall(pq, vectors, queries, k=10, oversample=8) >= 0.9
+        with pytest.raises(ValueError):
+            ProductQuantizer(n_subvectors=7).fit(vectors)
+    
+    def test_mock_store_pq(self):
+        """MockVectorStore pq 양자화 스캔 + float32 재점수 계산"""
+        vectors = self._clustered(n=300)
+        docs = [VectorDocument(f"doc{i}", "chunk_0", f"text {i}", v.tolist(), {}) for i, v in enumerate(vectors)]
+        store = MockVectorStore(quantization="pq", oversample=10, pq_subvectors=16)
+        store.add_documents(docs)
+        
+        for i in (0, 50, 100):
+            assert store.similarity_search(vectors[i].tolist(), k=3)[0].document_id == f"doc{i}"
+    
+    def test_pq_subvectors_from_dimension(self, tmp_path):
+        """pq_subvectors 미지정 시 차원의 약수로 결정, 약수가 아닌 값은 첫 삽입에서 명확한 오류"""
+        from src.vectorstore.local_store import LocalVectorStore
+        from src.vectorstore.quantization import default_pq_subvectors
+        
+        assert default_pq_subvectors(384) == 48 and default_pq_subvectors(1024) == 32
+        vectors = self._clustered(n=200, dim=1024)
+        docs = [VectorDocument(f"doc{i}", "chunk_0", f"text {i}", v.tolist(), {}) for i, v in enumerate(vectors)]
+        
+        store = MockVectorStore(quantization="pq", oversample=10)
+        assert store.add_documents(docs)
+        assert store._index.quantizer.n_subvectors == 32
+        assert store.similarity_search(vectors[5].tolist(), k=3)[0].document_id == "doc5"
+        
+        explicit = MockVectorStore(quantization="pq", pq_subvectors=48)
+        assert not explicit.add_documents(docs)
+        assert explicit.get_document("doc0") is None
+        
+        local = LocalVectorStore(str(tmp_path), quantization="pq", pq_subvectors=48)
+        assert not local.add_documents(docs[:3])
+        assert local.get_document("doc0") is None
+        wal_path = local._wal_path(local._generation)
+        assert not os.path.exists(wal_path) or os.path.getsize(wal_path) == 0
+    
+    def test_quantizer_trained_on_write_path(self):
+        """양자화기 학습/재학습은 삽입 시점에만 수행되고 검색은 학습된 코드만 사용"""
+        vectors = self._clustered(n=400)
+        docs = [VectorDocument(f"doc{i}", "chunk_0", f"text {i}", v.tolist(), {}) for i, v in enumerate(vectors)]
+        store = MockVectorStore(quantization="pq", oversample=4, pq_subvectors=16)
+        quantizer = store._index.quantizer
+        fits = []
+        original_fit = quantizer.fit
+        quantizer.fit = lambda matrix: fits.append(len(matrix)) or original_fit(matrix)
+        
+        store.add_documents(docs[:100])
+        assert fits == [100]
+        store.add_documents(docs[100:150])
+        assert fits == [100]
+        store.add_documents(docs[150:])
+        assert fits == [100, 400]
+        
+        for i in (0, 200, 399):
+            assert store.similarity_search(vectors[i].tolist(), k=3)[0].document_id == f"doc{i}"
+        assert fits == [100, 400]
+    
+    @pytest.mark.parametrize("enable_cache", [True, False])
+    @pytest.mark.parametrize("store_embeddings", [True, False])
+    def test_dynamodb_pq(self, enable_cache, store_embeddings):
+        """DynamoDB 코드북 학습/백필/적재와 코드 기반 검색 테스트"""
+        vectors = self._clustered(n=200)
+        table = FakeDynamoTable(page_size=50)
+        store = make_dynamodb_store(table, scan_segments=2, enable_cache=enable_cache)
+        store.add_documents([
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", v.tolist(), {"parity": i % 2})
+            for i, v in enumerate(vectors[:150])
+        ])
+        
+        assert store.train_pq_codec(n_subvectors=16) == 150
+        attribute = f"pq_code_v{store.pq_codec_version}"
+        assert all(len(item[attribute].value) == 16 for key, item in table.items.items() if key[0] != "__meta__")
+        
+        # 새 인스턴스는 테이블에 저장된 코드북을 적재
+        reader = make_dynamodb_store(
+            table, scan_segments=2, enable_cache=enable_cache, store_embeddings=store_embeddings, oversample=8
+        )
+        assert reader.load_pq_codec()
+        np.testing.assert_array_equal(reader.pq_codec.codebooks, store.pq_codec.codebooks)
+        
+        reader.add_documents([
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", v.tolist(), {"parity": i % 2})
+            for i, v in enumerate(vectors[150:], start=150)
+        ])
+        assert ("embedding" in table.items[("doc160", "chunk_0")]) == store_embeddings
+        
+        table.requests.clear()
+        results = reader.similarity_search(vectors[160].tolist(), k=3)
+        assert results[0].document_id == "doc160" and results[0].text == "text 160"
+        # 점수 계산 스캔은 float32 임베딩 대신 코드만 읽음
+        scans = [kwargs for op, _, kwargs in table.requests if op == "scan"]
+        assert scans and all("#emb" not in kwargs["ExpressionAttributeNames"] for kwargs in scans)
+        if store_embeddings:
+            assert results[0].embedding == pytest.approx(vectors[160].tolist(), abs=1e-6)
+        
+        filtered = reader.similarity_search(vectors[3].tolist(), k=3, filter_metadata={"parity": 1})
+        assert filtered[0].document_id == "doc3"
+        assert all(doc.metadata["parity"] == 1 for doc in filtered)
+
+    
+    def test_dynamodb_pq_retrain(self):
+        """재학습 백필 중/실패 후에도 이전 코드북 코드가 남고, 성공해야 새 코드북이 활성화되는지 테스트"""
+        vectors = self._clustered(n=200)
+        table = FakeDynamoTable(page_size=50)
+        store = make_dynamodb_store(table, scan_segments=2, enable_cache=False)
+        store.add_documents([
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", v.tolist(), {}) for i, v in enumerate(vectors)
+        ])
+        store.train_pq_codec(n_subvectors=16)
+        first_version = store.pq_codec_version
+        first = f"pq_code_v{first_version}"
+        reader = make_dynamodb_store(table, scan_segments=2, enable_cache=False)
+        assert reader.load_pq_codec() and reader.pq_codec_version == first_version
+        
+        # 백필 도중 실패: 이미 새 코드를 받은 아이템도 이전 코드가 남아 이전 코드북으로 계속 검색됨
+        update_item = table.update_item
+        calls = []
+        
+        def failing_update_item(**kwargs):
+            calls.append(kwargs)
+            if len(calls) > 60:
+                raise RuntimeError("network error")
+            return update_item(**kwargs)
+        
+        table.update_item = failing_update_item
+        with pytest.raises(RuntimeError):
+            store.train_pq_codec(n_subvectors=16)
+        table.update_item = update_item
+        
+        items = [item for key, item in table.items.items() if key[0] != "__meta__"]
+        assert all(first in item for item in items)
+        assert any(len([name for name in item if name.startswith("pq_code_v")]) == 2 for item in items)
+        assert reader.load_pq_codec() and reader.pq_codec_version == first_version
+        for i in (3, 77, 150):
+            assert reader.similarity_search(vectors[i].tolist(), k=1)[0].document_id == f"doc{i}"
+        
+        # 스캔 이후 교체된 청크는 덮어쓰지 않음
+        from src.vectorstore.embedding_codec import encode_embedding
+        original_scan = table.scan
+        replacements = []
+        
+        def scan_then_replace(**kwargs):
+            response = original_scan(**kwargs)
+            if any(item["document_id"] == "doc5" for item in response["Items"]):
+                replacements.append(1)
+                embedding = encode_embedding((vectors[6] * (len(replacements) + 1)).tolist())
+                table.put_item({**table.items[("doc5", "chunk_0")], "embedding": embedding})
+            return response
+        
+        table.scan = scan_then_replace
+        assert store.train_pq_codec(n_subvectors=16) == 199
+        table.scan = original_scan
+        second = f"pq_code_v{store.pq_codec_version}"
+        assert second not in table.items[("doc5", "chunk_0")]
+        assert all(second in item and first in item for key, item in table.items.items()
+                   if key[0] != "__meta__" and key[0] != "doc5")
+        parts = [key[1] for key in table.items if key[0] == "__meta__" and key[1].startswith("pq_codebook#")]
+        assert len(parts) == 16 and all(f"#{store.pq_codec_version}#" in part for part in parts)
+        assert reader.load_pq_codec() and reader.pq_codec_version == store.pq_codec_version
+        assert reader.similarity_search(vectors[7].tolist(), k=1)[0].document_id == "doc7"
+        
+        # 다음 학습에서 활성 코드북 이전 버전의 코드 속성 제거
+        store.train_pq_codec(n_subvectors=16)
+        assert all(first not in item for key, item in table.items.items() if key[0] != "__meta__")
+    
+    def test_dynamodb_pq_code_only_retrain(self):
+        """float32 임베딩 없이 코드만 저장한 아이템도 재학습 시 현재 코드 복원값으로 다시 인코딩되는지 테스트"""
+        vectors = self._clustered(n=200)
+        table = FakeDynamoTable(page_size=50)
+        store = make_dynamodb_store(table, scan_segments=2, enable_cache=False)
+        store.add_documents([
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", v.tolist(), {}) for i, v in enumerate(vectors[:150])
+        ])
+        store.train_pq_codec(n_subvectors=16)
+        
+        writer = make_dynamodb_store(table, scan_segments=2, enable_cache=False, store_embeddings=False)
+        assert writer.load_pq_codec()
+        writer.add_documents([
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", v.tolist(), {})
+            for i, v in enumerate(vectors[150:], start=150)
+        ])
+        assert "embedding" not in table.items[("doc160", "chunk_0")]
+        
+        assert store.train_pq_codec(n_subvectors=16) == 200
+        assert f"pq_code_v{store.pq_codec_version}" in table.items[("doc160", "chunk_0")]
+        assert writer.load_pq_codec() and writer.pq_codec_version == store.pq_codec_version
+        assert "doc160" in [d.document_id for d in writer.similarity_search(vectors[160].tolist(), k=3)]
+
+
+class TestLSMVectorStore:
+    """LSMVectorStore (델타 세그먼트 + 툼스톤 + 백그라운드 병합) 테스트 클래스"""
+    
+    def _docs(self, start, stop, seed=0):
+        rng = np.random.default_rng(seed)
+        vectors = rng.normal(size=(stop, 16))
+        return [
+            VectorDocument(f"doc{i}", "chunk_0", f"text {i}", vectors[i].tolist(), {"parity": i % 2})
+            for i in range(start, stop)
+        ]
+    
+    def _keys(self, docs):
+        return [(d.document_id, d.chunk_id, d.text) for d in docs]
+    
+    def test_matches_reference_across_merges(self):
+        """델타/툼스톤/병합 전후 결과가 단일 스토어와 같은지 테스트"""
+        from src.vectorstore.lsm_store import LSMVectorStore
+        
+        store = LSMVectorStore(merge_threshold=0)
+        reference = MockVectorStore()
+        for target in (store, reference):
+            target.add_documents(self._docs(0, 40))
+        queries = np.random.default_rng(1).normal(size=(5, 16)).tolist()
+        
+        def check():
+            for query in queries:
+                for filter_metadata in (None, {"parity": 0}):
+                    assert self._keys(store.similarity_search(query, k=5, filter_metadata=filter_metadata)) == \
+                        self._keys(reference.similarity_search(query, k=5, filter_metadata=filter_metadata))
+        
+        check()
+        assert store.merge()
+        assert store.delta_size == 0 and store.merges == 1
+        
+        # 메인에 있는 청크 교체/삭제는 툼스톤으로 가려짐
+        replaced = VectorDocument("doc3", "chunk_0", "text 3 new", queries[0], {"parity": 1})
+        for target in (store, reference):
+            target.add_documents([replaced] + self._docs(40, 50))
+            target.delete_document("doc7")
+        assert store.tombstone_count == 2
+        check()
+        
+        assert store.merge()
+        assert store.tombstone_count == 0 and store.delta_size == 0
+        check()
+        assert len(store) == 49
+        assert store.get_document("doc3").text == "text 3 new"
+        assert store.get_document("doc7") is None
+    
+    def test_writes_during_background_merge(self):
+        """병합 도중 검색/쓰기가 막히지 않고, 병합 중 삭제가 새 메인에도 적용되는지 테스트"""
+        import threading
+        from src.vectorstore.lsm_store import LSMVectorStore
+        
+        building = threading.Event()
+        release = threading.Event()
+        
+        class SlowMain(MockVectorStore):
+            def add_documents(self, documents):
+                building.set()
+                release.wait(5)
+                return super().add_documents(documents)
+        
+        store = LSMVectorStore(main_factory=SlowMain, merge_threshold=20)
+        docs = self._docs(0, 30)
+        store.add_documents(docs[:19])
+        assert store.merges == 0
+        store.add_documents(docs[19:20])  # 임계값 도달 → 백그라운드 병합 시작
+        assert building.wait(5)
+        
+        store.add_documents(docs[20:])
+        store.delete_document("doc5")
+        assert store.similarity_search(docs[25].embedding, k=1)[0].document_id == "doc25"
+        assert store.similarity_search(docs[5].embedding, k=1)[0].document_id != "doc5"
+        
+        release.set()
+        store.wait_for_merge(5)
+        assert store.merges == 1
+        assert store.delta_size == 10
+        # 병합 입력에는 doc5가 포함되었지만 병합 도중 기록된 툼스톤이 계속 가림
+        assert store.tombstone_count == 1
+        assert store.similarity_search(docs[5].embedding, k=1)[0].document_id != "doc5"
+        assert store.similarity_search(docs[12].embedding, k=1)[0].document_id == "doc12"
+        assert len(store) == 29
+    
+    def test_frozen_delta_ignores_earlier_tombstones(self):
+        """얼리기 전에 교체된 청크의 새 버전은 병합 도중에도 frozen 델타에서 검색됨"""
+        import threading
+        from src.vectorstore.lsm_store import LSMVectorStore
+        
+        slow = threading.Event()
+        building = threading.Event()
+        release = threading.Event()
+        
+        class SlowMain(MockVectorStore):
+            def add_documents(self, documents):
+                if slow.is_set():
+                    building.set()
+                    release.wait(5)
+                return super().add_documents(documents)
+        
+        store = LSMVectorStore(main_factory=SlowMain, merge_threshold=0)
+        docs = self._docs(0, 40)
+        store.add_documents(docs[:30])
+        assert store.merge()
+        slow.set()
+        
+        replaced = VectorDocument("doc3", "chunk_0", "text 3 new", docs[3].embedding, {"parity": 1})
+        store.add_documents([replaced] + docs[30:32])
+        merge = threading.Thread(target=store.merge)
+        merge.start()
+        assert building.wait(5)
+        
+        assert store._frozen is not None
+        assert store.similarity_search(docs[3].embedding, k=1)[0].text == "text 3 new"
+        # 얼린 뒤 기록된 툼스톤은 frozen 델타에도 적용
+        store.delete_document("doc31")
+        assert "doc31" not in {d.document_id for d in store.similarity_search(docs[31].embedding, k=3)}
+        
+        release.set()
+        merge.join(5)
+        assert store.similarity_search(docs[3].embedding, k=1)[0].text == "text 3 new"
+        assert "doc31" not in {d.document_id for d in store.similarity_search(docs[31].embedding, k=3)}
+    
+    def test_batch_search_matches_single(self):
+        """배치 검색이 쿼리별 검색과 같고, 메인/델타를 쿼리마다가 아니라 배치로 검색하는지 테스트"""
+        from src.vectorstore.lsm_store import LSMVectorStore
+        
+        calls = []
+        
+        class RecordingMain(MockVectorStore):
+            def similarity_search_batch(self, query_embeddings, k=5, filter_metadata=None):
+                calls.append((len(query_embeddings), k))
+                return super().similarity_search_batch(query_embeddings, k, filter_metadata)
+        
+        store = LSMVectorStore(main_factory=RecordingMain, merge_threshold=0)
+        reference = MockVectorStore()
+        for target in (store, reference):
+            target.add_documents(self._docs(0, 60))
+        store.merge()
+        replaced = VectorDocument("doc3", "chunk_0", "text 3 new", self._docs(0, 4)[3].embedding, {"parity": 1})
+        for target in (store, reference):
+            target.add_documents([replaced] + self._docs(60, 70))
+            for i in range(0, 60, 4):
+                target.delete_document(f"doc{i}")
+        # 병합 중인 frozen 델타도 배치 검색 대상
+        store._frozen, store._active = store._active, MockVectorStore()
+        store._frozen_sequence = store._sequence
+        store._active.add_documents(self._docs(70, 75))
+        reference.add_documents(self._docs(70, 75))
+        
+        queries = np.random.default_rng(2).normal(size=(12, 16)).tolist() + [[0.0] * 16]
+        for filter_metadata in (None, {"parity": 1}):
+            calls.clear()
+            batch = store.similarity_search_batch(queries, k=6, filter_metadata=filter_metadata)
+            assert len(calls) <= 3 and calls[0] == (len(queries), 12)
+            assert [self._keys(results) for results in batch] == [
+                self._keys(store.similarity_search(query, k=6, filter_metadata=filter_metadata)) for query in queries
+            ]
+            assert [self._keys(results) for results in batch[:-1]] == [
+                self._keys(reference.similarity_search(query, k=6, filter_metadata=filter_metadata))
+                for query in queries[:-1]
+            ]
+            assert batch[-1] == []
+        assert store.similarity_search_batch([], k=3) == []
+    
+    def test_tombstones_bounded_overfetch(self):
+        """툼스톤이 많아도 k + 툼스톤 수를 한 번에 요청하지 않고 두 배씩 늘려 재검색"""
+        from src.vectorstore.lsm_store import LSMVectorStore
+        
+        requested = []
+        
+        class RecordingMain(MockVectorStore):
+            def similarity_search(self, query_embedding, k=5, filter_metadata=None):
+                requested.append(k)
+                return super().similarity_search(query_embedding, k, filter_metadata)
+        
+        store = LSMVectorStore(main_factory=RecordingMain, merge_threshold=0)
+        reference = MockVectorStore()
+        docs = self._docs(0, 300)
+        for target in (store, reference):
+            target.add_documents(docs)
+        store.merge()
+        for target in (store, reference):
+            for i in range(0, 300, 3):
+                target.delete_document(f"doc{i}")
+        assert store.tombstone_count == 100
+        
+        query = docs[0].embedding
+        requested.clear()
+        assert self._keys(store.similarity_search(query, k=5)) == self._keys(reference.similarity_search(query, k=5))
+        assert requested[0] == 10 and max(requested) < 5 + store.tombstone_count
+        
+        # 가려지지 않은 결과가 k개보다 적으면 메인을 끝까지 보고 있는 만큼 반환
+        for i in range(300):
+            if i % 3:
+                store.delete_document(f"doc{i}")
+        store.add_documents(docs[:2])
+        assert {d.document_id for d in store.similarity_search(query, k=5)} == {"doc0", "doc1"}
+    
+    def test_hnsw_main_merged_incrementally(self, monkeypatch):
+        """HNSW 메인은 기존 그래프 복사본에 델타만 삽입하고, 검색 중인 이전 메인은 변경하지 않음"""
+        from src.vectorstore.lsm_store import LSMVectorStore
+        from src.vectorstore.hnsw_store import HNSWVectorStore
+        
+        inserted = []
+        original_insert = HNSWVectorStore._insert
+        monkeypatch.setattr(HNSWVectorStore, "_insert", lambda self, node: inserted.append(node) or original_insert(self, node))
+        
+        store = LSMVectorStore(main_factory=lambda: HNSWVectorStore(seed=0), merge_threshold=0)
+        docs = self._docs(0, 60)
+        store.add_documents(docs[:50])
+        assert store.merge() and len(inserted) == 50
+        first_main = store._main
+        
+        replaced = VectorDocument("doc3", "chunk_0", "text 3 new", docs[3].embedding, {"parity": 1})
+        store.add_documents([replaced] + docs[50:])
+        store.delete_document("doc7")
+        inserted.clear()
+        assert store.merge()
+        assert len(inserted) == 11
+        assert store._main is not first_main and len(first_main) == 50
+        assert len(store._main) == 59 and store.tombstone_count == 0
+        
+        assert store.similarity_search(docs[3].embedding, k=1)[0].text == "text 3 new"
+        assert store.similarity_search(docs[55].embedding, k=1)[0].document_id == "doc55"
+        assert "doc7" not in {d.document_id for d in store.similarity_search(docs[7].embedding, k=5)}
+        
+        # 삭제 표시 노드가 살아 있는 노드보다 많아지면 전체 재구성
+        for i in range(40):
+            store.delete_document(f"doc{i}")
+        assert store.merge()
+        assert store._main.tombstone_count == 0 and len(store._main) == 20
+    
+    def test_factory(self):
+        """lsm 타입 팩토리 생성 테스트"""
+        from src.vectorstore.factory import create_vector_store
+        from src.vectorstore.lsm_store import LSMVectorStore
+        from src.vectorstore.hnsw_store import HNSWVectorStore
+        
+        store = create_vector_store({"type": "lsm", "merge_threshold": 5})
+        assert isinstance(store, LSMVectorStore) and isinstance(store._main, HNSWVectorStore)
+        store.background_merge = False
+        store.add_documents(self._docs(0, 6))
+        assert store.merges == 1
+        assert store.similarity_search(self._docs(0, 6)[2].embedding, k=1)[0].document_id == "doc2"
+
+
+class TestBulkWriter:
+    """BulkWriter 병렬 대량 쓰기 테스트 클래스"""
+    
+    class ThrottlingResource:
+        """일부 요청을 스로틀링 오류/UnprocessedItems로 응답하는 Fake 리소스"""
+        
+        def __init__(self, throttle_every=3):
+            import threading
+            self.items = {}
+            self.calls = 0
+            self.throttle_every = throttle_every
+            self.lock = threading.Lock()
+        
+        def batch_write_item(self, RequestItems):
+            from botocore.exceptions import ClientError
+            
+            with self.lock:
+                self.calls += 1
+                call = self.calls
+            requests = RequestItems["t"]
+            if call % self.throttle_every == 0:
+                raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "BatchWriteItem")
+            processed, rest = (requests[:len(requests) // 2], requests[len(requests) // 2:]) if call % 5 == 0 else (requests, [])
+            with self.lock:
+                for request in processed:
+                    item = request["PutRequest"]["Item"]
+                    self.items[(item["document_id"], item["chunk_id"])] = item
+            return {"UnprocessedItems": {"t": rest} if rest else {}}
+    
+    def test_put_items_with_throttling(self, monkeypatch):
+        """스로틀링/UnprocessedItems 재시도, 동시 요청 수 감소, 중복 키 제거 테스트"""
+        from src.vectorstore import bulk_writer
+        from src.vectorstore.bulk_writer import BulkWriter
+        
+        monkeypatch.setattr(bulk_writer.time, "sleep", lambda seconds: None)
+        resource = self.ThrottlingResource()
+        writer = BulkWriter(lambda: resource, "t", max_workers=8)
+        items = [{"document_id": f"doc{i % 40}", "chunk_id": f"chunk_{i}", "text": str(i)} for i in range(1000)]
+        
+        stats = writer.put_items(items + [dict(items[0], text="latest")])
+        assert len(resource.items) == 1000
+        assert resource.items[("doc0", "chunk_0")]["text"] == "latest"
+        assert stats["items"] == 1000 and stats["batches"] == 40
+        assert stats["throttles"] > 0 and stats["retries"] == stats["throttles"]
+        assert stats["items_per_second"] > 0
+        assert 1 <= writer.concurrency < 8
+    
+    def test_errors(self, monkeypatch):
+        """스로틀링이 아닌 오류는 그대로 전달, 재시도 초과 시 RuntimeError"""
+        from botocore.exceptions import ClientError
+        from src.vectorstore import bulk_writer
+        from src.vectorstore.bulk_writer import BulkWriter
+        
+        monkeypatch.setattr(bulk_writer.time, "sleep", lambda seconds: None)
+        
+        class Failing:
+            def __init__(self, code):
+                self.code = code
+            
+            def batch_write_item(self, RequestItems):
+                raise ClientError({"Error": {"Code": self.code}}, "BatchWriteItem")
+        
+        keys = [{"document_id": "d", "chunk_id": str(i)} for i in range(3)]
+        with pytest.raises(ClientError):
+            BulkWriter(lambda: Failing("ValidationException"), "t").delete_keys(keys)
+        writer = BulkWriter(lambda: Failing("ThrottlingException"), "t", max_retries=2)
+        with pytest.raises(RuntimeError):
+            writer.delete_keys(keys)
+        assert writer.concurrency == 1
+        with pytest.raises(ValueError):
+            BulkWriter(lambda: None, "t", max_workers=2, min_workers=3)
+    
+    def test_executor_reused_across_calls(self, monkeypatch):
+        """호출마다 스레드 풀을 새로 만들지 않고 같은 쓰기 스레드(스레드별 리소스)를 재사용하는지 테스트"""
+        from src.vectorstore import bulk_writer
+        from src.vectorstore.bulk_writer import BulkWriter
+        
+        monkeypatch.setattr(bulk_writer.time, "sleep", lambda seconds: None)
+        resource = self.ThrottlingResource(throttle_every=10 ** 9)
+        threads = set()
+        
+        def resource_factory():
+            threads.add(threading.get_ident())
+            return resource
+        
+        with BulkWriter(resource_factory, "t", max_workers=2) as writer:
+            for round_ in range(5):
+                items = [{"document_id": "d", "chunk_id": f"{round_}_{i}"} for i in range(100)]
+                writer.put_items(items)
+        assert len(resource.items) == 500
+        assert 1 <= len(threads) <= 2
+        with pytest.raises(RuntimeError):
+            writer.put_items([{"document_id": "d", "chunk_id": "late"}])